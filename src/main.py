@@ -13,6 +13,12 @@ from src.models.questao import Questao
 from src.models.sessao_treinamento import SessaoTreinamento
 from src.models.resposta_questao import RespostaQuestao
 from src.models.metrica_usuario import MetricaUsuario
+from src.models.estudo_diario import EstudoDiario
+from src.models.insight_usuario import InsightUsuario
+from src.models.estatistica_questao import EstatisticaQuestao
+from src.models.token_revogado import TokenRevogado
+from src.models.lancamento_credito import LancamentoCredito
+from src.models.compra import Compra
 
 from src.routes.user import user_bp
 from src.routes.disciplina import disciplina_bp
@@ -20,12 +26,23 @@ from src.routes.mapa_mental import mapa_mental_bp
 from src.routes.questao import questao_bp
 from src.routes.treinamento import treinamento_bp
 from src.routes.metrica import metrica_bp
+from src.routes.busca import busca_bp
+from src.routes.exportacao import exportacao_bp
+from src.routes.resumo import resumo_bp
+from src.routes.compra import compra_bp
+from src.utils.migracoes import aplicar_migracoes
+from src.utils import ranking
+from src.utils import miniaturas  # registra a geração das miniaturas nos eventos da sessão
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
-app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
+# Assina os tokens de acesso: vem do ambiente e nunca do código versionado
+app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY')
+if not app.config['SECRET_KEY']:
+    raise RuntimeError('Variável de ambiente SECRET_KEY não definida')
 
 # Configurar CORS para permitir requisições do frontend
-CORS(app, origins="*")
+# max_age permite ao navegador reutilizar o preflight em vez de repeti-lo a cada GET
+CORS(app, origins="*", max_age=86400)
 
 # Registrar blueprints
 app.register_blueprint(user_bp, url_prefix='/api')
@@ -34,14 +51,24 @@ app.register_blueprint(mapa_mental_bp, url_prefix='/api')
 app.register_blueprint(questao_bp, url_prefix='/api')
 app.register_blueprint(treinamento_bp, url_prefix='/api')
 app.register_blueprint(metrica_bp, url_prefix='/api')
+app.register_blueprint(busca_bp, url_prefix='/api')
+app.register_blueprint(exportacao_bp, url_prefix='/api')
+app.register_blueprint(resumo_bp, url_prefix='/api')
+app.register_blueprint(compra_bp, url_prefix='/api')
 
 # Configuração do banco de dados
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get(
+    'DATABASE_URL',
+    f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+)
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 db.init_app(app)
 
 with app.app_context():
     db.create_all()
+    # Índices, colunas e tabelas virtuais em bancos já existentes
+    aplicar_migracoes(db.engine)
+    ranking.reconstruir()
 
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
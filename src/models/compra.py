@@ -0,0 +1,30 @@
+from src.models.user import db
+from datetime import datetime
+
+class Compra(db.Model):
+    """Conteúdo pago (mapa ou resumo) liberado para um usuário"""
+    id = db.Column(db.Integer, primary_key=True)
+    usuario_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    tipo_conteudo = db.Column(db.String(20), nullable=False)  # mapa, resumo
+    conteudo_id = db.Column(db.Integer, nullable=False)
+    valor = db.Column(db.Float, nullable=False)
+    data_compra = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        # Verificação de acesso em uma busca no índice; impede comprar o mesmo conteúdo duas vezes
+        db.Index('uq_compra_usuario_conteudo', 'usuario_id', 'tipo_conteudo', 'conteudo_id', unique=True),
+        db.Index('ix_compra_usuario_data', 'usuario_id', 'data_compra', 'id'),
+    )
+
+    def __repr__(self):
+        return f'<Compra {self.usuario_id} {self.tipo_conteudo}:{self.conteudo_id}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'usuario_id': self.usuario_id,
+            'tipo_conteudo': self.tipo_conteudo,
+            'conteudo_id': self.conteudo_id,
+            'valor': self.valor,
+            'data_compra': self.data_compra.isoformat() if self.data_compra else None
+        }
@@ -1,4 +1,8 @@
 from src.models.user import db
+from src.models.mapa_mental import MapaMental
+from src.models.resumo import Resumo
+from src.models.questao import Questao
+from sqlalchemy import func, literal, union_all
 from datetime import datetime
 
 class Disciplina(db.Model):
@@ -16,14 +20,37 @@ class Disciplina(db.Model):
     def __repr__(self):
         return f'<Disciplina {self.nome}>'
 
-    def to_dict(self):
+    @staticmethod
+    def contar_conteudos(disciplina_ids=None):
+        """Conta mapas, resumos e questões ativos por disciplina em uma única consulta agrupada"""
+        consultas = []
+        for modelo, tipo in ((MapaMental, 'mapas'), (Resumo, 'resumos'), (Questao, 'questoes')):
+            consulta = db.select(
+                modelo.disciplina_id,
+                literal(tipo).label('tipo'),
+                func.count(modelo.id).label('total')
+            ).where(modelo.ativo == True)
+            if disciplina_ids is not None:
+                consulta = consulta.where(modelo.disciplina_id.in_(disciplina_ids))
+            consultas.append(consulta.group_by(modelo.disciplina_id))
+        
+        contagens = {}
+        for disciplina_id, tipo, total in db.session.execute(union_all(*consultas)):
+            contagens.setdefault(disciplina_id, {})[tipo] = total
+        return contagens
+
+    def to_dict(self, contagens=None):
+        # Sem contagens pré-calculadas, consulta apenas esta disciplina
+        if contagens is None:
+            contagens = Disciplina.contar_conteudos([self.id]).get(self.id, {})
+        
         return {
             'id': self.id,
             'nome': self.nome,
             'cor': self.cor,
             'data_criacao': self.data_criacao.isoformat() if self.data_criacao else None,
-            'mapas_count': len(self.mapas),
-            'resumos_count': len(self.resumos),
-            'questoes_count': len(self.questoes)
+            'mapas_count': contagens.get('mapas', 0),
+            'resumos_count': contagens.get('resumos', 0),
+            'questoes_count': contagens.get('questoes', 0)
         }
 
@@ -0,0 +1,28 @@
+from src.models.user import db
+from datetime import datetime
+
+class EstatisticaQuestao(db.Model):
+    """Estatísticas de calibração de uma questão, calculadas do histórico de respostas"""
+    questao_id = db.Column(db.Integer, db.ForeignKey('questao.id'), primary_key=True)
+    respostas = db.Column(db.Integer, default=0)
+    acertos = db.Column(db.Integer, default=0)
+    p_valor = db.Column(db.Float)  # proporção de acertos (0-1)
+    discriminacao = db.Column(db.Float)  # correlação ponto-bisserial (-1 a 1)
+    tempo_mediano_segundos = db.Column(db.Float)
+    dificuldade_sugerida = db.Column(db.String(20))  # facil, medio, dificil
+    atualizado_em = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<EstatisticaQuestao {self.questao_id}>'
+
+    def to_dict(self):
+        return {
+            'questao_id': self.questao_id,
+            'respostas': self.respostas,
+            'acertos': self.acertos,
+            'p_valor': round(self.p_valor, 4) if self.p_valor is not None else None,
+            'discriminacao': round(self.discriminacao, 4) if self.discriminacao is not None else None,
+            'tempo_mediano_segundos': self.tempo_mediano_segundos,
+            'dificuldade_sugerida': self.dificuldade_sugerida,
+            'atualizado_em': self.atualizado_em.isoformat() if self.atualizado_em else None
+        }
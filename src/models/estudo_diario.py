@@ -0,0 +1,54 @@
+from src.models.user import db
+from sqlalchemy.dialects.sqlite import insert
+
+class EstudoDiario(db.Model):
+    """Totais diários de estudo por usuário e disciplina, atualizados ao finalizar cada sessão"""
+    id = db.Column(db.Integer, primary_key=True)
+    usuario_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    disciplina_id = db.Column(db.Integer, nullable=False, default=0)  # 0 = sessões sem disciplina
+    dia = db.Column(db.Date, nullable=False)
+    minutos = db.Column(db.Integer, default=0)
+    sessoes = db.Column(db.Integer, default=0)
+    respondidas = db.Column(db.Integer, default=0)
+    acertos = db.Column(db.Integer, default=0)
+
+    __table_args__ = (
+        # Atende tanto o upsert quanto a consulta por intervalo de dias de um usuário
+        db.Index('uq_estudo_diario_usuario_dia_disciplina', 'usuario_id', 'dia', 'disciplina_id', unique=True),
+    )
+
+    def __repr__(self):
+        return f'<EstudoDiario {self.usuario_id}-{self.disciplina_id} {self.dia}>'
+
+    @staticmethod
+    def registrar_sessao(sessao):
+        """Soma uma sessão finalizada ao dia correspondente (upsert)"""
+        valores = {
+            'usuario_id': sessao.usuario_id,
+            'disciplina_id': sessao.disciplina_id or 0,
+            'dia': sessao.data_fim.date(),
+            'minutos': sessao.tempo_total_segundos // 60,
+            'sessoes': 1,
+            'respondidas': sessao.respondidas or 0,
+            'acertos': sessao.acertos or 0
+        }
+        comando = insert(EstudoDiario).values(**valores)
+        db.session.execute(comando.on_conflict_do_update(
+            index_elements=['usuario_id', 'dia', 'disciplina_id'],
+            set_={
+                coluna: getattr(EstudoDiario, coluna) + getattr(comando.excluded, coluna)
+                for coluna in ('minutos', 'sessoes', 'respondidas', 'acertos')
+            }
+        ))
+
+    def to_dict(self):
+        return {
+            'usuario_id': self.usuario_id,
+            'disciplina_id': self.disciplina_id or None,
+            'dia': self.dia.isoformat() if self.dia else None,
+            'minutos': self.minutos,
+            'sessoes': self.sessoes,
+            'respondidas': self.respondidas,
+            'acertos': self.acertos
+        }
+
@@ -0,0 +1,31 @@
+from src.models.user import db
+from datetime import datetime
+
+class InsightUsuario(db.Model):
+    """Insights pré-calculados por usuário (ver src/utils/insights.py)"""
+    id = db.Column(db.Integer, primary_key=True)
+    usuario_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    posicao = db.Column(db.Integer, nullable=False)  # ordem de exibição, a partir de 1
+    disciplina_id = db.Column(db.Integer, db.ForeignKey('disciplina.id'))
+    tipo = db.Column(db.String(20), nullable=False)  # alerta, parabens, motivacao, sugestao
+    titulo = db.Column(db.String(200), nullable=False)
+    descricao = db.Column(db.Text, nullable=False)
+    acao = db.Column(db.String(100))
+    prioridade = db.Column(db.String(10), nullable=False)  # alta, media, baixa
+    gerado_em = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('uq_insight_usuario_posicao', 'usuario_id', 'posicao', unique=True),
+    )
+
+    def __repr__(self):
+        return f'<InsightUsuario {self.usuario_id}#{self.posicao}>'
+
+    def to_dict(self):
+        return {
+            'tipo': self.tipo,
+            'titulo': self.titulo,
+            'descricao': self.descricao,
+            'acao': self.acao,
+            'prioridade': self.prioridade
+        }
@@ -0,0 +1,31 @@
+from src.models.user import db
+from datetime import datetime
+
+class LancamentoCredito(db.Model):
+    """Livro-razão de créditos (somente inclusão): o saldo de um usuário é a soma dos seus lançamentos"""
+    id = db.Column(db.Integer, primary_key=True)
+    usuario_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    valor = db.Column(db.Float, nullable=False)  # positivo = crédito, negativo = débito
+    tipo = db.Column(db.String(20), nullable=False)  # saldo_inicial, recarga, compra, ajuste
+    referencia_tipo = db.Column(db.String(20))  # mapa, resumo
+    referencia_id = db.Column(db.Integer)
+    data_lancamento = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        # Extrato paginado por usuário e soma por usuário na reconciliação
+        db.Index('ix_lancamento_usuario_data', 'usuario_id', 'data_lancamento', 'id'),
+    )
+
+    def __repr__(self):
+        return f'<LancamentoCredito {self.usuario_id} {self.valor:+}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'usuario_id': self.usuario_id,
+            'valor': self.valor,
+            'tipo': self.tipo,
+            'referencia_tipo': self.referencia_tipo,
+            'referencia_id': self.referencia_id,
+            'data_lancamento': self.data_lancamento.isoformat() if self.data_lancamento else None
+        }
@@ -1,19 +1,36 @@
 from src.models.user import db
 from datetime import datetime
 import json
+from src.utils.codec_mapa import codificar, decodificar, texto_json
 
 class MapaMental(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     disciplina_id = db.Column(db.Integer, db.ForeignKey('disciplina.id'), nullable=False)
     titulo = db.Column(db.String(200), nullable=False)
-    nodos = db.Column(db.Text, nullable=False)  # JSON string
-    arestas = db.Column(db.Text, nullable=False)  # JSON string
+    # Codificados por src/utils/codec_mapa.py (linhas antigas podem conter JSON em texto)
+    nodos = db.Column(db.LargeBinary, nullable=False)
+    arestas = db.Column(db.LargeBinary, nullable=False)
     thumbnail_url = db.Column(db.String(500))
     preco = db.Column(db.Float, default=0.0)
     autor_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     data_criacao = db.Column(db.DateTime, default=datetime.utcnow)
     data_atualizacao = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     ativo = db.Column(db.Boolean, default=True)
+    # Mantidos por set_nodos/set_arestas, para listagens que não carregam o JSON
+    total_nodos = db.Column(db.Integer, default=0)
+    total_arestas = db.Column(db.Integer, default=0)
+    # Incrementada a cada UPDATE; base da concorrência otimista do PATCH
+    versao = db.Column(db.Integer, nullable=False, default=1)
+
+    __table_args__ = (
+        db.Index('ix_mapa_mental_ativos_data', 'data_criacao', 'id', sqlite_where=db.text('ativo = 1')),
+        db.Index('ix_mapa_mental_ativos_disciplina_data', 'disciplina_id', 'data_criacao', 'id',
+                 sqlite_where=db.text('ativo = 1')),
+        db.Index('ix_mapa_mental_ativos_autor_data', 'autor_id', 'data_criacao', 'id',
+                 sqlite_where=db.text('ativo = 1')),
+    )
+
+    __mapper_args__ = {'version_id_col': versao}
 
     # Relacionamento com autor
     autor = db.relationship('User', backref='mapas_criados')
@@ -24,38 +41,91 @@ class MapaMental(db.Model):
     def get_nodos(self):
         """Retorna os nodos como objeto Python"""
         try:
-            return json.loads(self.nodos) if self.nodos else []
-        except json.JSONDecodeError:
+            return decodificar(self.nodos)
+        except ValueError:
             return []
 
     def set_nodos(self, nodos_list):
         """Define os nodos a partir de uma lista Python"""
-        self.nodos = json.dumps(nodos_list)
+        self.nodos = codificar(nodos_list)
+        self.total_nodos = len(nodos_list)
 
     def get_arestas(self):
         """Retorna as arestas como objeto Python"""
         try:
-            return json.loads(self.arestas) if self.arestas else []
-        except json.JSONDecodeError:
+            return decodificar(self.arestas)
+        except ValueError:
             return []
 
     def set_arestas(self, arestas_list):
         """Define as arestas a partir de uma lista Python"""
-        self.arestas = json.dumps(arestas_list)
-
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'disciplina_id': self.disciplina_id,
-            'titulo': self.titulo,
-            'nodos': self.get_nodos(),
-            'arestas': self.get_arestas(),
-            'thumbnail_url': self.thumbnail_url,
-            'preco': self.preco,
-            'autor_id': self.autor_id,
-            'data_criacao': self.data_criacao.isoformat() if self.data_criacao else None,
-            'data_atualizacao': self.data_atualizacao.isoformat() if self.data_atualizacao else None,
-            'ativo': self.ativo,
-            'disciplina_nome': self.disciplina.nome if self.disciplina else None
-        }
+        self.arestas = codificar(arestas_list)
+        self.total_arestas = len(arestas_list)
+
+    def to_dict(self, campos=None):
+        """Dicionário do mapa; com `campos`, apenas essas chaves (e o id)
+
+        Só os atributos pedidos são acessados, então colunas adiadas na consulta
+        (como nodos e arestas) não chegam a ser carregadas.
+        """
+        if campos is None:
+            campos = CAMPOS
+        elif 'id' not in campos:
+            campos = ('id',) + tuple(campos)
+        return {campo: CAMPOS[campo](self) for campo in campos}
+
+    def to_json_bruto(self):
+        """JSON completo do mapa com nodos e arestas copiados do texto armazenado, sem decodificar"""
+        dados = self.to_dict([campo for campo in CAMPOS if campo not in ('nodos', 'arestas')])
+        corpo = json.dumps(dados)
+        return f'{corpo[:-1]}, "nodos": {_texto_coluna(self.nodos)}, "arestas": {_texto_coluna(self.arestas)}}}'
+
+
+def _texto_coluna(valor):
+    """Texto JSON de nodos/arestas pronto para ser inserido na resposta
+
+    O texto do formato antigo não é decodificado (isso custaria o mesmo que
+    get_nodos em toda leitura): só se confere que ele é uma lista JSON, o que
+    descarta valores truncados. Valores ilegíveis viram [], como em
+    get_nodos/get_arestas; o comando recomprimir-mapas converte as linhas antigas
+    e corrige de vez as inválidas.
+    """
+    try:
+        texto = texto_json(valor)
+    except ValueError:
+        return '[]'
+    if isinstance(valor, str):
+        texto = texto.strip()
+        if not (texto.startswith('[') and texto.endswith(']')):
+            return '[]'
+    return texto
+
+
+def _data_iso(valor):
+    return valor.isoformat() if valor else None
+
+
+# Chave -> como obter o valor a partir do mapa
+CAMPOS = {
+    'id': lambda mapa: mapa.id,
+    'disciplina_id': lambda mapa: mapa.disciplina_id,
+    'titulo': lambda mapa: mapa.titulo,
+    'nodos': lambda mapa: mapa.get_nodos(),
+    'arestas': lambda mapa: mapa.get_arestas(),
+    'thumbnail_url': lambda mapa: mapa.thumbnail_url,
+    'preco': lambda mapa: mapa.preco,
+    'autor_id': lambda mapa: mapa.autor_id,
+    'data_criacao': lambda mapa: _data_iso(mapa.data_criacao),
+    'data_atualizacao': lambda mapa: _data_iso(mapa.data_atualizacao),
+    'ativo': lambda mapa: mapa.ativo,
+    'disciplina_nome': lambda mapa: mapa.disciplina.nome if mapa.disciplina else None,
+    'total_nodos': lambda mapa: mapa.total_nodos,
+    'total_arestas': lambda mapa: mapa.total_arestas,
+    'versao': lambda mapa: mapa.versao,
+}
 
+# Visão de catálogo (?view=summary)
+CAMPOS_RESUMO = (
+    'id', 'disciplina_id', 'titulo', 'thumbnail_url', 'preco', 'autor_id',
+    'data_criacao', 'data_atualizacao', 'disciplina_nome', 'total_nodos', 'total_arestas'
+)
@@ -11,6 +11,11 @@ class MetricaUsuario(db.Model):
     ultima_atividade = db.Column(db.Date, default=date.today)
     data_atualizacao = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        # Uma única métrica por usuário e disciplina
+        db.Index('uq_metrica_usuario_disciplina', 'usuario_id', 'disciplina_id', unique=True),
+    )
+
     # Relacionamentos
     usuario = db.relationship('User', backref='metricas')
 
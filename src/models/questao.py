@@ -14,6 +14,14 @@ class Questao(db.Model):
     data_criacao = db.Column(db.DateTime, default=datetime.utcnow)
     ativo = db.Column(db.Boolean, default=True)
 
+    __table_args__ = (
+        db.Index('ix_questao_disciplina_ativo_dificuldade', 'disciplina_id', 'ativo', 'dificuldade'),
+        # Índices parciais: só questões ativas, para listagem paginada e contagens
+        db.Index('ix_questao_ativas_data', 'data_criacao', 'id', sqlite_where=db.text('ativo = 1')),
+        db.Index('ix_questao_ativas_disciplina_data', 'disciplina_id', 'data_criacao', 'id',
+                 sqlite_where=db.text('ativo = 1')),
+    )
+
     # Relacionamento com autor
     autor = db.relationship('User', backref='questoes_criadas')
     
@@ -10,6 +10,10 @@ class RespostaQuestao(db.Model):
     tempo_resposta_segundos = db.Column(db.Integer, default=0)
     data_resposta = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_resposta_sessao_questao', 'sessao_id', 'questao_id'),
+    )
+
     def __repr__(self):
         return f'<RespostaQuestao {self.id}>'
 
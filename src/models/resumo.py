@@ -12,18 +12,23 @@ class Resumo(db.Model):
     data_atualizacao = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     ativo = db.Column(db.Boolean, default=True)
 
+    __table_args__ = (
+        db.Index('ix_resumo_ativos_disciplina_data', 'disciplina_id', 'data_criacao', 'id',
+                 sqlite_where=db.text('ativo = 1')),
+        db.Index('ix_resumo_ativos_data', 'data_criacao', 'id', sqlite_where=db.text('ativo = 1')),
+    )
+
     # Relacionamento com autor
     autor = db.relationship('User', backref='resumos_criados')
 
     def __repr__(self):
         return f'<Resumo {self.titulo}>'
 
-    def to_dict(self):
-        return {
+    def to_dict(self, incluir_conteudo=True):
+        data = {
             'id': self.id,
             'disciplina_id': self.disciplina_id,
             'titulo': self.titulo,
-            'conteudo': self.conteudo,
             'preco': self.preco,
             'autor_id': self.autor_id,
             'data_criacao': self.data_criacao.isoformat() if self.data_criacao else None,
@@ -31,4 +36,10 @@ class Resumo(db.Model):
             'ativo': self.ativo,
             'disciplina_nome': self.disciplina.nome if self.disciplina else None
         }
+        
+        # Listagens omitem o conteúdo (coluna adiada na consulta)
+        if incluir_conteudo:
+            data['conteudo'] = self.conteudo
+        
+        return data
 
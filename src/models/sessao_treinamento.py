@@ -12,9 +12,18 @@ class SessaoTreinamento(db.Model):
     data_inicio = db.Column(db.DateTime, default=datetime.utcnow)
     data_fim = db.Column(db.DateTime)
     finalizada = db.Column(db.Boolean, default=False)
+    # Contadores mantidos a cada resposta, para não carregar as respostas da sessão
+    respondidas = db.Column(db.Integer, default=0)
+    acertos = db.Column(db.Integer, default=0)
+
+    __table_args__ = (
+        db.Index('ix_sessao_usuario_finalizada_fim', 'usuario_id', 'finalizada', 'data_fim'),
+        db.Index('ix_sessao_usuario_inicio', 'usuario_id', 'data_inicio'),
+    )
 
     # Relacionamentos
     usuario = db.relationship('User', backref='sessoes_treinamento')
+    disciplina = db.relationship('Disciplina')
     respostas = db.relationship('RespostaQuestao', backref='sessao', lazy=True, cascade='all, delete-orphan')
 
     def __repr__(self):
@@ -22,11 +31,16 @@ class SessaoTreinamento(db.Model):
 
     def calcular_taxa_acertos(self):
         """Calcula a taxa de acertos da sessão"""
-        if not self.respostas:
+        if not self.respondidas:
             return 0.0
         
-        acertos = sum(1 for resposta in self.respostas if resposta.correta)
-        return (acertos / len(self.respostas)) * 100
+        return ((self.acertos or 0) / self.respondidas) * 100
+
+    def registrar_respostas(self, quantidade, acertos):
+        """Incrementa progresso e contadores no próprio UPDATE, sem perder respostas concorrentes"""
+        self.itens_completados = SessaoTreinamento.itens_completados + quantidade
+        self.respondidas = SessaoTreinamento.respondidas + quantidade
+        self.acertos = SessaoTreinamento.acertos + acertos
 
     def finalizar_sessao(self):
         """Finaliza a sessão e atualiza os dados"""
@@ -48,6 +62,8 @@ class SessaoTreinamento(db.Model):
             'data_inicio': self.data_inicio.isoformat() if self.data_inicio else None,
             'data_fim': self.data_fim.isoformat() if self.data_fim else None,
             'finalizada': self.finalizada,
+            'respondidas': self.respondidas,
+            'acertos': self.acertos,
             'taxa_acertos': self.calcular_taxa_acertos(),
             'disciplina_nome': self.disciplina.nome if self.disciplina else None
         }
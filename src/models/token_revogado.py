@@ -0,0 +1,13 @@
+from src.models.user import db
+from datetime import datetime
+
+class TokenRevogado(db.Model):
+    """Revogação de um token (jti) ou de todos os tokens de um usuário emitidos até revogado_em"""
+    id = db.Column(db.Integer, primary_key=True)
+    jti = db.Column(db.String(32), unique=True)
+    usuario_id = db.Column(db.Integer)
+    revogado_em = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    expira_em = db.Column(db.DateTime, nullable=False)  # depois disso a linha pode ser descartada
+
+    def __repr__(self):
+        return f'<TokenRevogado {self.jti or self.usuario_id}>'
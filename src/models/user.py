@@ -1,5 +1,5 @@
 from flask_sqlalchemy import SQLAlchemy
-from werkzeug.security import generate_password_hash, check_password_hash
+from src.utils.senhas import gerar_hash, verificar_hash
 from datetime import datetime
 
 db = SQLAlchemy()
@@ -14,27 +14,42 @@ class User(db.Model):
     data_cadastro = db.Column(db.DateTime, default=datetime.utcnow)
     ativo = db.Column(db.Boolean, default=True)
 
+    __table_args__ = (
+        db.Index('ix_user_data_cadastro', 'data_cadastro', 'id'),
+    )
+
     def __repr__(self):
         return f'<User {self.username}>'
 
     def set_password(self, password):
-        """Define a senha do usuário (hash)"""
-        self.senha_hash = generate_password_hash(password)
+        """Define a senha do usuário (hash calculado no pool de processos)"""
+        self.senha_hash = gerar_hash(password)
 
     def check_password(self, password):
-        """Verifica se a senha está correta"""
-        return check_password_hash(self.senha_hash, password)
-
-    def debitar_creditos(self, valor):
-        """Debita créditos da conta do usuário"""
-        if self.creditos >= valor:
-            self.creditos -= valor
-            return True
-        return False
-
-    def creditar_creditos(self, valor):
-        """Adiciona créditos à conta do usuário"""
-        self.creditos += valor
+        """Verifica se a senha está correta
+
+        Se o hash foi gerado com parâmetros antigos, ele é substituído pelo hash
+        com os parâmetros atuais; cabe a quem chama fazer o commit.
+        """
+        correta, novo_hash = verificar_hash(self.senha_hash, password)
+        if novo_hash:
+            self.senha_hash = novo_hash
+        return correta
+
+    def debitar_creditos(self, valor, tipo='ajuste'):
+        """Debita créditos da conta do usuário (UPDATE condicional + lançamento no livro-razão)"""
+        # Importação local: src.utils.creditos depende deste módulo
+        from src.utils.creditos import CreditosInsuficientes, movimentar
+        try:
+            movimentar(self.id, -valor, tipo)
+        except CreditosInsuficientes:
+            return False
+        return True
+
+    def creditar_creditos(self, valor, tipo='recarga'):
+        """Adiciona créditos à conta do usuário (UPDATE atômico + lançamento no livro-razão)"""
+        from src.utils.creditos import movimentar
+        movimentar(self.id, valor, tipo)
 
     def tem_creditos_suficientes(self, valor):
         """Verifica se o usuário tem créditos suficientes"""
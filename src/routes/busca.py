@@ -0,0 +1,30 @@
+from flask import Blueprint, request, jsonify
+from src.utils.busca import TIPOS, buscar
+from src.utils.cache_http import resposta_condicional
+from src.utils.paginacao import LIMITE_MAXIMO
+
+busca_bp = Blueprint('busca', __name__)
+
+@busca_bp.route('/busca', methods=['GET'])
+@resposta_condicional('questao', 'resumo', 'mapa_mental')
+def buscar_conteudo():
+    """Busca textual em questões, resumos e mapas mentais, ordenada por relevância"""
+    try:
+        termos = request.args.get('q', '').strip()
+        if not termos:
+            return jsonify({'error': 'Parâmetro q é obrigatório'}), 400
+        
+        # Filtro opcional por tipo: ?tipos=questao,resumo,mapa
+        tipos = [tipo for tipo in request.args.get('tipos', '').split(',') if tipo]
+        invalidos = set(tipos) - set(TIPOS)
+        if invalidos:
+            return jsonify({'error': f'Tipos inválidos: {", ".join(sorted(invalidos))}'}), 400
+        
+        disciplina_id = request.args.get('disciplina_id', type=int)
+        limite = min(max(request.args.get('limite', type=int, default=20), 1), LIMITE_MAXIMO)
+        
+        resultados = buscar(termos, tipos or None, disciplina_id, limite)
+        return jsonify({'q': termos, 'resultados': resultados}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
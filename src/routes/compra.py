@@ -0,0 +1,129 @@
+from flask import Blueprint, request, jsonify, g
+from src.models.user import db
+from src.models.compra import Compra
+from src.models.lancamento_credito import LancamentoCredito
+from src.utils.autenticacao import requer_token, verificar_acesso_usuario
+from src.utils.creditos import (
+    CONTEUDOS, ConteudoNaoEncontrado, CreditosInsuficientes, comprar, movimentar, possui_acesso
+)
+from src.utils.paginacao import CursorInvalido, ler_parametros_paginacao, paginar
+
+compra_bp = Blueprint('compra', __name__)
+
+@compra_bp.route('/compras', methods=['POST'])
+@requer_token()
+def comprar_conteudo():
+    """Compra um mapa ou resumo pago com os créditos do usuário do token"""
+    try:
+        data = request.get_json()
+
+        required_fields = ['tipo_conteudo', 'conteudo_id']
+        for field in required_fields:
+            if field not in data:
+                return jsonify({'error': f'Campo {field} é obrigatório'}), 400
+        if data['tipo_conteudo'] not in CONTEUDOS:
+            return jsonify({'error': f'tipo_conteudo deve ser um de: {", ".join(CONTEUDOS)}'}), 400
+
+        compra, saldo = comprar(g.usuario_id, data['tipo_conteudo'], data['conteudo_id'])
+        db.session.commit()
+
+        if compra is None:
+            return jsonify({'compra': None, 'gratuito': True}), 200
+        if saldo is None:
+            # Já comprado antes: nada foi debitado
+            return jsonify({'compra': compra.to_dict(), 'saldo': None}), 200
+        return jsonify({'compra': compra.to_dict(), 'saldo': saldo}), 201
+    except ConteudoNaoEncontrado as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 404
+    except CreditosInsuficientes as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 402
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@compra_bp.route('/compras', methods=['GET'])
+@requer_token()
+def listar_compras():
+    """Lista as compras do usuário do token, paginadas por cursor"""
+    try:
+        cursor, limite = ler_parametros_paginacao()
+
+        query = Compra.query.filter_by(usuario_id=g.usuario_id)
+        tipo_conteudo = request.args.get('tipo_conteudo')
+        if tipo_conteudo:
+            query = query.filter_by(tipo_conteudo=tipo_conteudo)
+        compras, next_cursor = paginar(query, Compra.data_compra, Compra.id, cursor, limite)
+
+        return jsonify({'itens': [compra.to_dict() for compra in compras], 'next_cursor': next_cursor}), 200
+    except CursorInvalido as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@compra_bp.route('/compras/<tipo_conteudo>/<int:conteudo_id>/acesso', methods=['GET'])
+@requer_token()
+def verificar_acesso_conteudo(tipo_conteudo, conteudo_id):
+    """Indica se o usuário do token pode acessar o conteúdo"""
+    try:
+        if tipo_conteudo not in CONTEUDOS:
+            return jsonify({'error': 'Tipo de conteúdo inválido'}), 400
+
+        return jsonify({'acesso': possui_acesso(g.usuario_id, tipo_conteudo, conteudo_id)}), 200
+    except ConteudoNaoEncontrado as e:
+        return jsonify({'error': str(e)}), 404
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@compra_bp.route('/creditos/usuario/<int:usuario_id>/extrato', methods=['GET'])
+@requer_token()
+def extrato_creditos(usuario_id):
+    """Lista os lançamentos de créditos de um usuário, paginados por cursor"""
+    try:
+        erro = verificar_acesso_usuario(usuario_id)
+        if erro:
+            return erro
+        cursor, limite = ler_parametros_paginacao()
+
+        query = LancamentoCredito.query.filter_by(usuario_id=usuario_id)
+        lancamentos, next_cursor = paginar(
+            query, LancamentoCredito.data_lancamento, LancamentoCredito.id, cursor, limite
+        )
+
+        return jsonify({
+            'itens': [lancamento.to_dict() for lancamento in lancamentos],
+            'next_cursor': next_cursor
+        }), 200
+    except CursorInvalido as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@compra_bp.route('/creditos/usuario/<int:usuario_id>/lancamentos', methods=['POST'])
+@requer_token('admin')
+def lancar_creditos(usuario_id):
+    """Recarga ou ajuste manual de créditos (somente administradores)"""
+    try:
+        data = request.get_json()
+
+        valor = data.get('valor')
+        if not isinstance(valor, (int, float)) or isinstance(valor, bool) or valor == 0:
+            return jsonify({'error': 'Campo valor deve ser um número diferente de zero'}), 400
+        tipo = data.get('tipo', 'recarga' if valor > 0 else 'ajuste')
+        if tipo not in ('recarga', 'ajuste'):
+            return jsonify({'error': 'Campo tipo deve ser recarga ou ajuste'}), 400
+
+        saldo = movimentar(usuario_id, valor, tipo)
+        db.session.commit()
+
+        return jsonify({'usuario_id': usuario_id, 'saldo': saldo}), 201
+    except CreditosInsuficientes as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except LookupError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 404
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
@@ -1,15 +1,22 @@
 from flask import Blueprint, request, jsonify
 from src.models.user import db
 from src.models.disciplina import Disciplina
+from src.utils.cache_http import resposta_condicional
+from src.utils.cache_resultados import invalidar_metricas
 
 disciplina_bp = Blueprint('disciplina', __name__)
 
 @disciplina_bp.route('/disciplinas', methods=['GET'])
+@resposta_condicional('disciplina', 'mapa_mental', 'resumo', 'questao')
 def listar_disciplinas():
     """Lista todas as disciplinas"""
     try:
         disciplinas = Disciplina.query.all()
-        return jsonify([disciplina.to_dict() for disciplina in disciplinas]), 200
+        contagens = Disciplina.contar_conteudos()
+        return jsonify([
+            disciplina.to_dict(contagens.get(disciplina.id, {}))
+            for disciplina in disciplinas
+        ]), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -41,6 +48,7 @@ def criar_disciplina():
         return jsonify({'error': str(e)}), 500
 
 @disciplina_bp.route('/disciplinas/<int:disciplina_id>', methods=['GET'])
+@resposta_condicional('disciplina', 'mapa_mental', 'resumo', 'questao')
 def obter_disciplina(disciplina_id):
     """Obtém uma disciplina específica"""
     try:
@@ -70,6 +78,8 @@ def atualizar_disciplina(disciplina_id):
             disciplina.cor = data['cor']
         
         db.session.commit()
+        # Nome e cor aparecem nos dashboards e insights de todos os usuários
+        invalidar_metricas()
         return jsonify(disciplina.to_dict()), 200
     except Exception as e:
         db.session.rollback()
@@ -82,6 +92,7 @@ def deletar_disciplina(disciplina_id):
         disciplina = Disciplina.query.get_or_404(disciplina_id)
         db.session.delete(disciplina)
         db.session.commit()
+        invalidar_metricas()
         return jsonify({'message': 'Disciplina deletada com sucesso'}), 200
     except Exception as e:
         db.session.rollback()
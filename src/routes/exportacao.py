@@ -0,0 +1,171 @@
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from src.models.user import db
+from src.models.sessao_treinamento import SessaoTreinamento
+from src.models.resposta_questao import RespostaQuestao
+from src.models.questao import Questao
+from src.utils.autenticacao import requer_token
+from datetime import datetime
+import csv
+import io
+import json
+import zlib
+
+exportacao_bp = Blueprint('exportacao', __name__)
+
+LINHAS_POR_LOTE = 1000
+
+FORMATOS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+# Colunas exportadas: (nome no arquivo, expressão)
+COLUNAS_RESPOSTAS = (
+    ('id', RespostaQuestao.id),
+    ('sessao_id', RespostaQuestao.sessao_id),
+    ('usuario_id', SessaoTreinamento.usuario_id),
+    ('questao_id', RespostaQuestao.questao_id),
+    ('disciplina_id', Questao.disciplina_id),
+    ('resposta_usuario', RespostaQuestao.resposta_usuario),
+    ('correta', RespostaQuestao.correta),
+    ('tempo_resposta_segundos', RespostaQuestao.tempo_resposta_segundos),
+    ('data_resposta', RespostaQuestao.data_resposta),
+)
+
+COLUNAS_SESSOES = (
+    ('id', SessaoTreinamento.id),
+    ('usuario_id', SessaoTreinamento.usuario_id),
+    ('tipo', SessaoTreinamento.tipo),
+    ('disciplina_id', SessaoTreinamento.disciplina_id),
+    ('total_itens', SessaoTreinamento.total_itens),
+    ('itens_completados', SessaoTreinamento.itens_completados),
+    ('respondidas', SessaoTreinamento.respondidas),
+    ('acertos', SessaoTreinamento.acertos),
+    ('tempo_total_segundos', SessaoTreinamento.tempo_total_segundos),
+    ('data_inicio', SessaoTreinamento.data_inicio),
+    ('data_fim', SessaoTreinamento.data_fim),
+    ('finalizada', SessaoTreinamento.finalizada),
+)
+
+
+def _ler_data(nome):
+    """Lê um parâmetro ISO 8601 (data ou data e hora); ValueError se inválido"""
+    valor = request.args.get(nome)
+    if not valor:
+        return None
+    try:
+        return datetime.fromisoformat(valor)
+    except ValueError:
+        raise ValueError(f'Parâmetro {nome} deve estar no formato ISO 8601')
+
+
+def _valor_json(valor):
+    return valor.isoformat() if isinstance(valor, datetime) else valor
+
+
+def _valor_csv(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, bool):
+        return 'true' if valor else 'false'
+    return _valor_json(valor)
+
+
+def _gerar_linhas(consulta, nomes, formato):
+    """Gera o arquivo em blocos de texto, um por lote de linhas lido do cursor"""
+    if formato == 'csv':
+        buffer = io.StringIO()
+        escritor = csv.writer(buffer)
+        escritor.writerow(nomes)
+        for lote in db.session.execute(consulta).partitions():
+            escritor.writerows([_valor_csv(valor) for valor in linha] for linha in lote)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+    else:
+        for lote in db.session.execute(consulta).partitions():
+            yield ''.join(
+                json.dumps(dict(zip(nomes, map(_valor_json, linha))), ensure_ascii=False) + '\n'
+                for linha in lote
+            )
+
+
+def _comprimir(blocos):
+    compressor = zlib.compressobj(wbits=31)  # formato gzip
+    for bloco in blocos:
+        dados = compressor.compress(bloco)
+        if dados:
+            yield dados
+    yield compressor.flush()
+
+
+def _exportar(nome_arquivo, colunas, consulta):
+    """Resposta em streaming no formato pedido (?formato=ndjson|csv), com gzip se aceito"""
+    formato = request.args.get('formato', 'ndjson')
+    if formato not in FORMATOS:
+        return jsonify({'error': f'Formato deve ser um de: {", ".join(FORMATOS)}'}), 400
+    
+    # yield_per: o cursor entrega lotes sob demanda, sem carregar o resultado inteiro
+    consulta = consulta.execution_options(yield_per=LINHAS_POR_LOTE)
+    nomes = [nome for nome, _ in colunas]
+    blocos = (bloco.encode('utf-8') for bloco in _gerar_linhas(consulta, nomes, formato) if bloco)
+    
+    headers = {'Content-Disposition': f'attachment; filename={nome_arquivo}.{formato}'}
+    if 'gzip' in request.accept_encodings:
+        blocos = _comprimir(blocos)
+        headers['Content-Encoding'] = 'gzip'
+    headers['Vary'] = 'Accept-Encoding'
+    
+    return Response(stream_with_context(blocos), content_type=FORMATOS[formato], headers=headers)
+
+
+@exportacao_bp.route('/export/respostas', methods=['GET'])
+@requer_token('admin')
+def exportar_respostas():
+    """Exporta todas as respostas (?since=&until=&disciplina_id=&formato=)"""
+    try:
+        inicio = _ler_data('since')
+        fim = _ler_data('until')
+        disciplina_id = request.args.get('disciplina_id', type=int)
+        
+        consulta = db.select(*[coluna for _, coluna in COLUNAS_RESPOSTAS]).join(
+            SessaoTreinamento, SessaoTreinamento.id == RespostaQuestao.sessao_id
+        ).join(
+            Questao, Questao.id == RespostaQuestao.questao_id
+        ).order_by(RespostaQuestao.id)
+        if inicio:
+            consulta = consulta.where(RespostaQuestao.data_resposta >= inicio)
+        if fim:
+            consulta = consulta.where(RespostaQuestao.data_resposta < fim)
+        if disciplina_id:
+            consulta = consulta.where(Questao.disciplina_id == disciplina_id)
+        
+        return _exportar('respostas', COLUNAS_RESPOSTAS, consulta)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@exportacao_bp.route('/export/sessoes', methods=['GET'])
+@requer_token('admin')
+def exportar_sessoes():
+    """Exporta todas as sessões de treinamento (?since=&until=&disciplina_id=&formato=)"""
+    try:
+        inicio = _ler_data('since')
+        fim = _ler_data('until')
+        disciplina_id = request.args.get('disciplina_id', type=int)
+        
+        consulta = db.select(*[coluna for _, coluna in COLUNAS_SESSOES]).order_by(SessaoTreinamento.id)
+        if inicio:
+            consulta = consulta.where(SessaoTreinamento.data_inicio >= inicio)
+        if fim:
+            consulta = consulta.where(SessaoTreinamento.data_inicio < fim)
+        if disciplina_id:
+            consulta = consulta.where(SessaoTreinamento.disciplina_id == disciplina_id)
+        
+        return _exportar('sessoes', COLUNAS_SESSOES, consulta)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
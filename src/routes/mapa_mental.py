@@ -1,39 +1,105 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, g
 from src.models.user import db
-from src.models.mapa_mental import MapaMental
+from src.models.mapa_mental import MapaMental, CAMPOS, CAMPOS_RESUMO
 from src.models.disciplina import Disciplina
+from src.utils.cache_http import resposta_condicional
+from src.utils.autenticacao import requer_token, verificar_acesso_usuario
+from src.utils.creditos import PrecoInvalido, conteudo_pago, validar_preco, verificar_acesso_conteudo
+from src.utils.paginacao import CursorInvalido, ler_parametros_paginacao, paginar
+from src.utils.edicao_mapa import OperacaoInvalida, aplicar_operacoes
+from src.utils.grafo_mapa import obter_indice, validar_grafo
+from sqlalchemy.orm import joinedload, load_only
+from sqlalchemy.orm.exc import StaleDataError
+import json
 
 mapa_mental_bp = Blueprint('mapa_mental', __name__)
 
+# Campos com o conteúdo do mapa, liberado apenas a quem tem acesso a mapas pagos
+CAMPOS_CONTEUDO = ('nodos', 'arestas')
+
+def _ler_campos():
+    """Campos pedidos via ?view=summary ou ?fields=a,b; None para o mapa completo"""
+    if request.args.get('fields'):
+        campos = tuple(campo.strip() for campo in request.args['fields'].split(',') if campo.strip())
+        invalidos = set(campos) - set(CAMPOS)
+        if invalidos:
+            raise ValueError(f'Campos inválidos: {", ".join(sorted(invalidos))}')
+        return campos
+    view = request.args.get('view', 'full')
+    if view not in ('full', 'summary'):
+        raise ValueError('view deve ser full ou summary')
+    return CAMPOS_RESUMO if view == 'summary' else None
+
+def _projetar(query, campos):
+    """Carrega só as colunas usadas pelos campos pedidos (nodos/arestas ficam fora do SELECT)"""
+    if campos is None or 'disciplina_nome' in campos:
+        query = query.options(joinedload(MapaMental.disciplina))
+    if campos is None:
+        return query
+    colunas = {'data_criacao', 'ativo', 'preco'} | {
+        campo for campo in campos if campo in MapaMental.__table__.columns
+    }
+    return query.options(load_only(*[getattr(MapaMental, coluna) for coluna in colunas]))
+
+def _sem_conteudo(campos):
+    return [campo for campo in campos if campo not in CAMPOS_CONTEUDO]
+
+def _resposta_lista(mapas, next_cursor, campos):
+    # Nodos e arestas de mapas pagos só saem em GET /mapas/<id>, que verifica a compra;
+    # assim a listagem é a mesma para todos e o ETag não depende do usuário
+    if campos is not None:
+        return jsonify({'itens': [
+            mapa.to_dict(_sem_conteudo(campos) if conteudo_pago(mapa.preco) else campos) for mapa in mapas
+        ], 'next_cursor': next_cursor}), 200
+    # Visão completa: o JSON armazenado de nodos/arestas vai direto para a resposta
+    corpo = '{"itens": [%s], "next_cursor": %s}' % (
+        ', '.join(
+            json.dumps(mapa.to_dict(_sem_conteudo(CAMPOS))) if conteudo_pago(mapa.preco) else mapa.to_json_bruto()
+            for mapa in mapas
+        ),
+        json.dumps(next_cursor)
+    )
+    return Response(corpo, mimetype='application/json')
+
 @mapa_mental_bp.route('/mapas', methods=['GET'])
+@resposta_condicional('mapa_mental', 'disciplina')
 def listar_mapas():
-    """Lista todos os mapas mentais"""
+    """Lista os mapas mentais, paginados por cursor (?view=summary ou ?fields= para projeção)"""
     try:
         disciplina_id = request.args.get('disciplina_id', type=int)
         autor_id = request.args.get('autor_id', type=int)
+        cursor, limite = ler_parametros_paginacao()
+        
+        campos = _ler_campos()
         
-        query = MapaMental.query.filter_by(ativo=True)
+        query = _projetar(MapaMental.query.filter_by(ativo=True), campos)
         
         if disciplina_id:
             query = query.filter_by(disciplina_id=disciplina_id)
         if autor_id:
             query = query.filter_by(autor_id=autor_id)
         
-        mapas = query.all()
-        return jsonify([mapa.to_dict() for mapa in mapas]), 200
+        mapas, next_cursor = paginar(query, MapaMental.data_criacao, MapaMental.id, cursor, limite)
+        return _resposta_lista(mapas, next_cursor, campos)
+    except (CursorInvalido, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @mapa_mental_bp.route('/mapas', methods=['POST'])
+@requer_token()
 def criar_mapa():
-    """Cria um novo mapa mental"""
+    """Cria um novo mapa mental em nome do usuário do token (administradores podem informar autor_id)"""
     try:
         data = request.get_json()
         
-        required_fields = ['titulo', 'disciplina_id', 'autor_id', 'nodos', 'arestas']
+        required_fields = ['titulo', 'disciplina_id', 'nodos', 'arestas']
         for field in required_fields:
             if field not in data:
                 return jsonify({'error': f'Campo {field} é obrigatório'}), 400
+        autor_id = data.get('autor_id', g.usuario_id)
+        if autor_id != g.usuario_id and g.tipo_usuario != 'admin':
+            return jsonify({'error': 'autor_id deve ser o usuário do token'}), 403
         
         # Verificar se a disciplina existe
         disciplina = Disciplina.query.get(data['disciplina_id'])
@@ -43,10 +109,14 @@ def criar_mapa():
         mapa = MapaMental(
             titulo=data['titulo'],
             disciplina_id=data['disciplina_id'],
-            autor_id=data['autor_id'],
-            preco=data.get('preco', 0.0)
+            autor_id=autor_id,
+            preco=validar_preco(data.get('preco', 0.0))
         )
         
+        erros, avisos = validar_grafo(data['nodos'], data['arestas'])
+        if erros:
+            return jsonify({'error': 'Estrutura do mapa inválida', 'detalhes': erros}), 400
+        
         # Definir nodos e arestas
         mapa.set_nodos(data['nodos'])
         mapa.set_arestas(data['arestas'])
@@ -57,31 +127,51 @@ def criar_mapa():
         db.session.add(mapa)
         db.session.commit()
         
-        return jsonify(mapa.to_dict()), 201
+        return jsonify({**mapa.to_dict(), 'avisos': avisos}), 201
+    except PrecoInvalido as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @mapa_mental_bp.route('/mapas/<int:mapa_id>', methods=['GET'])
+@resposta_condicional('mapa_mental', 'disciplina')
 def obter_mapa(mapa_id):
     """Obtém um mapa mental específico"""
     try:
         mapa = MapaMental.query.filter_by(id=mapa_id, ativo=True).first_or_404()
-        return jsonify(mapa.to_dict()), 200
+        erro = verificar_acesso_conteudo('mapa', mapa)
+        if erro:
+            return erro
+        return Response(mapa.to_json_bruto(), mimetype='application/json')
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @mapa_mental_bp.route('/mapas/<int:mapa_id>', methods=['PUT'])
+@requer_token()
 def atualizar_mapa(mapa_id):
-    """Atualiza um mapa mental"""
+    """Atualiza um mapa mental (somente o autor ou administradores)"""
     try:
         mapa = MapaMental.query.filter_by(id=mapa_id, ativo=True).first_or_404()
+        erro = verificar_acesso_usuario(mapa.autor_id)
+        if erro:
+            return erro
         data = request.get_json()
         
         if 'titulo' in data:
             mapa.titulo = data['titulo']
         if 'preco' in data:
-            mapa.preco = data['preco']
+            mapa.preco = validar_preco(data['preco'])
+        avisos = []
+        if 'nodos' in data or 'arestas' in data:
+            anterior = (mapa.get_nodos(), mapa.get_arestas())
+            nodos = data['nodos'] if 'nodos' in data else anterior[0]
+            arestas = data['arestas'] if 'arestas' in data else anterior[1]
+            # Problemas que o mapa já tinha não impedem a edição
+            erros, avisos = validar_grafo(nodos, arestas, anterior)
+            if erros:
+                return jsonify({'error': 'Estrutura do mapa inválida', 'detalhes': erros}), 400
         if 'nodos' in data:
             mapa.set_nodos(data['nodos'])
         if 'arestas' in data:
@@ -90,16 +180,138 @@ def atualizar_mapa(mapa_id):
             mapa.thumbnail_url = data['thumbnail_url']
         
         db.session.commit()
-        return jsonify(mapa.to_dict()), 200
+        return jsonify({**mapa.to_dict(), 'avisos': avisos}), 200
+    except PrecoInvalido as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@mapa_mental_bp.route('/mapas/<int:mapa_id>', methods=['PATCH'])
+@requer_token()
+def editar_mapa(mapa_id):
+    """Aplica uma lista de operações sobre nodos e arestas a partir de uma versão base (autor ou administradores)"""
+    try:
+        data = request.get_json()
+        
+        required_fields = ['versao_base', 'operacoes']
+        for field in required_fields:
+            if field not in data:
+                return jsonify({'error': f'Campo {field} é obrigatório'}), 400
+        
+        mapa = MapaMental.query.filter_by(id=mapa_id, ativo=True).first_or_404()
+        erro = verificar_acesso_usuario(mapa.autor_id)
+        if erro:
+            return erro
+        if data['versao_base'] != mapa.versao:
+            return jsonify({'error': 'Mapa alterado desde a versão base', 'versao': mapa.versao}), 409
+        
+        anterior = (mapa.get_nodos(), mapa.get_arestas())
+        nodos, arestas, nodos_alterados, arestas_alteradas = aplicar_operacoes(
+            *anterior, data['operacoes']
+        )
+        
+        erros, avisos = validar_grafo(nodos, arestas, anterior)
+        if erros:
+            return jsonify({'error': 'Estrutura do mapa inválida', 'detalhes': erros}), 400
+        
+        # Só a coluna efetivamente modificada é regravada
+        if nodos_alterados:
+            mapa.set_nodos(nodos)
+        if arestas_alteradas:
+            mapa.set_arestas(arestas)
+        
+        # O UPDATE inclui "WHERE versao = versao_base": uma gravação concorrente vira 409
+        db.session.commit()
+        return jsonify({
+            'id': mapa.id,
+            'versao': mapa.versao,
+            'total_nodos': mapa.total_nodos,
+            'total_arestas': mapa.total_arestas,
+            'avisos': avisos
+        }), 200
+    except OperacaoInvalida as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except StaleDataError:
+        db.session.rollback()
+        versao = db.session.scalar(db.select(MapaMental.versao).where(MapaMental.id == mapa_id))
+        return jsonify({'error': 'Mapa alterado desde a versão base', 'versao': versao}), 409
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+def _carregar_mapa_indice(mapa_id):
+    """Mapa só com as colunas do cache do índice e do controle de acesso; nodos e arestas ficam de fora"""
+    return MapaMental.query.options(
+        load_only(MapaMental.id, MapaMental.data_atualizacao, MapaMental.preco, MapaMental.autor_id)
+    ).filter_by(id=mapa_id, ativo=True).first_or_404()
+
+def _carregar_indice(mapa_id):
+    """Índice de adjacência do mapa; nodos e arestas só são lidos quando ele não está em cache"""
+    return obter_indice(_carregar_mapa_indice(mapa_id))
+
+@mapa_mental_bp.route('/mapas/<int:mapa_id>/nodos/<nodo_id>/subarvore', methods=['GET'])
+@resposta_condicional('mapa_mental')
+def obter_subarvore(mapa_id, nodo_id):
+    """Nodos e arestas abaixo de um nodo (?profundidade=N limita os níveis)"""
+    try:
+        mapa = _carregar_mapa_indice(mapa_id)
+        erro = verificar_acesso_conteudo('mapa', mapa)
+        if erro:
+            return erro
+        indice = obter_indice(mapa)
+        if nodo_id not in indice.nodos:
+            return jsonify({'error': 'Nodo não encontrado'}), 404
+        
+        profundidade = request.args.get('profundidade', type=int)
+        if profundidade is not None and profundidade < 0:
+            return jsonify({'error': 'profundidade deve ser maior ou igual a zero'}), 400
+        
+        nodos, arestas = indice.subarvore(nodo_id, profundidade)
+        return jsonify({'raiz': nodo_id, 'nodos': nodos, 'arestas': arestas}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@mapa_mental_bp.route('/mapas/<int:mapa_id>/nodos/<nodo_id>/caminho', methods=['GET'])
+@resposta_condicional('mapa_mental')
+def obter_caminho_nodo(mapa_id, nodo_id):
+    """Caminho de ancestrais da raiz até o nodo"""
+    try:
+        mapa = _carregar_mapa_indice(mapa_id)
+        erro = verificar_acesso_conteudo('mapa', mapa)
+        if erro:
+            return erro
+        indice = obter_indice(mapa)
+        if nodo_id not in indice.nodos:
+            return jsonify({'error': 'Nodo não encontrado'}), 404
+        
+        caminho = indice.caminho_ancestrais(nodo_id)
+        if caminho is None:
+            return jsonify({'error': 'Nodo sem caminho até uma raiz (ciclo)'}), 409
+        return jsonify({'caminho': [indice.nodos[chave] for chave in caminho]}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@mapa_mental_bp.route('/mapas/<int:mapa_id>/estatisticas', methods=['GET'])
+@resposta_condicional('mapa_mental')
+def obter_estatisticas_mapa(mapa_id):
+    """Graus, profundidade, folhas, órfãos e ciclos da estrutura do mapa"""
+    try:
+        return jsonify(_carregar_indice(mapa_id).estatisticas()), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @mapa_mental_bp.route('/mapas/<int:mapa_id>', methods=['DELETE'])
+@requer_token()
 def deletar_mapa(mapa_id):
-    """Deleta (desativa) um mapa mental"""
+    """Deleta (desativa) um mapa mental (somente o autor ou administradores)"""
     try:
         mapa = MapaMental.query.filter_by(id=mapa_id, ativo=True).first_or_404()
+        erro = verificar_acesso_usuario(mapa.autor_id)
+        if erro:
+            return erro
         mapa.ativo = False
         db.session.commit()
         return jsonify({'message': 'Mapa mental deletado com sucesso'}), 200
@@ -108,12 +320,18 @@ def deletar_mapa(mapa_id):
         return jsonify({'error': str(e)}), 500
 
 @mapa_mental_bp.route('/disciplinas/<int:disciplina_id>/mapas', methods=['GET'])
+@resposta_condicional('mapa_mental', 'disciplina')
 def listar_mapas_por_disciplina(disciplina_id):
-    """Lista mapas mentais de uma disciplina específica"""
+    """Lista mapas mentais de uma disciplina específica, paginados por cursor"""
     try:
         disciplina = Disciplina.query.get_or_404(disciplina_id)
-        mapas = MapaMental.query.filter_by(disciplina_id=disciplina_id, ativo=True).all()
-        return jsonify([mapa.to_dict() for mapa in mapas]), 200
+        cursor, limite = ler_parametros_paginacao()
+        campos = _ler_campos()
+        query = _projetar(MapaMental.query.filter_by(disciplina_id=disciplina_id, ativo=True), campos)
+        mapas, next_cursor = paginar(query, MapaMental.data_criacao, MapaMental.id, cursor, limite)
+        return _resposta_lista(mapas, next_cursor, campos)
+    except (CursorInvalido, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
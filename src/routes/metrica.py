@@ -3,19 +3,33 @@ from src.models.user import db, User
 from src.models.metrica_usuario import MetricaUsuario
 from src.models.disciplina import Disciplina
 from src.models.sessao_treinamento import SessaoTreinamento
+from src.models.estudo_diario import EstudoDiario
+from src.models.insight_usuario import InsightUsuario
+from src.utils.paginacao import CursorInvalido, LIMITE_MAXIMO, ler_parametros_paginacao, paginar
+from src.utils.cache_resultados import cache_metricas, invalidar_metricas_usuario
+from src.utils import ranking
+from src.utils.autenticacao import requer_token, verificar_acesso_usuario
 from sqlalchemy import func
+from sqlalchemy.orm import joinedload
 from datetime import datetime, timedelta
 
 metrica_bp = Blueprint('metrica', __name__)
 
 @metrica_bp.route('/metricas/usuario/<int:usuario_id>', methods=['GET'])
+@requer_token()
 def obter_metricas_usuario(usuario_id):
     """Obtém métricas gerais de um usuário"""
     try:
+        erro = verificar_acesso_usuario(usuario_id)
+        if erro:
+            return erro
+        
         usuario = User.query.get_or_404(usuario_id)
         
         # Métricas por disciplina
-        metricas = MetricaUsuario.query.filter_by(usuario_id=usuario_id).all()
+        metricas = MetricaUsuario.query.options(
+            joinedload(MetricaUsuario.disciplina)
+        ).filter_by(usuario_id=usuario_id).all()
         
         # Estatísticas gerais
         total_tempo_minutos = sum(m.tempo_estudo_minutos for m in metricas)
@@ -23,7 +37,9 @@ def obter_metricas_usuario(usuario_id):
         maior_constancia = max(m.dias_constancia for m in metricas) if metricas else 0
         
         # Sessões recentes
-        sessoes_recentes = SessaoTreinamento.query.filter_by(
+        sessoes_recentes = SessaoTreinamento.query.options(
+            joinedload(SessaoTreinamento.disciplina)
+        ).filter_by(
             usuario_id=usuario_id,
             finalizada=True
         ).order_by(SessaoTreinamento.data_fim.desc()).limit(10).all()
@@ -46,10 +62,14 @@ def obter_metricas_usuario(usuario_id):
         return jsonify({'error': str(e)}), 500
 
 @metrica_bp.route('/metricas/usuario/<int:usuario_id>/disciplina/<int:disciplina_id>', methods=['GET'])
+@requer_token()
 def obter_metricas_disciplina(usuario_id, disciplina_id):
-    """Obtém métricas específicas de uma disciplina"""
+    """Obtém métricas específicas de uma disciplina, com as sessões paginadas por cursor"""
     try:
-        usuario = User.query.get_or_404(usuario_id)
+        erro = verificar_acesso_usuario(usuario_id)
+        if erro:
+            return erro
+        cursor, limite = ler_parametros_paginacao()
         disciplina = Disciplina.query.get_or_404(disciplina_id)
         
         metrica = MetricaUsuario.query.filter_by(
@@ -65,50 +85,67 @@ def obter_metricas_disciplina(usuario_id, disciplina_id):
             )
             db.session.add(metrica)
             db.session.commit()
+            invalidar_metricas_usuario(usuario_id)
         
         # Sessões da disciplina
-        sessoes = SessaoTreinamento.query.filter_by(
+        query = SessaoTreinamento.query.filter_by(
             usuario_id=usuario_id,
             disciplina_id=disciplina_id,
             finalizada=True
-        ).order_by(SessaoTreinamento.data_fim.desc()).all()
+        )
+        total_sessoes = query.with_entities(func.count(SessaoTreinamento.id)).scalar()
+        sessoes, next_cursor = paginar(
+            query, SessaoTreinamento.data_fim, SessaoTreinamento.id, cursor, limite
+        )
         
         resultado = {
             'metrica': metrica.to_dict(),
             'disciplina': disciplina.to_dict(),
             'sessoes': [s.to_dict() for s in sessoes],
-            'total_sessoes': len(sessoes)
+            'next_cursor': next_cursor,
+            'total_sessoes': total_sessoes
         }
         
         return jsonify(resultado), 200
+    except CursorInvalido as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @metrica_bp.route('/metricas/dashboard/<int:usuario_id>', methods=['GET'])
+@requer_token()
 def obter_dashboard_metricas(usuario_id):
     """Obtém dados para o dashboard de métricas"""
     try:
-        usuario = User.query.get_or_404(usuario_id)
+        erro = verificar_acesso_usuario(usuario_id)
+        if erro:
+            return erro
+        
+        # Resultado em cache dispensa qualquer acesso ao banco
+        em_cache = cache_metricas.obter(('dashboard', usuario_id))
+        if em_cache is not None:
+            return jsonify(em_cache), 200
         
         # Métricas por disciplina
-        metricas = MetricaUsuario.query.filter_by(usuario_id=usuario_id).all()
-        
-        # Dados para gráficos
-        # 1. Tempo de estudo por disciplina (últimos 7 dias)
-        data_limite = datetime.now() - timedelta(days=7)
-        sessoes_semana = SessaoTreinamento.query.filter(
-            SessaoTreinamento.usuario_id == usuario_id,
-            SessaoTreinamento.finalizada == True,
-            SessaoTreinamento.data_fim >= data_limite
-        ).all()
-        
-        # Agrupar por dia
-        tempo_por_dia = {}
-        for sessao in sessoes_semana:
-            if sessao.data_fim:
-                dia = sessao.data_fim.strftime('%Y-%m-%d')
-                minutos = sessao.tempo_total_segundos // 60
-                tempo_por_dia[dia] = tempo_por_dia.get(dia, 0) + minutos
+        metricas = MetricaUsuario.query.options(
+            joinedload(MetricaUsuario.disciplina)
+        ).filter_by(usuario_id=usuario_id).all()
+        
+        # Dados para gráficos, a partir do resumo diário (uma consulta por intervalo)
+        hoje = datetime.utcnow().date()
+        inicio = hoje - timedelta(days=13)
+        minutos_por_dia = dict(db.session.execute(
+            db.select(EstudoDiario.dia, func.sum(EstudoDiario.minutos))
+            .where(EstudoDiario.usuario_id == usuario_id, EstudoDiario.dia >= inicio)
+            .group_by(EstudoDiario.dia)
+        ).all())
+        
+        # 1. Tempo de estudo por dia (últimos 7 dias)
+        tempo_por_dia = {
+            dia.isoformat(): minutos
+            for dia, minutos in minutos_por_dia.items()
+            if dia >= hoje - timedelta(days=6)
+        }
         
         # 2. Taxa de acertos por disciplina
         acertos_por_disciplina = []
@@ -122,17 +159,10 @@ def obter_dashboard_metricas(usuario_id):
         # 3. Evolução da constância (últimos 14 dias)
         constancia_dados = []
         for i in range(14):
-            data = datetime.now() - timedelta(days=13-i)
-            # Verificar se houve atividade neste dia
-            atividade = SessaoTreinamento.query.filter(
-                SessaoTreinamento.usuario_id == usuario_id,
-                SessaoTreinamento.finalizada == True,
-                func.date(SessaoTreinamento.data_fim) == data.date()
-            ).first()
-            
+            dia = inicio + timedelta(days=i)
             constancia_dados.append({
-                'data': data.strftime('%Y-%m-%d'),
-                'estudou': bool(atividade)
+                'data': dia.isoformat(),
+                'estudou': dia in minutos_por_dia
             })
         
         # Estatísticas resumidas
@@ -152,65 +182,93 @@ def obter_dashboard_metricas(usuario_id):
             'metricas_disciplinas': [m.to_dict() for m in metricas]
         }
         
+        cache_metricas.guardar(('dashboard', usuario_id), resultado)
         return jsonify(resultado), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @metrica_bp.route('/metricas/insights/<int:usuario_id>', methods=['GET'])
+@requer_token()
 def gerar_insights(usuario_id):
     """Gera insights automáticos para o usuário"""
     try:
-        usuario = User.query.get_or_404(usuario_id)
-        metricas = MetricaUsuario.query.filter_by(usuario_id=usuario_id).all()
+        erro = verificar_acesso_usuario(usuario_id)
+        if erro:
+            return erro
         
-        insights = []
+        em_cache = cache_metricas.obter(('insights', usuario_id))
+        if em_cache is not None:
+            return jsonify(em_cache), 200
         
-        for metrica in metricas:
-            disciplina_nome = metrica.disciplina.nome
-            
-            # Insight sobre taxa de acertos baixa
-            if metrica.taxa_acertos < 60:
-                insights.append({
-                    'tipo': 'alerta',
-                    'titulo': f'Taxa de acertos baixa em {disciplina_nome}',
-                    'descricao': f'Sua taxa de acertos em {disciplina_nome} está em {metrica.taxa_acertos:.1f}%. Considere revisar o conteúdo.',
-                    'acao': 'Revisar mapas mentais',
-                    'prioridade': 'alta'
-                })
-            
-            # Insight sobre constância
-            if metrica.dias_constancia >= 7:
-                insights.append({
-                    'tipo': 'parabens',
-                    'titulo': f'Excelente constância em {disciplina_nome}!',
-                    'descricao': f'Você está há {metrica.dias_constancia} dias estudando {disciplina_nome} consistentemente.',
-                    'acao': 'Continue assim!',
-                    'prioridade': 'baixa'
-                })
-            elif metrica.dias_constancia == 0:
-                insights.append({
-                    'tipo': 'motivacao',
-                    'titulo': f'Que tal estudar {disciplina_nome} hoje?',
-                    'descricao': f'Você não estuda {disciplina_nome} há alguns dias. Uma sessão rápida pode ajudar!',
-                    'acao': 'Iniciar treinamento',
-                    'prioridade': 'media'
-                })
-            
-            # Insight sobre tempo de estudo
-            if metrica.tempo_estudo_minutos < 60:  # Menos de 1 hora total
-                insights.append({
-                    'tipo': 'sugestao',
-                    'titulo': f'Aumente o tempo de estudo em {disciplina_nome}',
-                    'descricao': f'Você estudou apenas {metrica.tempo_estudo_minutos} minutos de {disciplina_nome}. Que tal dedicar mais tempo?',
-                    'acao': 'Criar plano de estudos',
-                    'prioridade': 'media'
-                })
-        
-        # Ordenar por prioridade
-        ordem_prioridade = {'alta': 0, 'media': 1, 'baixa': 2}
-        insights.sort(key=lambda x: ordem_prioridade.get(x['prioridade'], 3))
-        
-        return jsonify(insights[:5]), 200  # Retornar apenas os 5 principais
+        # Calculados pelo job de insights e mantidos a cada alteração de métrica
+        insights = [
+            insight.to_dict() for insight in InsightUsuario.query.filter_by(
+                usuario_id=usuario_id
+            ).order_by(InsightUsuario.posicao)
+        ]
+        
+        cache_metricas.guardar(('insights', usuario_id), insights)
+        return jsonify(insights), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def _ler_criterio_ranking():
+    criterio = request.args.get('criterio', 'taxa_acertos')
+    if criterio not in ranking.CRITERIOS:
+        raise ValueError(f'Critério deve ser um de: {", ".join(ranking.CRITERIOS)}')
+    return criterio
+
+def _com_username(itens):
+    nomes = dict(db.session.execute(
+        db.select(User.id, User.username).where(User.id.in_([item['usuario_id'] for item in itens]))
+    ).all()) if itens else {}
+    for item in itens:
+        item['username'] = nomes.get(item['usuario_id'])
+    return itens
+
+@metrica_bp.route('/metricas/ranking/disciplina/<int:disciplina_id>', methods=['GET'])
+@requer_token()
+def obter_ranking_disciplina(disciplina_id):
+    """Primeiros colocados de uma disciplina (?criterio=taxa_acertos|tempo_estudo_minutos&limite=10)"""
+    try:
+        criterio = _ler_criterio_ranking()
+        limite = min(max(request.args.get('limite', type=int, default=10), 1), LIMITE_MAXIMO)
+        
+        return jsonify({
+            'disciplina_id': disciplina_id,
+            'criterio': criterio,
+            'ranking': _com_username(ranking.top(disciplina_id, criterio, limite))
+        }), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@metrica_bp.route('/metricas/ranking/disciplina/<int:disciplina_id>/usuario/<int:usuario_id>', methods=['GET'])
+@requer_token()
+def obter_posicao_ranking(disciplina_id, usuario_id):
+    """Posição do usuário no ranking da disciplina e os colocados ao redor (?criterio=&vizinhos=2)"""
+    try:
+        erro = verificar_acesso_usuario(usuario_id)
+        if erro:
+            return erro
+        criterio = _ler_criterio_ranking()
+        vizinhos = min(max(request.args.get('vizinhos', type=int, default=2), 0), 50)
+        
+        posicao = ranking.posicao_usuario(disciplina_id, criterio, usuario_id, vizinhos)
+        if posicao is None:
+            return jsonify({'error': 'Usuário sem métricas nesta disciplina'}), 404
+        
+        _com_username(posicao['vizinhos'])
+        return jsonify({'disciplina_id': disciplina_id, 'criterio': criterio, **posicao}), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@metrica_bp.route('/metricas/cache', methods=['GET'])
+@requer_token('admin')
+def estatisticas_cache_metricas():
+    """Estatísticas do cache de dashboard/insights (para dimensionamento)"""
+    return jsonify(cache_metricas.estatisticas()), 200
+
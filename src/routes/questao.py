@@ -1,33 +1,103 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, g
 from src.models.user import db
 from src.models.questao import Questao
 from src.models.disciplina import Disciplina
-import random
+from src.models.estatistica_questao import EstatisticaQuestao
+from src.utils.cache_http import resposta_condicional, marcar_alteracao
+from src.utils.amostragem import amostrar_questoes, invalidar as invalidar_amostragem
+from src.utils.importacao import RegistroInvalido, ler_registros
+from src.utils.busca import reindexar as reindexar_busca
+from src.utils.paginacao import CursorInvalido, LIMITE_MAXIMO, ler_parametros_paginacao, paginar
+from src.utils.calibracao import calcular_estatisticas
+from src.utils.autenticacao import requer_token
+import json
 
 questao_bp = Blueprint('questao', __name__)
 
+TAMANHO_LOTE_IMPORTACAO = 1000
+MAX_ERROS_RELATORIO = 1000
+MAX_REGISTROS_IMPORTACAO = 50000
+
+def _validar_questao(data, disciplina_existe):
+    """Aplica as regras de criação de questão; retorna (mensagem, status) ou None"""
+    required_fields = ['texto_questao', 'disciplina_id', 'alternativas', 'resposta_correta', 'autor_id']
+    for field in required_fields:
+        if field not in data:
+            return f'Campo {field} é obrigatório', 400
+    
+    # Verificar se a disciplina existe
+    if not disciplina_existe(data['disciplina_id']):
+        return 'Disciplina não encontrada', 404
+    
+    # Validar alternativas
+    alternativas = data['alternativas']
+    if not isinstance(alternativas, list) or len(alternativas) < 2:
+        return 'Deve haver pelo menos 2 alternativas', 400
+    
+    # Validar resposta correta
+    resposta_correta = data['resposta_correta']
+    if not isinstance(resposta_correta, int) or resposta_correta < 0 or resposta_correta >= len(alternativas):
+        return 'Índice da resposta correta inválido', 400
+    
+    return None
+
+def _resposta_deterministica():
+    # Sem seed a amostra muda a cada requisição e não pode ser validada por ETag
+    return 'seed' in request.args or 'cursor' in request.args
+
+def _carregar_amostra(ids, disciplina_id=None, dificuldade=None):
+    """Carrega as questões sorteadas preservando a ordem do sorteio
+
+    O índice da amostragem pode estar até amostragem.VALIDADE_SEGUNDOS atrasado em relação a
+    outros workers: questões desativadas ou movidas de filtro nesse meio tempo
+    são descartadas aqui, e a amostra sai menor em vez de incluí-las.
+    """
+    if not ids:
+        return []
+    query = Questao.query.filter(Questao.id.in_(ids), Questao.ativo == True)
+    if disciplina_id:
+        query = query.filter_by(disciplina_id=disciplina_id)
+    if dificuldade:
+        query = query.filter_by(dificuldade=dificuldade)
+    questoes = {questao.id: questao for questao in query}
+    return [questoes[questao_id] for questao_id in ids if questao_id in questoes]
+
 @questao_bp.route('/questoes', methods=['GET'])
+@resposta_condicional('questao', 'disciplina', quando=_resposta_deterministica)
 def listar_questoes():
-    """Lista questões com filtros opcionais"""
+    """Lista questões com filtros opcionais.
+
+    Por padrão retorna uma amostra aleatória; com o parâmetro `cursor` (vazio na
+    primeira página) navega por todas as questões, das mais recentes às mais antigas.
+    """
     try:
         disciplina_id = request.args.get('disciplina_id', type=int)
         dificuldade = request.args.get('dificuldade')
-        limite = request.args.get('limite', type=int, default=20)
-        incluir_resposta = request.args.get('incluir_resposta', type=bool, default=False)
-        
-        query = Questao.query.filter_by(ativo=True)
-        
-        if disciplina_id:
-            query = query.filter_by(disciplina_id=disciplina_id)
-        if dificuldade:
-            query = query.filter_by(dificuldade=dificuldade)
+        limite = min(request.args.get('limite', type=int, default=20), LIMITE_MAXIMO)
+        incluir_resposta = request.args.get('incluir_resposta', '').lower() in ('1', 'true')
+        seed = request.args.get('seed', type=int)
         
-        questoes = query.limit(limite).all()
+        if 'cursor' in request.args:
+            cursor, limite = ler_parametros_paginacao()
+            query = Questao.query.filter_by(ativo=True)
+            if disciplina_id:
+                query = query.filter_by(disciplina_id=disciplina_id)
+            if dificuldade:
+                query = query.filter_by(dificuldade=dificuldade)
+            
+            questoes, next_cursor = paginar(query, Questao.data_criacao, Questao.id, cursor, limite)
+            return jsonify({
+                'itens': [questao.to_dict(include_resposta=incluir_resposta) for questao in questoes],
+                'next_cursor': next_cursor
+            }), 200
         
-        # Embaralhar questões para variedade
-        random.shuffle(questoes)
+        # Amostra uniforme entre todas as questões ativas do filtro
+        ids = amostrar_questoes(limite, disciplina_id or None, dificuldade or None, seed)
+        questoes = _carregar_amostra(ids, disciplina_id, dificuldade)
         
         return jsonify([questao.to_dict(include_resposta=incluir_resposta) for questao in questoes]), 200
+    except CursorInvalido as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -37,36 +107,21 @@ def criar_questao():
     try:
         data = request.get_json()
         
-        required_fields = ['texto_questao', 'disciplina_id', 'alternativas', 'resposta_correta', 'autor_id']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({'error': f'Campo {field} é obrigatório'}), 400
-        
-        # Verificar se a disciplina existe
-        disciplina = Disciplina.query.get(data['disciplina_id'])
-        if not disciplina:
-            return jsonify({'error': 'Disciplina não encontrada'}), 404
-        
-        # Validar alternativas
-        alternativas = data['alternativas']
-        if not isinstance(alternativas, list) or len(alternativas) < 2:
-            return jsonify({'error': 'Deve haver pelo menos 2 alternativas'}), 400
-        
-        # Validar resposta correta
-        resposta_correta = data['resposta_correta']
-        if not isinstance(resposta_correta, int) or resposta_correta < 0 or resposta_correta >= len(alternativas):
-            return jsonify({'error': 'Índice da resposta correta inválido'}), 400
+        erro = _validar_questao(data, lambda disciplina_id: Disciplina.query.get(disciplina_id) is not None)
+        if erro:
+            mensagem, status = erro
+            return jsonify({'error': mensagem}), status
         
         questao = Questao(
             texto_questao=data['texto_questao'],
             disciplina_id=data['disciplina_id'],
-            resposta_correta=resposta_correta,
+            resposta_correta=data['resposta_correta'],
             explicacao=data.get('explicacao', ''),
             dificuldade=data.get('dificuldade', 'medio'),
             autor_id=data['autor_id']
         )
         
-        questao.set_alternativas(alternativas)
+        questao.set_alternativas(data['alternativas'])
         
         db.session.add(questao)
         db.session.commit()
@@ -76,16 +131,145 @@ def criar_questao():
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+def _gravar_lote(lote, disciplinas_validas, disciplinas_consultadas):
+    """Valida um lote de registros e insere os válidos com um único executemany.
+
+    Retorna (quantidade inserida, lista de (linha, mensagem) com os erros).
+    """
+    # Resolver de uma vez as disciplinas ainda não vistas neste lote
+    novas = {
+        registro.get('disciplina_id') for _, registro in lote
+        if isinstance(registro, dict) and isinstance(registro.get('disciplina_id'), int)
+    } - disciplinas_consultadas
+    if novas:
+        disciplinas_validas.update(db.session.scalars(
+            db.select(Disciplina.id).where(Disciplina.id.in_(novas))
+        ))
+        disciplinas_consultadas.update(novas)
+    
+    def disciplina_existe(disciplina_id):
+        return isinstance(disciplina_id, int) and disciplina_id in disciplinas_validas
+    
+    linhas = []
+    erros = []
+    for linha, registro in lote:
+        if isinstance(registro, RegistroInvalido):
+            erros.append((linha, str(registro)))
+            continue
+        if not isinstance(registro, dict):
+            erros.append((linha, 'Registro deve ser um objeto JSON'))
+            continue
+        # Sem autor_id, a questão é do usuário do token; só administradores importam em nome de outros
+        registro.setdefault('autor_id', g.usuario_id)
+        if registro['autor_id'] != g.usuario_id and g.tipo_usuario != 'admin':
+            erros.append((linha, 'autor_id deve ser o usuário do token'))
+            continue
+        erro = _validar_questao(registro, disciplina_existe)
+        if erro:
+            erros.append((linha, erro[0]))
+            continue
+        linhas.append({
+            'texto_questao': registro['texto_questao'],
+            'disciplina_id': registro['disciplina_id'],
+            'alternativas': json.dumps(registro['alternativas']),
+            'resposta_correta': registro['resposta_correta'],
+            'explicacao': registro.get('explicacao', ''),
+            'dificuldade': registro.get('dificuldade', 'medio'),
+            'autor_id': registro['autor_id']
+        })
+    
+    if linhas:
+        ids = db.session.scalars(db.insert(Questao).returning(Questao.id), linhas).all()
+        # Insert em lote não passa pelo flush do ORM; atualizar busca e cache HTTP manualmente
+        reindexar_busca(db.session.connection(), 'questao', ids)
+        marcar_alteracao(db.session, 'questao')
+    db.session.commit()
+    return len(linhas), erros
+
+@questao_bp.route('/questoes/bulk', methods=['POST'])
+@requer_token('admin', 'professor')
+def importar_questoes():
+    """Importa questões em lote a partir de NDJSON (padrão) ou de um array JSON.
+
+    Os registros são lidos do corpo em streaming, validados com as mesmas regras
+    de criar_questao e inseridos em transações de até TAMANHO_LOTE_IMPORTACAO linhas.
+    Exige token de professor ou administrador; a leitura para (413) depois de
+    MAX_REGISTROS_IMPORTACAO registros, mantendo os lotes já gravados.
+    """
+    inseridas = 0
+    total_erros = 0
+    relatorio = []
+    disciplinas_validas = set()
+    disciplinas_consultadas = set()
+    status = 200
+    
+    try:
+        lote = []
+        for linha, registro in ler_registros(request.stream, request.content_type):
+            if linha > MAX_REGISTROS_IMPORTACAO:
+                status = 413
+                break
+            lote.append((linha, registro))
+            if len(lote) >= TAMANHO_LOTE_IMPORTACAO:
+                quantidade, erros = _gravar_lote(lote, disciplinas_validas, disciplinas_consultadas)
+                inseridas += quantidade
+                total_erros += len(erros)
+                relatorio.extend(erros[:MAX_ERROS_RELATORIO - len(relatorio)])
+                lote = []
+        
+        quantidade, erros = _gravar_lote(lote, disciplinas_validas, disciplinas_consultadas)
+        inseridas += quantidade
+        total_erros += len(erros)
+        relatorio.extend(erros[:MAX_ERROS_RELATORIO - len(relatorio)])
+        
+        resultado = {
+            'inseridas': inseridas,
+            'total_erros': total_erros,
+            'erros': [{'linha': linha, 'error': mensagem} for linha, mensagem in relatorio]
+        }
+        if status == 413:
+            resultado['error'] = f'Limite de {MAX_REGISTROS_IMPORTACAO} registros por requisição atingido'
+        return jsonify(resultado), status
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e), 'inseridas': inseridas}), 500
+    finally:
+        if inseridas:
+            invalidar_amostragem()
+
 @questao_bp.route('/questoes/<int:questao_id>', methods=['GET'])
+@resposta_condicional('questao', 'disciplina')
 def obter_questao(questao_id):
     """Obtém uma questão específica"""
     try:
-        incluir_resposta = request.args.get('incluir_resposta', type=bool, default=False)
+        incluir_resposta = request.args.get('incluir_resposta', '').lower() in ('1', 'true')
         questao = Questao.query.filter_by(id=questao_id, ativo=True).first_or_404()
         return jsonify(questao.to_dict(include_resposta=incluir_resposta)), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@questao_bp.route('/questoes/<int:questao_id>/estatisticas', methods=['GET'])
+def obter_estatisticas_questao(questao_id):
+    """Estatísticas de calibração da questão (p-valor, discriminação, tempo mediano)"""
+    try:
+        questao = Questao.query.get_or_404(questao_id)
+        
+        # Normalmente gravadas pelo recálculo em lote; uma questão ainda não
+        # calibrada é calculada em memória, sem escrita em um GET
+        estatistica = db.session.get(EstatisticaQuestao, questao_id)
+        if estatistica is None:
+            calculadas = calcular_estatisticas(db.session.connection(), [questao_id])
+            estatistica = EstatisticaQuestao(
+                **(calculadas[0] if calculadas else {'questao_id': questao_id, 'respostas': 0, 'acertos': 0})
+            )
+        
+        resultado = estatistica.to_dict()
+        resultado['dificuldade'] = questao.dificuldade
+        return jsonify(resultado), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 @questao_bp.route('/questoes/<int:questao_id>', methods=['PUT'])
 def atualizar_questao(questao_id):
     """Atualiza uma questão"""
@@ -130,25 +314,34 @@ def deletar_questao(questao_id):
         return jsonify({'error': str(e)}), 500
 
 @questao_bp.route('/disciplinas/<int:disciplina_id>/questoes', methods=['GET'])
+@resposta_condicional('questao', 'disciplina', quando=_resposta_deterministica)
 def listar_questoes_por_disciplina(disciplina_id):
-    """Lista questões de uma disciplina específica"""
+    """Lista questões de uma disciplina específica (sorteio ou paginação, como em listar_questoes)"""
     try:
         disciplina = Disciplina.query.get_or_404(disciplina_id)
-        limite = request.args.get('limite', type=int, default=20)
+        limite = min(request.args.get('limite', type=int, default=20), LIMITE_MAXIMO)
         dificuldade = request.args.get('dificuldade')
-        incluir_resposta = request.args.get('incluir_resposta', type=bool, default=False)
-        
-        query = Questao.query.filter_by(disciplina_id=disciplina_id, ativo=True)
-        
-        if dificuldade:
-            query = query.filter_by(dificuldade=dificuldade)
+        incluir_resposta = request.args.get('incluir_resposta', '').lower() in ('1', 'true')
+        seed = request.args.get('seed', type=int)
         
-        questoes = query.limit(limite).all()
+        if 'cursor' in request.args:
+            cursor, limite = ler_parametros_paginacao()
+            query = Questao.query.filter_by(disciplina_id=disciplina_id, ativo=True)
+            if dificuldade:
+                query = query.filter_by(dificuldade=dificuldade)
+            
+            questoes, next_cursor = paginar(query, Questao.data_criacao, Questao.id, cursor, limite)
+            return jsonify({
+                'itens': [questao.to_dict(include_resposta=incluir_resposta) for questao in questoes],
+                'next_cursor': next_cursor
+            }), 200
         
-        # Embaralhar questões
-        random.shuffle(questoes)
+        ids = amostrar_questoes(limite, disciplina_id, dificuldade or None, seed)
+        questoes = _carregar_amostra(ids, disciplina_id, dificuldade)
         
         return jsonify([questao.to_dict(include_resposta=incluir_resposta) for questao in questoes]), 200
+    except CursorInvalido as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -0,0 +1,173 @@
+from flask import Blueprint, Response, request, jsonify, g
+from src.models.user import db
+from src.models.resumo import Resumo
+from src.models.disciplina import Disciplina
+from src.utils.cache_http import resposta_condicional
+from src.utils.autenticacao import requer_token, verificar_acesso_usuario
+from src.utils.creditos import PrecoInvalido, validar_preco, verificar_acesso_conteudo
+from src.utils.paginacao import CursorInvalido, ler_parametros_paginacao, paginar
+from src.utils.renderizacao import renderizar
+from sqlalchemy.orm import defer, joinedload
+import json
+
+resumo_bp = Blueprint('resumo', __name__)
+
+# Acima deste tamanho o HTML é enviado em blocos
+LIMIAR_STREAMING = 64 * 1024
+TAMANHO_BLOCO = 16 * 1024
+
+def _consulta_resumida():
+    """Resumos ativos sem a coluna conteudo, com a disciplina no mesmo SELECT"""
+    return Resumo.query.options(
+        defer(Resumo.conteudo), joinedload(Resumo.disciplina)
+    ).filter_by(ativo=True)
+
+def _blocos_json(metadados, html):
+    # Os metadados são serializados normalmente; o HTML é escapado bloco a bloco
+    cabecalho = json.dumps(metadados)
+    yield cabecalho[:-1] + ', "conteudo_html": "'
+    for inicio in range(0, len(html), TAMANHO_BLOCO):
+        yield json.dumps(html[inicio:inicio + TAMANHO_BLOCO])[1:-1]
+    yield '"}'
+
+@resumo_bp.route('/resumos', methods=['GET'])
+@resposta_condicional('resumo', 'disciplina')
+def listar_resumos():
+    """Lista os resumos (sem o conteúdo), paginados por cursor"""
+    try:
+        disciplina_id = request.args.get('disciplina_id', type=int)
+        autor_id = request.args.get('autor_id', type=int)
+        cursor, limite = ler_parametros_paginacao()
+        
+        query = _consulta_resumida()
+        if disciplina_id:
+            query = query.filter_by(disciplina_id=disciplina_id)
+        if autor_id:
+            query = query.filter_by(autor_id=autor_id)
+        
+        resumos, next_cursor = paginar(query, Resumo.data_criacao, Resumo.id, cursor, limite)
+        return jsonify({
+            'itens': [resumo.to_dict(incluir_conteudo=False) for resumo in resumos],
+            'next_cursor': next_cursor
+        }), 200
+    except CursorInvalido as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@resumo_bp.route('/disciplinas/<int:disciplina_id>/resumos', methods=['GET'])
+@resposta_condicional('resumo', 'disciplina')
+def listar_resumos_por_disciplina(disciplina_id):
+    """Lista os resumos de uma disciplina (sem o conteúdo), paginados por cursor"""
+    try:
+        disciplina = Disciplina.query.get_or_404(disciplina_id)
+        cursor, limite = ler_parametros_paginacao()
+        query = _consulta_resumida().filter_by(disciplina_id=disciplina_id)
+        resumos, next_cursor = paginar(query, Resumo.data_criacao, Resumo.id, cursor, limite)
+        return jsonify({
+            'itens': [resumo.to_dict(incluir_conteudo=False) for resumo in resumos],
+            'next_cursor': next_cursor
+        }), 200
+    except CursorInvalido as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@resumo_bp.route('/resumos', methods=['POST'])
+@requer_token()
+def criar_resumo():
+    """Cria um novo resumo em nome do usuário do token (administradores podem informar autor_id)"""
+    try:
+        data = request.get_json()
+        
+        required_fields = ['titulo', 'disciplina_id', 'conteudo']
+        for field in required_fields:
+            if field not in data:
+                return jsonify({'error': f'Campo {field} é obrigatório'}), 400
+        autor_id = data.get('autor_id', g.usuario_id)
+        if autor_id != g.usuario_id and g.tipo_usuario != 'admin':
+            return jsonify({'error': 'autor_id deve ser o usuário do token'}), 403
+        
+        # Verificar se a disciplina existe
+        disciplina = Disciplina.query.get(data['disciplina_id'])
+        if not disciplina:
+            return jsonify({'error': 'Disciplina não encontrada'}), 404
+        
+        resumo = Resumo(
+            titulo=data['titulo'],
+            disciplina_id=data['disciplina_id'],
+            autor_id=autor_id,
+            conteudo=data['conteudo'],
+            preco=validar_preco(data.get('preco', 0.0))
+        )
+        
+        db.session.add(resumo)
+        db.session.commit()
+        
+        # Já deixa o HTML no cache para a primeira leitura
+        renderizar(resumo.conteudo)
+        
+        return jsonify(resumo.to_dict()), 201
+    except PrecoInvalido as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@resumo_bp.route('/resumos/<int:resumo_id>', methods=['GET'])
+@resposta_condicional('resumo', 'disciplina')
+def obter_resumo(resumo_id):
+    """Obtém um resumo com o conteúdo em HTML sanitizado (?fonte=true inclui o Markdown original)"""
+    try:
+        resumo = Resumo.query.filter_by(id=resumo_id, ativo=True).first_or_404()
+        erro = verificar_acesso_conteudo('resumo', resumo)
+        if erro:
+            return erro
+        html = renderizar(resumo.conteudo)
+        
+        if request.args.get('fonte', '').lower() in ('1', 'true'):
+            return jsonify({**resumo.to_dict(), 'conteudo_html': html}), 200
+        if len(html) <= LIMIAR_STREAMING:
+            return jsonify({**resumo.to_dict(incluir_conteudo=False), 'conteudo_html': html}), 200
+        
+        # Metadados montados aqui: o gerador roda depois que a sessão da requisição terminou
+        metadados = resumo.to_dict(incluir_conteudo=False)
+        return Response(_blocos_json(metadados, html), mimetype='application/json')
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@resumo_bp.route('/resumos/<int:resumo_id>', methods=['PUT'])
+@requer_token()
+def atualizar_resumo(resumo_id):
+    """Atualiza um resumo (somente o autor ou administradores)"""
+    try:
+        resumo = Resumo.query.filter_by(id=resumo_id, ativo=True).first_or_404()
+        erro = verificar_acesso_usuario(resumo.autor_id)
+        if erro:
+            return erro
+        data = request.get_json()
+        
+        if 'titulo' in data:
+            resumo.titulo = data['titulo']
+        if 'conteudo' in data:
+            resumo.conteudo = data['conteudo']
+        if 'preco' in data:
+            resumo.preco = validar_preco(data['preco'])
+        if 'disciplina_id' in data:
+            if not Disciplina.query.get(data['disciplina_id']):
+                return jsonify({'error': 'Disciplina não encontrada'}), 404
+            resumo.disciplina_id = data['disciplina_id']
+        
+        db.session.commit()
+        
+        if 'conteudo' in data:
+            renderizar(resumo.conteudo)
+        
+        return jsonify(resumo.to_dict()), 200
+    except PrecoInvalido as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
@@ -1,32 +1,44 @@
-from flask import Blueprint, request, jsonify
-from src.models.user import db, User
+from flask import Blueprint, request, jsonify, g
+from src.models.user import db
 from src.models.sessao_treinamento import SessaoTreinamento
 from src.models.resposta_questao import RespostaQuestao
 from src.models.questao import Questao
 from src.models.metrica_usuario import MetricaUsuario
+from src.models.estudo_diario import EstudoDiario
+from src.utils.paginacao import CursorInvalido, ler_parametros_paginacao, paginar
+from src.utils.cache_resultados import invalidar_metricas_usuario
+from src.utils.autenticacao import requer_token, verificar_acesso_usuario
+from sqlalchemy.orm import joinedload
 from datetime import datetime
 
 treinamento_bp = Blueprint('treinamento', __name__)
 
+MAX_RESPOSTAS_LOTE = 200
+
+def _sessao_de_outro_usuario(sessao):
+    return sessao.usuario_id != g.usuario_id and g.tipo_usuario != 'admin'
+
 @treinamento_bp.route('/treinamento/iniciar', methods=['POST'])
+@requer_token()
 def iniciar_sessao():
-    """Inicia uma nova sessão de treinamento"""
+    """Inicia uma nova sessão de treinamento para o usuário do token"""
     try:
         data = request.get_json()
         
-        required_fields = ['usuario_id', 'tipo']
+        required_fields = ['tipo']
         for field in required_fields:
             if field not in data:
                 return jsonify({'error': f'Campo {field} é obrigatório'}), 400
         
-        # Verificar se o usuário existe
-        usuario = User.query.get(data['usuario_id'])
-        if not usuario:
-            return jsonify({'error': 'Usuário não encontrado'}), 404
+        # usuario_id no corpo é opcional; se informado, precisa ser acessível pelo token
+        usuario_id = data.get('usuario_id', g.usuario_id)
+        erro = verificar_acesso_usuario(usuario_id)
+        if erro:
+            return erro
         
         # Verificar se há sessão ativa
         sessao_ativa = SessaoTreinamento.query.filter_by(
-            usuario_id=data['usuario_id'],
+            usuario_id=usuario_id,
             finalizada=False
         ).first()
         
@@ -34,7 +46,7 @@ def iniciar_sessao():
             return jsonify({'error': 'Já existe uma sessão ativa', 'sessao': sessao_ativa.to_dict()}), 400
         
         sessao = SessaoTreinamento(
-            usuario_id=data['usuario_id'],
+            usuario_id=usuario_id,
             tipo=data['tipo'],
             disciplina_id=data.get('disciplina_id'),
             total_itens=data.get('total_itens', 10)
@@ -49,15 +61,19 @@ def iniciar_sessao():
         return jsonify({'error': str(e)}), 500
 
 @treinamento_bp.route('/treinamento/sessoes/<int:sessao_id>', methods=['GET'])
+@requer_token()
 def obter_sessao(sessao_id):
     """Obtém informações de uma sessão"""
     try:
         sessao = SessaoTreinamento.query.get_or_404(sessao_id)
+        if _sessao_de_outro_usuario(sessao):
+            return jsonify({'error': 'Sessão de outro usuário'}), 403
         return jsonify(sessao.to_dict()), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @treinamento_bp.route('/treinamento/responder', methods=['POST'])
+@requer_token()
 def responder_questao():
     """Registra a resposta de uma questão"""
     try:
@@ -76,6 +92,8 @@ def responder_questao():
         
         if not sessao:
             return jsonify({'error': 'Sessão não encontrada ou já finalizada'}), 404
+        if _sessao_de_outro_usuario(sessao):
+            return jsonify({'error': 'Sessão de outro usuário'}), 403
         
         # Verificar se a questão existe
         questao = Questao.query.get(data['questao_id'])
@@ -104,8 +122,8 @@ def responder_questao():
         
         db.session.add(resposta)
         
-        # Atualizar progresso da sessão
-        sessao.itens_completados += 1
+        # Atualizar progresso e contadores da sessão
+        sessao.registrar_respostas(1, 1 if correta else 0)
         
         db.session.commit()
         
@@ -125,7 +143,106 @@ def responder_questao():
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@treinamento_bp.route('/treinamento/responder/lote', methods=['POST'])
+@requer_token()
+def responder_questoes_lote():
+    """Registra várias respostas de uma sessão em uma única transação"""
+    try:
+        data = request.get_json()
+        
+        required_fields = ['sessao_id', 'respostas']
+        for field in required_fields:
+            if field not in data:
+                return jsonify({'error': f'Campo {field} é obrigatório'}), 400
+        
+        itens = data['respostas']
+        if not isinstance(itens, list) or not itens:
+            return jsonify({'error': 'Campo respostas deve ser uma lista não vazia'}), 400
+        if len(itens) > MAX_RESPOSTAS_LOTE:
+            return jsonify({'error': f'Máximo de {MAX_RESPOSTAS_LOTE} respostas por lote'}), 400
+        
+        sessao = SessaoTreinamento.query.filter_by(
+            id=data['sessao_id'],
+            finalizada=False
+        ).first()
+        
+        if not sessao:
+            return jsonify({'error': 'Sessão não encontrada ou já finalizada'}), 404
+        if _sessao_de_outro_usuario(sessao):
+            return jsonify({'error': 'Sessão de outro usuário'}), 403
+        
+        questao_ids = {
+            item.get('questao_id') for item in itens
+            if isinstance(item, dict) and isinstance(item.get('questao_id'), int)
+        }
+        
+        # Uma consulta para as questões e outra para as já respondidas nesta sessão
+        questoes = {
+            questao.id: questao
+            for questao in Questao.query.filter(Questao.id.in_(questao_ids))
+        } if questao_ids else {}
+        respondidas = set(db.session.scalars(
+            db.select(RespostaQuestao.questao_id).where(
+                RespostaQuestao.sessao_id == sessao.id,
+                RespostaQuestao.questao_id.in_(questao_ids)
+            )
+        )) if questao_ids else set()
+        
+        resultados = []
+        novas_respostas = []
+        for item in itens:
+            if not isinstance(item, dict) or 'questao_id' not in item or 'resposta_usuario' not in item:
+                resultados.append({'error': 'Campos questao_id e resposta_usuario são obrigatórios'})
+                continue
+            
+            questao_id = item['questao_id']
+            questao = questoes.get(questao_id)
+            if not questao:
+                resultados.append({'questao_id': questao_id, 'error': 'Questão não encontrada'})
+                continue
+            if questao_id in respondidas:
+                resultados.append({'questao_id': questao_id, 'error': 'Questão já foi respondida nesta sessão'})
+                continue
+            respondidas.add(questao_id)
+            
+            correta = item['resposta_usuario'] == questao.resposta_correta
+            novas_respostas.append(RespostaQuestao(
+                sessao_id=sessao.id,
+                questao_id=questao_id,
+                resposta_usuario=item['resposta_usuario'],
+                correta=correta,
+                tempo_resposta_segundos=item.get('tempo_resposta_segundos', 0)
+            ))
+            resultados.append({
+                'questao_id': questao_id,
+                'correta': correta,
+                'resposta_correta': questao.resposta_correta,
+                'explicacao': questao.explicacao
+            })
+        
+        if novas_respostas:
+            db.session.add_all(novas_respostas)
+            sessao.registrar_respostas(
+                len(novas_respostas),
+                sum(1 for resposta in novas_respostas if resposta.correta)
+            )
+        
+        db.session.commit()
+        
+        return jsonify({
+            'resultados': resultados,
+            'registradas': len(novas_respostas),
+            'progresso': {
+                'completados': sessao.itens_completados,
+                'total': sessao.total_itens
+            }
+        }), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 @treinamento_bp.route('/treinamento/finalizar/<int:sessao_id>', methods=['POST'])
+@requer_token()
 def finalizar_sessao(sessao_id):
     """Finaliza uma sessão de treinamento"""
     try:
@@ -136,6 +253,8 @@ def finalizar_sessao(sessao_id):
         
         if not sessao:
             return jsonify({'error': 'Sessão não encontrada ou já finalizada'}), 404
+        if _sessao_de_outro_usuario(sessao):
+            return jsonify({'error': 'Sessão de outro usuário'}), 403
         
         # Finalizar sessão
         sessao.finalizar_sessao()
@@ -161,14 +280,18 @@ def finalizar_sessao(sessao_id):
             metrica.adicionar_tempo_estudo(tempo_minutos)
             metrica.atualizar_taxa_acertos(taxa_acertos)
         
+        # Totais do dia, lidos pelo dashboard
+        EstudoDiario.registrar_sessao(sessao)
+        
         db.session.commit()
+        invalidar_metricas_usuario(sessao.usuario_id)
         
         resultado = {
             'sessao': sessao.to_dict(),
             'taxa_acertos': taxa_acertos,
             'tempo_total_minutos': tempo_minutos,
-            'respostas_corretas': sum(1 for r in sessao.respostas if r.correta),
-            'total_questoes': len(sessao.respostas)
+            'respostas_corretas': sessao.acertos,
+            'total_questoes': sessao.respondidas
         }
         
         return jsonify(resultado), 200
@@ -177,16 +300,26 @@ def finalizar_sessao(sessao_id):
         return jsonify({'error': str(e)}), 500
 
 @treinamento_bp.route('/treinamento/usuario/<int:usuario_id>/sessoes', methods=['GET'])
+@requer_token()
 def listar_sessoes_usuario(usuario_id):
-    """Lista sessões de treinamento de um usuário"""
+    """Lista sessões de treinamento de um usuário, paginadas por cursor"""
     try:
-        usuario = User.query.get_or_404(usuario_id)
+        erro = verificar_acesso_usuario(usuario_id)
+        if erro:
+            return erro
+        cursor, limite = ler_parametros_paginacao()
         
-        sessoes = SessaoTreinamento.query.filter_by(usuario_id=usuario_id).order_by(
-            SessaoTreinamento.data_inicio.desc()
-        ).all()
+        # disciplina carregada no mesmo SELECT; taxa de acertos vem dos contadores da sessão
+        query = SessaoTreinamento.query.options(
+            joinedload(SessaoTreinamento.disciplina)
+        ).filter_by(usuario_id=usuario_id)
+        sessoes, next_cursor = paginar(
+            query, SessaoTreinamento.data_inicio, SessaoTreinamento.id, cursor, limite
+        )
         
-        return jsonify([sessao.to_dict() for sessao in sessoes]), 200
+        return jsonify({'itens': [sessao.to_dict() for sessao in sessoes], 'next_cursor': next_cursor}), 200
+    except CursorInvalido as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
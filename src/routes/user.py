@@ -1,12 +1,29 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, g
 from src.models.user import User, db
+from src.utils.paginacao import CursorInvalido, ler_parametros_paginacao, paginar
+from src.utils.senhas import HashIndisponivel, HashSobrecarregado
+from src.utils.autenticacao import (
+    gerar_token, requer_token, revogar_token, revogar_tokens_usuario, verificar_acesso_usuario
+)
 
 user_bp = Blueprint('user', __name__)
 
+SEGUNDOS_RETRY_AFTER = 1
+
+
+def _sobrecarregado(erro):
+    status = 503 if isinstance(erro, HashIndisponivel) else 429
+    return jsonify({'message': str(erro)}), status, {'Retry-After': str(SEGUNDOS_RETRY_AFTER)}
+
+
 @user_bp.route('/users', methods=['GET'])
 def get_users():
-    users = User.query.all()
-    return jsonify([user.to_dict() for user in users])
+    cursor, limite = ler_parametros_paginacao()
+    try:
+        users, next_cursor = paginar(User.query, User.data_cadastro, User.id, cursor, limite)
+    except CursorInvalido as e:
+        return jsonify({'message': str(e)}), 400
+    return jsonify({'itens': [user.to_dict() for user in users], 'next_cursor': next_cursor})
 
 @user_bp.route('/users', methods=['POST'])
 def create_user():
@@ -23,7 +40,10 @@ def create_user():
         return jsonify({'message': 'Email já cadastrado'}), 409
 
     user = User(username=username, email=email)
-    user.set_password(password)
+    try:
+        user.set_password(password)
+    except (HashSobrecarregado, HashIndisponivel) as e:
+        return _sobrecarregado(e)
     db.session.add(user)
     db.session.commit()
     return jsonify(user.to_dict()), 201
@@ -34,7 +54,11 @@ def get_user(user_id):
     return jsonify(user.to_dict())
 
 @user_bp.route('/users/<int:user_id>', methods=['PUT'])
+@requer_token()
 def update_user(user_id):
+    erro = verificar_acesso_usuario(user_id)
+    if erro:
+        return erro
     user = User.query.get_or_404(user_id)
     data = request.json
     user.username = data.get('username', user.username)
@@ -43,9 +67,14 @@ def update_user(user_id):
     return jsonify(user.to_dict())
 
 @user_bp.route('/users/<int:user_id>', methods=['DELETE'])
+@requer_token()
 def delete_user(user_id):
+    erro = verificar_acesso_usuario(user_id)
+    if erro:
+        return erro
     user = User.query.get_or_404(user_id)
     db.session.delete(user)
+    revogar_tokens_usuario(user_id)
     db.session.commit()
     return '', 204
 
@@ -57,12 +86,31 @@ def login():
     password = data.get("password")
 
     user = User.query.filter_by(email=email).first()
+    try:
+        senha_correta = bool(user) and user.check_password(password)
+    except (HashSobrecarregado, HashIndisponivel) as e:
+        return _sobrecarregado(e)
 
-    if user and user.check_password(password):
-        # Aqui você geraria um token JWT real
-        access_token = "seu_token_jwt_aqui"  # Substitua por um token JWT real
-        return jsonify(access_token=access_token), 200
+    if senha_correta:
+        if db.session.is_modified(user):
+            # Hash regerado com os parâmetros atuais
+            db.session.commit()
+        access_token, validade = gerar_token(user)
+        return jsonify(
+            access_token=access_token,
+            token_type="Bearer",
+            expires_in=validade,
+            usuario=user.to_dict()
+        ), 200
     else:
         return jsonify({"message": "Credenciais inválidas"}), 401
 
 
+@user_bp.route("/auth/logout", methods=["POST"])
+@requer_token()
+def logout():
+    revogar_token(g.token)
+    db.session.commit()
+    return '', 204
+
+
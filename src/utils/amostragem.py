@@ -0,0 +1,108 @@
+"""
+Amostragem aleatória uniforme de questões ativas
+
+Para cada filtro (disciplina_id, dificuldade) é mantido em memória um vetor
+ordenado com os ids das questões ativas. Ele é montado sob demanda com uma
+consulta que lê apenas ids e depois mantido incrementalmente pelos eventos da
+sessão, então sortear N questões custa O(N) em vez de varrer a tabela.
+Como o vetor é ordenado, a mesma seed sobre o mesmo conjunto de questões ativas
+sempre produz a mesma amostra.
+
+Os filtros vêm da query string, então no máximo MAX_INDICES vetores ficam em
+memória (os usados há mais tempo saem primeiro). Os eventos só enxergam commits
+do próprio processo: com vários workers, alterações feitas em outro worker
+aparecem aqui quando o vetor expira, em até VALIDADE_SEGUNDOS.
+"""
+import bisect
+import random
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from src.models.user import db
+from src.models.questao import Questao
+
+MAX_INDICES = 256
+VALIDADE_SEGUNDOS = 60
+
+_lock = threading.RLock()
+_indices = OrderedDict()  # (disciplina_id, dificuldade) -> (carregado em, lista ordenada de ids)
+
+
+def _carregar_ids(disciplina_id, dificuldade):
+    consulta = db.select(Questao.id).where(Questao.ativo == True)
+    if disciplina_id is not None:
+        consulta = consulta.where(Questao.disciplina_id == disciplina_id)
+    if dificuldade is not None:
+        consulta = consulta.where(Questao.dificuldade == dificuldade)
+    return list(db.session.scalars(consulta.order_by(Questao.id)))
+
+
+def _obter_indice(disciplina_id, dificuldade):
+    chave = (disciplina_id, dificuldade)
+    with _lock:
+        # Carregado sob o lock para não perder alterações aplicadas durante a leitura
+        entrada = _indices.get(chave)
+        if entrada is None or time.monotonic() - entrada[0] > VALIDADE_SEGUNDOS:
+            entrada = (time.monotonic(), _carregar_ids(disciplina_id, dificuldade))
+            _indices[chave] = entrada
+            while len(_indices) > MAX_INDICES:
+                _indices.popitem(last=False)
+        _indices.move_to_end(chave)
+        return entrada[1]
+
+
+def amostrar_questoes(quantidade, disciplina_id=None, dificuldade=None, seed=None):
+    """Sorteia até `quantidade` ids de questões ativas, sem repetição"""
+    gerador = random.Random(seed)
+    with _lock:
+        ids = _obter_indice(disciplina_id, dificuldade)
+        return gerador.sample(ids, min(max(quantidade, 0), len(ids)))
+
+
+def invalidar():
+    """Descarta todos os índices (usar após escritas feitas fora do ORM)"""
+    with _lock:
+        _indices.clear()
+
+
+def _aplicar_alteracao(questao_id, ativo, disciplina_id, dificuldade):
+    for (filtro_disciplina, filtro_dificuldade), (_, ids) in _indices.items():
+        posicao = bisect.bisect_left(ids, questao_id)
+        presente = posicao < len(ids) and ids[posicao] == questao_id
+        pertence = (
+            ativo
+            and filtro_disciplina in (None, disciplina_id)
+            and filtro_dificuldade in (None, dificuldade)
+        )
+        if presente and not pertence:
+            del ids[posicao]
+        elif pertence and not presente:
+            ids.insert(posicao, questao_id)
+
+
+@event.listens_for(Session, 'after_flush')
+def _registrar_questoes_alteradas(session, flush_context):
+    alteracoes = session.info.setdefault('questoes_alteradas', {})
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, Questao):
+            alteracoes[obj.id] = (bool(obj.ativo), obj.disciplina_id, obj.dificuldade)
+    for obj in session.deleted:
+        if isinstance(obj, Questao):
+            alteracoes[obj.id] = (False, None, None)
+
+
+@event.listens_for(Session, 'after_commit')
+def _atualizar_indices(session):
+    alteracoes = session.info.pop('questoes_alteradas', None)
+    if not alteracoes:
+        return
+    with _lock:
+        for questao_id, estado in alteracoes.items():
+            _aplicar_alteracao(questao_id, *estado)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _descartar_questoes_alteradas(session):
+    session.info.pop('questoes_alteradas', None)
@@ -0,0 +1,165 @@
+"""
+Tokens de acesso assinados (itsdangerous + SECRET_KEY) com expiração
+
+O token carrega o id e o tipo do usuário e é verificado apenas em memória:
+assinatura, validade e lista de revogação. A lista de revogação fica na tabela
+token_revogado e é espelhada em memória; cada processo busca as revogações
+novas no máximo a cada INTERVALO_SINCRONIZACAO segundos.
+"""
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from functools import wraps
+from flask import current_app, g, jsonify, request
+from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
+from src.models.user import db, User
+from src.models.token_revogado import TokenRevogado
+
+VALIDADE_PADRAO_SEGUNDOS = 12 * 3600
+INTERVALO_SINCRONIZACAO = 30
+_SALT = 'token-acesso'
+
+
+class TokenInvalido(Exception):
+    pass
+
+
+_lock = threading.Lock()
+_revogados = {}  # jti -> expiração (timestamp)
+_revogados_usuario = {}  # usuario_id -> tokens emitidos até este timestamp são inválidos
+_estado = {'ultimo_id': 0, 'proxima_sincronizacao': 0.0}
+
+
+def _timestamp(data):
+    """Timestamp de um datetime ingênuo em UTC (como os gravados no banco)"""
+    return data.replace(tzinfo=timezone.utc).timestamp()
+
+
+def _utc_ingenuo(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).replace(tzinfo=None)
+
+
+def _validade():
+    return current_app.config.get('TOKEN_VALIDADE_SEGUNDOS', VALIDADE_PADRAO_SEGUNDOS)
+
+
+def _serializador():
+    return URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt=_SALT)
+
+
+def gerar_token(usuario):
+    """Retorna (token, validade em segundos) para o usuário"""
+    token = _serializador().dumps({
+        'uid': usuario.id,
+        'tipo': usuario.tipo_usuario,
+        'jti': uuid.uuid4().hex
+    })
+    return token, _validade()
+
+
+def _sincronizar(agora):
+    """Traz para a memória as revogações gravadas desde a última sincronização"""
+    linhas = db.session.execute(
+        db.select(TokenRevogado.id, TokenRevogado.jti, TokenRevogado.usuario_id,
+                  TokenRevogado.revogado_em, TokenRevogado.expira_em)
+        .where(TokenRevogado.id > _estado['ultimo_id'], TokenRevogado.expira_em > datetime.utcnow())
+        .order_by(TokenRevogado.id)
+    ).all()
+    with _lock:
+        for linha_id, jti, usuario_id, revogado_em, expira_em in linhas:
+            if jti:
+                _revogados[jti] = _timestamp(expira_em)
+            elif usuario_id is not None:
+                _revogados_usuario[usuario_id] = max(
+                    _revogados_usuario.get(usuario_id, 0), _timestamp(revogado_em)
+                )
+            _estado['ultimo_id'] = max(_estado['ultimo_id'], linha_id)
+        for jti in [jti for jti, expira in _revogados.items() if expira <= time.time()]:
+            del _revogados[jti]
+        _estado['proxima_sincronizacao'] = agora + INTERVALO_SINCRONIZACAO
+
+
+def verificar_token(token):
+    """Valida o token e retorna seu conteúdo (uid, tipo, jti, emitido_em); TokenInvalido se não for válido"""
+    try:
+        dados, emitido_em = _serializador().loads(token, max_age=_validade(), return_timestamp=True)
+    except SignatureExpired:
+        raise TokenInvalido('Token expirado')
+    except BadSignature:
+        raise TokenInvalido('Token inválido')
+
+    agora = time.monotonic()
+    if agora >= _estado['proxima_sincronizacao']:
+        _sincronizar(agora)
+
+    emitido_em = emitido_em.timestamp()
+    with _lock:
+        if dados.get('jti') in _revogados or emitido_em <= _revogados_usuario.get(dados.get('uid'), 0):
+            raise TokenInvalido('Token revogado')
+    return {**dados, 'emitido_em': emitido_em}
+
+
+def revogar_token(dados):
+    """Revoga um token já verificado (logout)"""
+    expira = dados['emitido_em'] + _validade()
+    db.session.add(TokenRevogado(jti=dados['jti'], usuario_id=dados['uid'], expira_em=_utc_ingenuo(expira)))
+    with _lock:
+        _revogados[dados['jti']] = expira
+
+
+def revogar_tokens_usuario(usuario_id):
+    """Invalida todos os tokens já emitidos para o usuário (ex.: conta removida)"""
+    agora = time.time()
+    db.session.add(TokenRevogado(
+        usuario_id=usuario_id, revogado_em=_utc_ingenuo(agora), expira_em=_utc_ingenuo(agora + _validade())
+    ))
+    with _lock:
+        _revogados_usuario[usuario_id] = max(_revogados_usuario.get(usuario_id, 0), agora)
+
+
+def ler_token():
+    """Dados do token de "Authorization: Bearer <token>"; None sem o cabeçalho, TokenInvalido se inválido"""
+    esquema, _, token = request.headers.get('Authorization', '').partition(' ')
+    if esquema.lower() != 'bearer' or not token:
+        return None
+    return verificar_token(token.strip())
+
+
+def requer_token(*tipos):
+    """Exige "Authorization: Bearer <token>"; com `tipos`, restringe aos tipos de usuário informados
+
+    Preenche g.usuario_id, g.tipo_usuario e g.token.
+    """
+    def decorador(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                dados = ler_token()
+            except TokenInvalido as e:
+                return jsonify({'error': str(e)}), 401
+            if dados is None:
+                return jsonify({'error': 'Token de acesso ausente'}), 401
+            if tipos and dados.get('tipo') not in tipos:
+                return jsonify({'error': 'Acesso não permitido para este tipo de usuário'}), 403
+            g.usuario_id = dados['uid']
+            g.tipo_usuario = dados.get('tipo')
+            g.token = dados
+            return view(*args, **kwargs)
+        return wrapper
+    return decorador
+
+
+def verificar_acesso_usuario(usuario_id):
+    """None se o usuário do token pode acessar os dados de `usuario_id`; senão a resposta de erro
+
+    O próprio usuário não gera consulta (o token já prova que ele existe);
+    administradores podem acessar qualquer usuário existente.
+    """
+    if g.usuario_id == usuario_id:
+        return None
+    if g.tipo_usuario != 'admin':
+        return jsonify({'error': 'Acesso não permitido aos dados de outro usuário'}), 403
+    if db.session.get(User, usuario_id) is None:
+        return jsonify({'error': 'Usuário não encontrado'}), 404
+    return None
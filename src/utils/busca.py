@@ -0,0 +1,202 @@
+"""
+Busca textual com tabelas virtuais FTS5 do SQLite
+
+Cada tipo de conteúdo tem sua própria tabela FTS5 cujo rowid é o id da entidade.
+Apenas conteúdos ativos são indexados. A manutenção acontece no after_flush da
+sessão, na mesma transação da alteração, então um rollback também desfaz o índice.
+"""
+import html
+import re
+from sqlalchemy import bindparam, event, inspect, text
+from sqlalchemy.orm import Session, load_only
+from src.models.user import db
+from src.models.questao import Questao
+from src.models.resumo import Resumo
+from src.models.mapa_mental import MapaMental
+
+TOKENIZADOR = "tokenize='unicode61 remove_diacritics 2', prefix='2 3'"
+
+# tipo -> (tabela FTS, colunas indexadas, modelo)
+TIPOS = {
+    'questao': ('busca_questao', ('texto_questao', 'explicacao'), Questao),
+    'resumo': ('busca_resumo', ('titulo', 'conteudo'), Resumo),
+    'mapa': ('busca_mapa', ('titulo', 'texto_nodos'), MapaMental),
+}
+
+# Atributos que, quando alterados, exigem reindexar a entidade
+_ATRIBUTOS_INDEXADOS = {
+    Questao: ('texto_questao', 'explicacao', 'disciplina_id', 'ativo'),
+    Resumo: ('titulo', 'conteudo', 'disciplina_id', 'ativo'),
+    MapaMental: ('titulo', 'nodos', 'disciplina_id', 'ativo'),
+}
+
+_TIPO_POR_MODELO = {modelo: tipo for tipo, (_, _, modelo) in TIPOS.items()}
+
+# Marcadores temporários de destaque, trocados por <mark> depois do escape HTML
+_INICIO_DESTAQUE = '\x02'
+_FIM_DESTAQUE = '\x03'
+
+
+def _texto_nodos(mapa):
+    return ' '.join(
+        str(nodo.get('text', '')) for nodo in mapa.get_nodos() if isinstance(nodo, dict)
+    )
+
+
+def _documento(obj):
+    """Retorna os valores das colunas indexadas de uma entidade"""
+    if isinstance(obj, Questao):
+        return (obj.texto_questao, obj.explicacao or '')
+    if isinstance(obj, Resumo):
+        return (obj.titulo, obj.conteudo)
+    return (obj.titulo, _texto_nodos(obj))
+
+
+def criar_tabelas(conexao):
+    """Cria as tabelas FTS5 que ainda não existem e as popula a partir das tabelas de conteúdo"""
+    for tipo, (tabela, colunas, _) in TIPOS.items():
+        existe = conexao.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :nome"),
+            {'nome': tabela}
+        ).first()
+        if existe:
+            continue
+        conexao.execute(text(
+            f"CREATE VIRTUAL TABLE {tabela} USING fts5("
+            f"{', '.join(colunas)}, disciplina_id UNINDEXED, {TOKENIZADOR})"
+        ))
+        reindexar(conexao, tipo)
+
+
+def reindexar(conexao, tipo, ids=None):
+    """(Re)indexa entidades de um tipo; sem ids, reconstrói o índice inteiro"""
+    tabela, colunas, modelo = TIPOS[tipo]
+    if ids is not None:
+        ids = list(ids)
+        if not ids:
+            return
+        _remover(conexao, tabela, ids)
+    else:
+        conexao.execute(text(f'DELETE FROM {tabela}'))
+
+    if tipo == 'mapa':
+        # O texto dos nodos está dentro do JSON e precisa ser extraído em Python
+        consulta = db.select(MapaMental).options(
+            load_only(MapaMental.titulo, MapaMental.nodos, MapaMental.disciplina_id)
+        ).where(MapaMental.ativo == True)
+        if ids is not None:
+            consulta = consulta.where(MapaMental.id.in_(ids))
+        with Session(bind=conexao) as sessao:
+            for mapa in sessao.scalars(consulta.execution_options(yield_per=500)):
+                _inserir(conexao, tabela, colunas, mapa.id, mapa.disciplina_id, _documento(mapa))
+        return
+
+    valores = ', '.join(f"COALESCE({coluna}, '')" for coluna in colunas)
+    sql = (f"INSERT INTO {tabela}(rowid, {', '.join(colunas)}, disciplina_id) "
+           f"SELECT id, {valores}, disciplina_id FROM {modelo.__tablename__} WHERE ativo = 1")
+    if ids is None:
+        conexao.execute(text(sql))
+    else:
+        conexao.execute(
+            text(sql + ' AND id IN :ids').bindparams(bindparam('ids', expanding=True)),
+            {'ids': ids}
+        )
+
+
+def _remover(conexao, tabela, ids):
+    if ids:
+        conexao.execute(
+            text(f'DELETE FROM {tabela} WHERE rowid IN :ids').bindparams(bindparam('ids', expanding=True)),
+            {'ids': list(ids)}
+        )
+
+
+def _inserir(conexao, tabela, colunas, entidade_id, disciplina_id, valores):
+    parametros = ', '.join(f':c{i}' for i in range(len(colunas)))
+    conexao.execute(
+        text(f"INSERT INTO {tabela}(rowid, {', '.join(colunas)}, disciplina_id) "
+             f"VALUES (:id, {parametros}, :disciplina_id)"),
+        {'id': entidade_id, 'disciplina_id': disciplina_id,
+         **{f'c{i}': valor for i, valor in enumerate(valores)}}
+    )
+
+
+def _precisa_reindexar(obj):
+    estado = inspect(obj)
+    return any(estado.attrs[nome].history.has_changes() for nome in _ATRIBUTOS_INDEXADOS[type(obj)])
+
+
+@event.listens_for(Session, 'after_flush')
+def _atualizar_indice(session, flush_context):
+    conexao = None
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        tipo = _TIPO_POR_MODELO.get(type(obj))
+        if tipo is None:
+            continue
+        removido = obj in session.deleted
+        if not removido and obj not in session.new and not _precisa_reindexar(obj):
+            continue
+
+        if conexao is None:
+            conexao = session.connection()
+        tabela, colunas, _ = TIPOS[tipo]
+        _remover(conexao, tabela, [obj.id])
+        if not removido and obj.ativo:
+            _inserir(conexao, tabela, colunas, obj.id, obj.disciplina_id, _documento(obj))
+
+
+def _consulta_fts(termos):
+    """Converte o texto digitado em uma consulta FTS5 segura (todas as palavras, prefixo na última)"""
+    palavras = re.findall(r'\w+', termos or '')
+    if not palavras:
+        return None
+    partes = ['"{}"'.format(palavra.replace('"', '""')) for palavra in palavras]
+    partes[-1] += '*'
+    return ' '.join(partes)
+
+
+def _destacar(trecho):
+    return (html.escape(trecho or '')
+            .replace(_INICIO_DESTAQUE, '<mark>')
+            .replace(_FIM_DESTAQUE, '</mark>'))
+
+
+def buscar(termos, tipos=None, disciplina_id=None, limite=20):
+    """Busca nos tipos informados e retorna os resultados mais relevantes
+
+    O bm25 depende das estatísticas de cada tabela FTS (número de documentos,
+    tamanho médio), então não é comparável entre tipos. Dentro de cada tipo a
+    relevância é normalizada pelo melhor resultado (1.0), e só então os tipos
+    são intercalados.
+    """
+    consulta = _consulta_fts(termos)
+    if consulta is None:
+        return []
+
+    resultados = []
+    for tipo in (tipos or TIPOS):
+        tabela, colunas, _ = TIPOS[tipo]
+        filtro = ' AND disciplina_id = :disciplina_id' if disciplina_id else ''
+        linhas = db.session.execute(text(
+            f"SELECT rowid, disciplina_id, {colunas[0]}, rank, "
+            f"snippet({tabela}, -1, :inicio, :fim, '…', 16) "
+            f"FROM {tabela} WHERE {tabela} MATCH :consulta{filtro} "
+            f"ORDER BY rank LIMIT :limite"
+        ), {
+            'consulta': consulta, 'disciplina_id': disciplina_id, 'limite': limite,
+            'inicio': _INICIO_DESTAQUE, 'fim': _FIM_DESTAQUE,
+        }).all()
+        # rank é o bm25 negativo: o primeiro da lista tem o maior escore do tipo
+        melhor = -linhas[0][3] if linhas else 0
+        for entidade_id, disciplina, titulo, rank, trecho in linhas:
+            resultados.append({
+                'tipo': tipo,
+                'id': entidade_id,
+                'disciplina_id': disciplina,
+                'titulo': titulo,
+                'trecho': _destacar(trecho),
+                'relevancia': round(-rank / melhor, 4) if melhor > 0 else 1.0
+            })
+
+    resultados.sort(key=lambda resultado: resultado['relevancia'], reverse=True)
+    return resultados[:limite]
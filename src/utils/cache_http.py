@@ -0,0 +1,107 @@
+"""
+Validação condicional de respostas (ETag / Last-Modified / 304) para os endpoints de catálogo
+
+Cada tabela de catálogo tem uma versão na tabela versao_tabela, incrementada no
+flush que altera alguma de suas linhas, na mesma transação da alteração (um
+rollback desfaz também a versão). Como as versões estão no banco, todos os
+workers enxergam as mesmas: o ETag de uma resposta é derivado da URL e das
+versões das tabelas de que ela depende, e um If-None-Match é respondido com 304
+após uma única leitura de versao_tabela, sem executar a view.
+"""
+import hashlib
+import time
+from functools import wraps
+from flask import request, make_response
+from sqlalchemy import bindparam, event, text
+from sqlalchemy.orm import Session
+from src.models.user import db
+
+TABELAS_CATALOGO = ('disciplina', 'questao', 'mapa_mental', 'resumo')
+
+
+def criar_tabela(conexao):
+    """Cria versao_tabela com uma linha por tabela de catálogo (idempotente)"""
+    conexao.execute(text(
+        'CREATE TABLE IF NOT EXISTS versao_tabela ('
+        'tabela VARCHAR(50) PRIMARY KEY, versao INTEGER NOT NULL, alterada_em FLOAT NOT NULL)'
+    ))
+    conexao.execute(
+        text('INSERT OR IGNORE INTO versao_tabela (tabela, versao, alterada_em) VALUES (:tabela, 0, :agora)'),
+        [{'tabela': tabela, 'agora': time.time()} for tabela in TABELAS_CATALOGO]
+    )
+
+
+def versao_tabelas(tabelas):
+    """Retorna (versão, timestamp da última alteração) de cada tabela"""
+    linhas = dict(
+        (tabela, (versao, alterada_em))
+        for tabela, versao, alterada_em in db.session.execute(
+            text('SELECT tabela, versao, alterada_em FROM versao_tabela WHERE tabela IN :tabelas')
+            .bindparams(bindparam('tabelas', expanding=True)),
+            {'tabelas': list(tabelas)}
+        )
+    )
+    return [linhas.get(tabela, (0, 0.0)) for tabela in tabelas]
+
+
+def marcar_alteracao(session, *tabelas):
+    """Incrementa, na transação da sessão, a versão das tabelas de catálogo informadas
+
+    Necessário para escritas feitas fora da unit of work do ORM (ex.: inserts em lote).
+    """
+    tabelas = sorted({tabela for tabela in tabelas if tabela in TABELAS_CATALOGO})
+    if tabelas:
+        session.connection().execute(
+            text('UPDATE versao_tabela SET versao = versao + 1, alterada_em = :agora WHERE tabela IN :tabelas')
+            .bindparams(bindparam('tabelas', expanding=True)),
+            {'agora': time.time(), 'tabelas': tabelas}
+        )
+
+
+@event.listens_for(Session, 'after_flush')
+def _registrar_alteracoes(session, flush_context):
+    marcar_alteracao(session, *(
+        getattr(obj, '__tablename__', None)
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted)
+    ))
+
+
+def resposta_condicional(*tabelas, quando=None):
+    """Decorator para rotas GET cujo conteúdo depende apenas das tabelas informadas.
+
+    `quando` é um predicado opcional; se retornar False a requisição não é validada.
+    """
+    def decorador(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if quando is not None and not quando():
+                return view(*args, **kwargs)
+
+            versoes = versao_tabelas(tabelas)
+            assinatura = '|'.join(
+                [request.full_path] +
+                [f'{tabela}:{versao}:{alterada_em}' for tabela, (versao, alterada_em) in zip(tabelas, versoes)]
+            )
+            etag = hashlib.sha1(assinatura.encode('utf-8')).hexdigest()
+            ultima_alteracao = int(max(timestamp for _, timestamp in versoes))
+
+            # Responder 304 sem executar a view
+            if request.if_none_match:
+                nao_modificado = request.if_none_match.contains_weak(etag)
+            else:
+                desde = request.if_modified_since
+                nao_modificado = desde is not None and desde.timestamp() >= ultima_alteracao
+
+            if nao_modificado:
+                response = make_response('', 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            response.last_modified = ultima_alteracao
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+    return decorador
@@ -0,0 +1,73 @@
+"""
+Cache em memória de respostas calculadas por usuário (LRU limitado com TTL)
+
+As entradas são invalidadas explicitamente quando os dados de origem mudam;
+o TTL limita o tempo que uma entrada pode ficar desatualizada em outros
+processos e cobre a virada do dia nos gráficos do dashboard.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class CacheLRU:
+    def __init__(self, capacidade, ttl_segundos):
+        self.capacidade = capacidade
+        self.ttl_segundos = ttl_segundos
+        self._entradas = OrderedDict()  # chave -> (expira_em, valor)
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+
+    def obter(self, chave):
+        """Retorna o valor em cache ou None"""
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is None or entrada[0] < time.monotonic():
+                if entrada is not None:
+                    del self._entradas[chave]
+                self.falhas += 1
+                return None
+            self._entradas.move_to_end(chave)
+            self.acertos += 1
+            return entrada[1]
+
+    def guardar(self, chave, valor):
+        with self._lock:
+            self._entradas[chave] = (time.monotonic() + self.ttl_segundos, valor)
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > self.capacidade:
+                self._entradas.popitem(last=False)
+
+    def invalidar(self, filtro=None):
+        """Remove as entradas cuja chave satisfaz o filtro (todas, se não houver filtro)"""
+        with self._lock:
+            if filtro is None:
+                self._entradas.clear()
+                return
+            for chave in [chave for chave in self._entradas if filtro(chave)]:
+                del self._entradas[chave]
+
+    def estatisticas(self):
+        with self._lock:
+            total = self.acertos + self.falhas
+            return {
+                'entradas': len(self._entradas),
+                'capacidade': self.capacidade,
+                'ttl_segundos': self.ttl_segundos,
+                'acertos': self.acertos,
+                'falhas': self.falhas,
+                'taxa_acertos': round(self.acertos / total * 100, 2) if total else 0.0
+            }
+
+
+# Dashboard e insights, com chaves (tipo, usuario_id)
+cache_metricas = CacheLRU(capacidade=2048, ttl_segundos=300)
+
+
+def invalidar_metricas_usuario(usuario_id):
+    cache_metricas.invalidar(lambda chave: chave[1] == usuario_id)
+
+
+def invalidar_metricas():
+    cache_metricas.invalidar()
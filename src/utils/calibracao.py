@@ -0,0 +1,126 @@
+"""
+Calibração da dificuldade das questões a partir do histórico de respostas
+
+Para cada questão são calculados:
+- p-valor: proporção de respostas corretas;
+- discriminação: correlação ponto-bisserial entre acertar a questão e o
+  desempenho do aluno no restante da sessão (acertos da sessão sem esta
+  resposta, sobre as demais respostas);
+- tempo mediano de resposta.
+
+Todo o trabalho sobre as respostas é feito em uma única consulta agregada no
+banco (somatórios por questão e mediana via funções de janela); em Python
+restam apenas as fórmulas finais, uma linha por questão.
+"""
+import math
+from datetime import datetime
+from sqlalchemy import bindparam, text
+
+# Mínimo de respostas para sugerir uma dificuldade
+MIN_RESPOSTAS_SUGESTAO = 30
+
+# p-valor mínimo de cada faixa de dificuldade
+LIMITES_DIFICULDADE = (('facil', 0.7), ('medio', 0.4), ('dificil', 0.0))
+
+_SQL_AGREGADOS = """
+    WITH base AS (
+        SELECT r.questao_id AS q, r.correta AS c, r.tempo_resposta_segundos AS t,
+               CASE WHEN s.respondidas > 1
+                    THEN (s.acertos - r.correta) * 1.0 / (s.respondidas - 1) END AS x
+        FROM resposta_questao r JOIN sessao_treinamento s ON s.id = r.sessao_id
+        {filtro}
+    ),
+    somas AS (
+        SELECT q, COUNT(*) AS n, SUM(c) AS acertos,
+               COUNT(x) AS nx, SUM(x) AS sx, SUM(x * x) AS sxx,
+               SUM(CASE WHEN x IS NOT NULL THEN c END) AS sc, SUM(x * c) AS sxc
+        FROM base GROUP BY q
+    ),
+    ordenados AS (
+        SELECT q, t, ROW_NUMBER() OVER (PARTITION BY q ORDER BY t) AS i,
+               COUNT(*) OVER (PARTITION BY q) AS total
+        FROM base WHERE t IS NOT NULL
+    ),
+    medianas AS (
+        SELECT q, AVG(t) AS mediana FROM ordenados
+        WHERE i IN ((total + 1) / 2, (total + 2) / 2) GROUP BY q
+    )
+    SELECT somas.*, medianas.mediana
+    FROM somas LEFT JOIN medianas ON medianas.q = somas.q
+"""
+
+
+def _ponto_bisserial(nx, sx, sxx, sc, sxc):
+    """Correlação de Pearson entre x e c (binária) a partir dos somatórios"""
+    if not nx:
+        return None
+    variancia_x = nx * sxx - sx * sx
+    variancia_c = nx * sc - sc * sc  # c² = c
+    if variancia_x <= 0 or variancia_c <= 0:
+        return None
+    return (nx * sxc - sx * sc) / math.sqrt(variancia_x * variancia_c)
+
+
+def dificuldade_por_p_valor(p_valor, respostas):
+    if p_valor is None or respostas < MIN_RESPOSTAS_SUGESTAO:
+        return None
+    for rotulo, minimo in LIMITES_DIFICULDADE:
+        if p_valor >= minimo:
+            return rotulo
+
+
+def calcular_estatisticas(conexao, questao_ids=None):
+    """Estatísticas das questões com respostas (todas ou as informadas), sem gravar nada"""
+    parametros = {}
+    filtro = ''
+    if questao_ids is not None:
+        questao_ids = list(questao_ids)
+        if not questao_ids:
+            return []
+        filtro = 'WHERE r.questao_id IN :ids'
+        parametros['ids'] = questao_ids
+    consulta = text(_SQL_AGREGADOS.format(filtro=filtro))
+    if questao_ids is not None:
+        consulta = consulta.bindparams(bindparam('ids', expanding=True))
+
+    agora = datetime.utcnow()
+    linhas = []
+    for q, n, acertos, nx, sx, sxx, sc, sxc, mediana in conexao.execute(consulta, parametros):
+        p_valor = acertos / n
+        linhas.append({
+            'questao_id': q,
+            'respostas': n,
+            'acertos': acertos,
+            'p_valor': p_valor,
+            'discriminacao': _ponto_bisserial(nx, sx, sxx, sc, sxc),
+            'tempo_mediano_segundos': mediana,
+            'dificuldade_sugerida': dificuldade_por_p_valor(p_valor, n),
+            'atualizado_em': agora
+        })
+    return linhas
+
+
+def recalcular_estatisticas(conexao, questao_ids=None):
+    """Recalcula as estatísticas de todas as questões (ou das informadas); retorna quantas"""
+    if questao_ids is not None:
+        questao_ids = list(questao_ids)
+        if not questao_ids:
+            return 0
+    linhas = calcular_estatisticas(conexao, questao_ids)
+
+    if questao_ids is None:
+        conexao.execute(text('DELETE FROM estatistica_questao'))
+    else:
+        conexao.execute(
+            text('DELETE FROM estatistica_questao WHERE questao_id IN :ids')
+            .bindparams(bindparam('ids', expanding=True)),
+            {'ids': questao_ids}
+        )
+    if linhas:
+        conexao.execute(text(
+            'INSERT INTO estatistica_questao (questao_id, respostas, acertos, p_valor, discriminacao, '
+            'tempo_mediano_segundos, dificuldade_sugerida, atualizado_em) '
+            'VALUES (:questao_id, :respostas, :acertos, :p_valor, :discriminacao, '
+            ':tempo_mediano_segundos, :dificuldade_sugerida, :atualizado_em)'
+        ), linhas)
+    return len(linhas)
@@ -0,0 +1,122 @@
+"""
+Codificação de nodos e arestas dos mapas mentais no banco
+
+Formato atual (bytes): 1 byte de versão do formato seguido do conteúdo.
+    0x01: JSON compacto comprimido com zlib
+Valores em texto são do formato antigo (JSON puro) e continuam sendo lidos;
+o comando "recomprimir-mapas" de src/utils/manutencao.py os converte.
+
+Benchmark: python src/utils/codec_mapa.py [--nodos 5000]
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+import argparse
+import json
+import time
+import zlib
+from sqlalchemy import text
+
+FORMATO_ZLIB = 1
+NIVEL_COMPRESSAO = 6
+
+
+class FormatoDesconhecido(ValueError):
+    pass
+
+
+def codificar(valores):
+    """Lista Python -> bytes no formato atual"""
+    conteudo = json.dumps(valores, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    return bytes([FORMATO_ZLIB]) + zlib.compress(conteudo, NIVEL_COMPRESSAO)
+
+
+def texto_json(valor):
+    """Valor armazenado (qualquer formato) -> texto JSON, sem decodificar o JSON
+
+    FormatoDesconhecido (um ValueError) indica bytes que não podem ser lidos.
+    """
+    if not valor:
+        return '[]'
+    if isinstance(valor, str):
+        return valor
+    valor = bytes(valor)
+    if valor[0] == FORMATO_ZLIB:
+        try:
+            return zlib.decompress(valor[1:]).decode('utf-8')
+        except (zlib.error, UnicodeDecodeError) as e:
+            # Conteúdo truncado ou corrompido: tratado como qualquer outro valor ilegível
+            raise FormatoDesconhecido(f'Conteúdo comprimido inválido: {e}') from e
+    raise FormatoDesconhecido(f'Formato de armazenamento desconhecido: {valor[0]}')
+
+
+def decodificar(valor):
+    """Valor armazenado (qualquer formato) -> lista Python"""
+    return json.loads(texto_json(valor))
+
+
+def recomprimir_mapas(conexao, tamanho_lote=500):
+    """Converte para o formato atual os mapas ainda gravados como JSON em texto"""
+    convertidos = 0
+    while True:
+        linhas = conexao.execute(text(
+            "SELECT id, nodos, arestas FROM mapa_mental "
+            "WHERE typeof(nodos) = 'text' OR typeof(arestas) = 'text' LIMIT :limite"
+        ), {'limite': tamanho_lote}).all()
+        if not linhas:
+            return convertidos
+        atualizacoes = []
+        for mapa_id, nodos, arestas in linhas:
+            valores = {'id': mapa_id}
+            for coluna, valor in (('nodos', nodos), ('arestas', arestas)):
+                try:
+                    valores[coluna] = codificar(decodificar(valor))
+                except (ValueError, zlib.error):
+                    valores[coluna] = codificar([])  # mesmo tratamento que a leitura dá ao JSON inválido
+            atualizacoes.append(valores)
+        conexao.execute(
+            text('UPDATE mapa_mental SET nodos = :nodos, arestas = :arestas WHERE id = :id'),
+            atualizacoes
+        )
+        convertidos += len(atualizacoes)
+
+
+def _mapa_sintetico(total_nodos):
+    nodos = [
+        {'id': str(i), 'text': f'Tópico {i}', 'x': (i % 50) * 120, 'y': (i // 50) * 80,
+         'color': '#06B6D4' if i % 2 else '#0EA5A4'}
+        for i in range(1, total_nodos + 1)
+    ]
+    arestas = [{'from': str(i // 4 or 1), 'to': str(i)} for i in range(2, total_nodos + 1)]
+    return nodos, arestas
+
+
+def _medir(funcao, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao()
+    return (time.perf_counter() - inicio) / repeticoes * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compara o formato antigo (JSON) com o atual')
+    parser.add_argument('--nodos', type=int, default=5000, help='nodos do mapa sintético')
+    parser.add_argument('--repeticoes', type=int, default=20)
+    args = parser.parse_args()
+
+    nodos, arestas = _mapa_sintetico(args.nodos)
+    print(f'{"coluna":<10}{"formato":<10}{"bytes":>10}{"decodificar (ms)":>18}{"codificar (ms)":>16}')
+    for coluna, lista in (('nodos', nodos), ('arestas', arestas)):
+        antigo = json.dumps(lista)
+        atual = codificar(lista)
+        for formato, valor, codificador in (
+            ('json', antigo, lambda: json.dumps(lista)),
+            ('zlib v1', atual, lambda: codificar(lista)),
+        ):
+            print(f'{coluna:<10}{formato:<10}{len(valor):>10}'
+                  f'{_medir(lambda: decodificar(valor), args.repeticoes):>18.2f}'
+                  f'{_medir(codificador, args.repeticoes):>16.2f}')
+
+if __name__ == '__main__':
+    main()
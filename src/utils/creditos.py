@@ -0,0 +1,169 @@
+"""
+Créditos: movimentações atômicas, compra de conteúdo pago e reconciliação
+
+O livro-razão (lancamento_credito) é a fonte da verdade; user.creditos é o saldo
+derivado dele. Cada movimentação é um único UPDATE no saldo (condicional, no caso
+de débitos) seguido da inclusão do lançamento, na transação de quem chama. Não há
+leitura seguida de escrita em Python, então compras simultâneas não perdem
+atualizações nem precisam travar a linha do usuário antes do UPDATE.
+"""
+import math
+from flask import jsonify
+from sqlalchemy import func, select, text, update
+from sqlalchemy.dialects.sqlite import insert
+from src.models.user import db, User
+from src.models.lancamento_credito import LancamentoCredito
+from src.models.compra import Compra
+from src.models.mapa_mental import MapaMental
+from src.models.resumo import Resumo
+from src.utils.autenticacao import TokenInvalido, ler_token
+
+# tipo de conteúdo -> modelo com preco e autor_id
+CONTEUDOS = {'mapa': MapaMental, 'resumo': Resumo}
+
+# Diferença abaixo disso é arredondamento de ponto flutuante, não divergência
+TOLERANCIA_SALDO = 1e-6
+
+
+class CreditosInsuficientes(Exception):
+    pass
+
+
+class ConteudoNaoEncontrado(LookupError):
+    pass
+
+
+class PrecoInvalido(ValueError):
+    pass
+
+
+def validar_preco(preco):
+    """Retorna o preço informado para um conteúdo; PrecoInvalido se não for um número >= 0"""
+    if isinstance(preco, bool) or not isinstance(preco, (int, float)) or not math.isfinite(preco) or preco < 0:
+        raise PrecoInvalido('Campo preco deve ser um número maior ou igual a zero')
+    return preco
+
+
+def conteudo_pago(preco):
+    # Preço negativo gravado antes da validação é tratado como gratuito, nunca como crédito
+    return preco is not None and preco > 0
+
+
+def _gratuito(preco, autor_id, usuario_id):
+    return not conteudo_pago(preco) or autor_id == usuario_id
+
+
+def movimentar(usuario_id, valor, tipo, referencia_tipo=None, referencia_id=None):
+    """Soma `valor` ao saldo (negativo = débito), registra o lançamento e retorna o novo saldo
+
+    Um débito só é aplicado se o saldo cobrir o valor; caso contrário o UPDATE
+    não altera nenhuma linha e CreditosInsuficientes é levantada.
+    """
+    saldo_atual = func.coalesce(User.creditos, 0)
+    comando = update(User).where(User.id == usuario_id).values(creditos=saldo_atual + valor)
+    if valor < 0:
+        comando = comando.where(saldo_atual >= -valor)
+    novo_saldo = db.session.execute(comando.returning(User.creditos)).scalar()
+    if novo_saldo is None:
+        if valor < 0:
+            raise CreditosInsuficientes('Créditos insuficientes')
+        raise LookupError('Usuário não encontrado')
+
+    db.session.add(LancamentoCredito(
+        usuario_id=usuario_id,
+        valor=valor,
+        tipo=tipo,
+        referencia_tipo=referencia_tipo,
+        referencia_id=referencia_id
+    ))
+    return float(novo_saldo)
+
+
+def _buscar_conteudo(tipo_conteudo, conteudo_id):
+    modelo = CONTEUDOS[tipo_conteudo]
+    linha = db.session.execute(
+        select(modelo.preco, modelo.autor_id).where(modelo.id == conteudo_id, modelo.ativo == True)
+    ).first()
+    if linha is None:
+        raise ConteudoNaoEncontrado('Conteúdo não encontrado')
+    return linha
+
+
+def _compra_existente(usuario_id, tipo_conteudo, conteudo_id):
+    return db.session.scalars(select(Compra).where(
+        Compra.usuario_id == usuario_id,
+        Compra.tipo_conteudo == tipo_conteudo,
+        Compra.conteudo_id == conteudo_id
+    )).first()
+
+
+def possui_acesso(usuario_id, tipo_conteudo, conteudo_id):
+    """Indica se o usuário pode acessar o conteúdo (gratuito, próprio ou comprado)"""
+    preco, autor_id = _buscar_conteudo(tipo_conteudo, conteudo_id)
+    if _gratuito(preco, autor_id, usuario_id):
+        return True
+    return _compra_existente(usuario_id, tipo_conteudo, conteudo_id) is not None
+
+
+def verificar_acesso_conteudo(tipo_conteudo, conteudo):
+    """None se a requisição pode ler o conteúdo; senão a resposta de erro (401 ou 402)
+
+    Conteúdo gratuito dispensa token; o pago é liberado ao autor, a administradores
+    e a quem o comprou.
+    """
+    if not conteudo_pago(conteudo.preco):
+        return None
+    try:
+        dados = ler_token()
+    except TokenInvalido as e:
+        return jsonify({'error': str(e)}), 401
+    if dados is None:
+        return jsonify({'error': 'Conteúdo pago: token de acesso necessário'}), 401
+    if dados.get('tipo') == 'admin' or dados['uid'] == conteudo.autor_id:
+        return None
+    if _compra_existente(dados['uid'], tipo_conteudo, conteudo.id) is None:
+        return jsonify({'error': 'Conteúdo pago: compre o acesso em /api/compras'}), 402
+    return None
+
+
+def comprar(usuario_id, tipo_conteudo, conteudo_id):
+    """Compra um conteúdo e retorna (compra, saldo ou None se nada foi debitado)
+
+    Conteúdo gratuito ou do próprio autor não gera compra: retorna (None, None).
+    Uma compra repetida (inclusive simultânea) retorna a compra existente sem
+    debitar de novo. O commit fica com quem chama; em CreditosInsuficientes é
+    preciso fazer rollback para descartar a compra incluída.
+    """
+    preco, autor_id = _buscar_conteudo(tipo_conteudo, conteudo_id)
+    if _gratuito(preco, autor_id, usuario_id):
+        return None, None
+
+    # O índice único decide quem compra primeiro; a segunda requisição não insere nada
+    compra_id = db.session.execute(
+        insert(Compra).values(
+            usuario_id=usuario_id,
+            tipo_conteudo=tipo_conteudo,
+            conteudo_id=conteudo_id,
+            valor=preco
+        ).on_conflict_do_nothing(
+            index_elements=['usuario_id', 'tipo_conteudo', 'conteudo_id']
+        ).returning(Compra.id)
+    ).scalar()
+    if compra_id is None:
+        return _compra_existente(usuario_id, tipo_conteudo, conteudo_id), None
+
+    saldo = movimentar(usuario_id, -preco, 'compra', tipo_conteudo, conteudo_id)
+    return db.session.get(Compra, compra_id), saldo
+
+
+def reconciliar_saldos(conexao):
+    """Recalcula user.creditos a partir do livro-razão; retorna quantos saldos foram corrigidos"""
+    resultado = conexao.execute(text(
+        'UPDATE "user" SET creditos = saldos.saldo FROM ('
+        'SELECT u.id AS usuario_id, COALESCE(SUM(l.valor), 0) AS saldo '
+        'FROM "user" u LEFT JOIN lancamento_credito l ON l.usuario_id = u.id '
+        'GROUP BY u.id) AS saldos '
+        'WHERE saldos.usuario_id = "user".id '
+        'AND (creditos IS NULL OR ABS(creditos - saldos.saldo) > :tolerancia)'
+    ), {'tolerancia': TOLERANCIA_SALDO})
+    return resultado.rowcount
@@ -0,0 +1,136 @@
+"""
+Aplicação de operações incrementais (PATCH) sobre nodos e arestas de um mapa
+
+Operações aceitas, aplicadas em ordem e de forma atômica:
+    {"op": "adicionar_nodo", "nodo": {"id": "5", "text": "...", "x": 0, "y": 0}}
+    {"op": "mover_nodo", "id": "5", "x": 10, "y": 20}
+    {"op": "atualizar_nodo", "id": "5", "campos": {"text": "...", "color": "#fff"}}
+    {"op": "remover_nodo", "id": "5"}          (remove também as arestas do nodo)
+    {"op": "adicionar_aresta", "from": "1", "to": "5"}
+    {"op": "remover_aresta", "from": "1", "to": "5"}
+Ids de nodos são comparados como texto. A lista de nodos é editada no lugar:
+entradas não alcançadas pelas operações (inclusive as que não são objetos)
+continuam iguais e na mesma posição. Um id repetido no mapa não pode ser
+alvo de operações, já que não dá para saber qual dos nodos foi pedido.
+"""
+
+
+class OperacaoInvalida(ValueError):
+    pass
+
+
+def _chave(valor):
+    return str(valor)
+
+
+_REMOVIDO = object()
+
+
+def _nodo_existente(posicoes, operacao):
+    """Retorna a posição na lista do nodo indicado pela operação"""
+    if 'id' not in operacao:
+        raise OperacaoInvalida('Campo id é obrigatório')
+    chave = _chave(operacao['id'])
+    if chave not in posicoes:
+        raise OperacaoInvalida(f'Nodo {chave} não encontrado')
+    if posicoes[chave] is None:
+        raise OperacaoInvalida(f'Nodo {chave} aparece mais de uma vez no mapa')
+    return chave, posicoes[chave]
+
+
+def _extremidades(posicoes, operacao):
+    if 'from' not in operacao or 'to' not in operacao:
+        raise OperacaoInvalida('Campos from e to são obrigatórios')
+    origem, destino = _chave(operacao['from']), _chave(operacao['to'])
+    for chave in (origem, destino):
+        if chave not in posicoes:
+            raise OperacaoInvalida(f'Nodo {chave} não encontrado')
+    return origem, destino
+
+
+def aplicar_operacoes(nodos, arestas, operacoes):
+    """Aplica as operações às listas de nodos e arestas
+
+    Retorna (nodos, arestas, nodos_alterados, arestas_alteradas); as listas de
+    entrada não são modificadas. OperacaoInvalida indica a operação recusada.
+    """
+    if not isinstance(operacoes, list) or not operacoes:
+        raise OperacaoInvalida('Campo operacoes deve ser uma lista não vazia')
+
+    nodos = list(nodos)
+    posicoes = {}  # id -> posição em nodos; None quando o id aparece repetido
+    for posicao, nodo in enumerate(nodos):
+        if isinstance(nodo, dict) and 'id' in nodo:
+            chave = _chave(nodo['id'])
+            posicoes[chave] = None if chave in posicoes else posicao
+    arestas = list(arestas)
+    nodos_alterados = arestas_alteradas = False
+
+    for indice, operacao in enumerate(operacoes):
+        try:
+            if not isinstance(operacao, dict):
+                raise OperacaoInvalida('Operação deve ser um objeto')
+            tipo = operacao.get('op')
+
+            if tipo == 'adicionar_nodo':
+                nodo = operacao.get('nodo')
+                if not isinstance(nodo, dict) or 'id' not in nodo:
+                    raise OperacaoInvalida('Campo nodo deve ser um objeto com id')
+                if _chave(nodo['id']) in posicoes:
+                    raise OperacaoInvalida(f'Nodo {nodo["id"]} já existe')
+                posicoes[_chave(nodo['id'])] = len(nodos)
+                nodos.append(dict(nodo))
+                nodos_alterados = True
+
+            elif tipo == 'mover_nodo':
+                _, posicao = _nodo_existente(posicoes, operacao)
+                x, y = operacao.get('x'), operacao.get('y')
+                if not all(isinstance(valor, (int, float)) for valor in (x, y)):
+                    raise OperacaoInvalida('Campos x e y devem ser numéricos')
+                nodos[posicao] = {**nodos[posicao], 'x': x, 'y': y}
+                nodos_alterados = True
+
+            elif tipo == 'atualizar_nodo':
+                _, posicao = _nodo_existente(posicoes, operacao)
+                campos = operacao.get('campos')
+                if not isinstance(campos, dict) or 'id' in campos:
+                    raise OperacaoInvalida('Campo campos deve ser um objeto (sem id)')
+                nodos[posicao] = {**nodos[posicao], **campos}
+                nodos_alterados = True
+
+            elif tipo == 'remover_nodo':
+                chave, posicao = _nodo_existente(posicoes, operacao)
+                nodos[posicao] = _REMOVIDO
+                del posicoes[chave]
+                restantes = [
+                    aresta for aresta in arestas
+                    if chave not in (_chave(aresta.get('from')), _chave(aresta.get('to')))
+                ]
+                arestas_alteradas = arestas_alteradas or len(restantes) != len(arestas)
+                arestas = restantes
+                nodos_alterados = True
+
+            elif tipo == 'adicionar_aresta':
+                origem, destino = _extremidades(posicoes, operacao)
+                if any(_chave(a.get('from')) == origem and _chave(a.get('to')) == destino for a in arestas):
+                    raise OperacaoInvalida(f'Aresta {origem} -> {destino} já existe')
+                arestas.append({'from': operacao['from'], 'to': operacao['to']})
+                arestas_alteradas = True
+
+            elif tipo == 'remover_aresta':
+                origem, destino = _chave(operacao.get('from')), _chave(operacao.get('to'))
+                restantes = [
+                    aresta for aresta in arestas
+                    if (_chave(aresta.get('from')), _chave(aresta.get('to'))) != (origem, destino)
+                ]
+                if len(restantes) == len(arestas):
+                    raise OperacaoInvalida(f'Aresta {origem} -> {destino} não encontrada')
+                arestas = restantes
+                arestas_alteradas = True
+
+            else:
+                raise OperacaoInvalida(f'Operação desconhecida: {tipo}')
+        except OperacaoInvalida as e:
+            raise OperacaoInvalida(f'Operação {indice}: {e}')
+
+    return [nodo for nodo in nodos if nodo is not _REMOVIDO], arestas, nodos_alterados, arestas_alteradas
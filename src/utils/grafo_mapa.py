@@ -0,0 +1,191 @@
+"""
+Índice de adjacência dos mapas mentais
+
+Os nodos e arestas ({'from', 'to'}) de um mapa são interpretados uma única vez
+em um IndiceGrafo, guardado em cache pela chave (id do mapa, data_atualizacao):
+qualquer alteração do mapa muda a chave, e índices antigos saem do cache por
+LRU/TTL. Ids de nodos são comparados como texto.
+"""
+from collections import deque
+from src.utils.cache_resultados import CacheLRU
+
+_cache_indices = CacheLRU(capacidade=256, ttl_segundos=3600)
+
+
+def _chave(valor):
+    return str(valor)
+
+
+class IndiceGrafo:
+    def __init__(self, nodos, arestas):
+        self.nodos = {}
+        for nodo in nodos:
+            if isinstance(nodo, dict):
+                self.nodos[_chave(nodo.get('id'))] = nodo
+        self.arestas = []
+        self.arestas_invalidas = []
+        self.filhos = {chave: [] for chave in self.nodos}
+        self.pais = {chave: [] for chave in self.nodos}
+        for aresta in arestas:
+            if not isinstance(aresta, dict):
+                self.arestas_invalidas.append(aresta)
+                continue
+            origem, destino = _chave(aresta.get('from')), _chave(aresta.get('to'))
+            if origem not in self.nodos or destino not in self.nodos:
+                self.arestas_invalidas.append(aresta)
+                continue
+            self.arestas.append(aresta)
+            self.filhos[origem].append(destino)
+            self.pais[destino].append(origem)
+        self.raizes = [chave for chave, pais in self.pais.items() if not pais]
+        self._estatisticas = None
+
+    def nodos_em_ciclo(self):
+        """Nodos que participam de ciclos ou só são alcançáveis a partir deles (Kahn)"""
+        grau_entrada = {chave: len(pais) for chave, pais in self.pais.items()}
+        fila = deque(self.raizes)
+        visitados = 0
+        while fila:
+            chave = fila.popleft()
+            visitados += 1
+            for filho in self.filhos[chave]:
+                grau_entrada[filho] -= 1
+                if grau_entrada[filho] == 0:
+                    fila.append(filho)
+        if visitados == len(self.nodos):
+            return []
+        return [chave for chave, grau in grau_entrada.items() if grau > 0]
+
+    def orfaos(self):
+        """Nodos sem pai e sem filhos quando o mapa tem mais de um nodo"""
+        if len(self.nodos) < 2:
+            return []
+        return [chave for chave in self.raizes if not self.filhos[chave]]
+
+    def subarvore(self, raiz, profundidade=None):
+        """Nodos e arestas alcançáveis a partir de `raiz` até a profundidade informada"""
+        raiz = _chave(raiz)
+        niveis = {raiz: 0}
+        fila = deque([raiz])
+        arestas = []
+        while fila:
+            chave = fila.popleft()
+            if profundidade is not None and niveis[chave] >= profundidade:
+                continue
+            for filho in self.filhos[chave]:
+                arestas.append({'from': chave, 'to': filho})
+                if filho not in niveis:
+                    niveis[filho] = niveis[chave] + 1
+                    fila.append(filho)
+        return [self.nodos[chave] for chave in niveis], arestas
+
+    def caminho_ancestrais(self, nodo):
+        """Menor caminho de uma raiz até o nodo (lista de ids, raiz primeiro)"""
+        nodo = _chave(nodo)
+        anterior = {nodo: None}
+        fila = deque([nodo])
+        while fila:
+            chave = fila.popleft()
+            if not self.pais[chave]:
+                caminho = []
+                while chave is not None:
+                    caminho.append(chave)
+                    chave = anterior[chave]
+                return caminho
+            for pai in self.pais[chave]:
+                if pai not in anterior:
+                    anterior[pai] = chave
+                    fila.append(pai)
+        return None  # só alcançável por um ciclo, sem raiz
+
+    def estatisticas(self):
+        if self._estatisticas is None:
+            graus_saida = [len(filhos) for filhos in self.filhos.values()]
+            graus_entrada = [len(pais) for pais in self.pais.values()]
+            profundidade = {}
+            fila = deque((raiz, 0) for raiz in self.raizes)
+            while fila:
+                chave, nivel = fila.popleft()
+                if chave in profundidade:
+                    continue
+                profundidade[chave] = nivel
+                fila.extend((filho, nivel + 1) for filho in self.filhos[chave])
+            total = len(self.nodos)
+            self._estatisticas = {
+                'total_nodos': total,
+                'total_arestas': len(self.arestas),
+                'raizes': self.raizes,
+                'folhas': sum(1 for grau in graus_saida if grau == 0),
+                'grau_saida_maximo': max(graus_saida, default=0),
+                'grau_saida_medio': round(sum(graus_saida) / total, 2) if total else 0.0,
+                'grau_entrada_maximo': max(graus_entrada, default=0),
+                'profundidade_maxima': max(profundidade.values(), default=0),
+                'nodos_em_ciclo': self.nodos_em_ciclo(),
+                'orfaos': self.orfaos(),
+                'arestas_invalidas': len(self.arestas_invalidas)
+            }
+        return self._estatisticas
+
+
+def _problemas(indice):
+    """(arestas inválidas, nodos que estão de fato em ciclos) do índice
+
+    Descarta de nodos_em_ciclo os que apenas descendem de um ciclo, para que
+    pendurar um filho em um nodo de ciclo já existente não conte como ciclo novo.
+    """
+    invalidas = {
+        (_chave(aresta.get('from')), _chave(aresta.get('to'))) if isinstance(aresta, dict) else repr(aresta)
+        for aresta in indice.arestas_invalidas
+    }
+    em_ciclo = set(indice.nodos_em_ciclo())
+    grau_saida = {chave: sum(1 for filho in indice.filhos[chave] if filho in em_ciclo) for chave in em_ciclo}
+    fila = deque(chave for chave, grau in grau_saida.items() if grau == 0)
+    while fila:
+        chave = fila.popleft()
+        em_ciclo.discard(chave)
+        for pai in indice.pais[chave]:
+            if pai in em_ciclo:
+                grau_saida[pai] -= 1
+                if grau_saida[pai] == 0:
+                    fila.append(pai)
+    return invalidas, em_ciclo
+
+
+def validar_grafo(nodos, arestas, anterior=None):
+    """Valida a estrutura antes de gravar; retorna (erros, avisos)
+
+    Arestas para nodos inexistentes e ciclos são erros; nodos órfãos são apenas
+    avisos, já que o editor cria o nodo antes de ligá-lo. Com `anterior`
+    ((nodos, arestas) gravados), só problemas introduzidos pela alteração são
+    erros: os que o mapa já tinha viram avisos, e o mapa continua editável.
+    """
+    indice = IndiceGrafo(nodos, arestas)
+    invalidas, em_ciclo = _problemas(indice)
+    invalidas_antes, em_ciclo_antes = _problemas(IndiceGrafo(*anterior)) if anterior else (set(), set())
+
+    erros = []
+    avisos = []
+    novas_invalidas = invalidas - invalidas_antes
+    if novas_invalidas:
+        erros.append(f'{len(novas_invalidas)} aresta(s) com nodo inexistente')
+    if invalidas & invalidas_antes:
+        avisos.append(f'{len(invalidas & invalidas_antes)} aresta(s) com nodo inexistente já existentes no mapa')
+    novos_em_ciclo = sorted(em_ciclo - em_ciclo_antes)
+    if novos_em_ciclo:
+        erros.append(f'Ciclo envolvendo os nodos: {", ".join(novos_em_ciclo[:20])}')
+    if em_ciclo & em_ciclo_antes:
+        avisos.append(f'Ciclo já existente no mapa envolvendo os nodos: {", ".join(sorted(em_ciclo & em_ciclo_antes)[:20])}')
+    orfaos = indice.orfaos()
+    if orfaos:
+        avisos.append(f'Nodos órfãos: {", ".join(orfaos[:20])}')
+    return erros, avisos
+
+
+def obter_indice(mapa):
+    """Índice do mapa, reaproveitado enquanto data_atualizacao não mudar"""
+    chave = (mapa.id, mapa.data_atualizacao)
+    indice = _cache_indices.obter(chave)
+    if indice is None:
+        indice = IndiceGrafo(mapa.get_nodos(), mapa.get_arestas())
+        _cache_indices.guardar(chave, indice)
+    return indice
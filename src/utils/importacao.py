@@ -0,0 +1,101 @@
+"""
+Leitura incremental de registros JSON para importações em lote
+
+Aceita NDJSON (um objeto por linha) ou um array JSON, lendo o corpo da
+requisição em blocos para que a memória não cresça com o tamanho do arquivo.
+"""
+import codecs
+import io
+import json
+
+TAMANHO_BLOCO = 64 * 1024
+
+_decoder = json.JSONDecoder()
+_ESPACOS = ' \t\r\n'
+
+
+class RegistroInvalido(Exception):
+    """Erro de sintaxe em um registro"""
+
+
+def ler_ndjson(stream):
+    """Gera (linha, registro ou RegistroInvalido) para cada linha não vazia"""
+    # Streams brutos (como o do werkzeug) leem byte a byte em readline()
+    if isinstance(stream, io.RawIOBase):
+        stream = io.BufferedReader(stream, TAMANHO_BLOCO)
+    for numero, linha in enumerate(stream, start=1):
+        try:
+            texto = linha.decode('utf-8').strip()
+        except UnicodeDecodeError:
+            yield numero, RegistroInvalido('Linha não está em UTF-8')
+            continue
+        if not texto:
+            continue
+        try:
+            yield numero, json.loads(texto)
+        except json.JSONDecodeError as e:
+            yield numero, RegistroInvalido(f'JSON inválido: {e.msg}')
+
+
+def ler_array_json(stream):
+    """Gera (posição, registro ou RegistroInvalido) para cada elemento de um array JSON"""
+    decodificador = codecs.getincrementaldecoder('utf-8')()
+    buffer = ''
+    pos = 0
+    fim_stream = False
+
+    def ler_mais():
+        nonlocal buffer, pos, fim_stream
+        bloco = stream.read(TAMANHO_BLOCO)
+        if not bloco:
+            fim_stream = True
+            buffer = buffer[pos:] + decodificador.decode(b'', final=True)
+        else:
+            buffer = buffer[pos:] + decodificador.decode(bloco)
+        pos = 0
+
+    def proximo_caractere():
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in _ESPACOS:
+                pos += 1
+            if pos < len(buffer) or fim_stream:
+                return buffer[pos] if pos < len(buffer) else ''
+            ler_mais()
+
+    if proximo_caractere() != '[':
+        yield 1, RegistroInvalido('Esperado um array JSON')
+        return
+    pos += 1
+
+    posicao = 0
+    while True:
+        caractere = proximo_caractere()
+        if caractere == ']':
+            return
+        if posicao > 0:
+            if caractere != ',':
+                yield posicao + 1, RegistroInvalido('Esperado "," ou "]" entre registros')
+                return
+            pos += 1
+            proximo_caractere()
+
+        posicao += 1
+        while True:
+            try:
+                registro, pos = _decoder.raw_decode(buffer, pos)
+                break
+            except json.JSONDecodeError as e:
+                # Registro incompleto no buffer: ler mais antes de desistir
+                if fim_stream:
+                    yield posicao, RegistroInvalido(f'JSON inválido: {e.msg}')
+                    return
+                ler_mais()
+        yield posicao, registro
+
+
+def ler_registros(stream, content_type=''):
+    """Escolhe o leitor pelo Content-Type (application/json = array, demais = NDJSON)"""
+    if 'application/json' in (content_type or ''):
+        return ler_array_json(stream)
+    return ler_ndjson(stream)
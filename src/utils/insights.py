@@ -0,0 +1,214 @@
+"""
+Pré-cálculo dos insights de estudo de cada usuário
+
+As regras são avaliadas em SQL, de uma vez para toda uma faixa de usuários,
+sobre metrica_usuario junto com disciplina, e os 5 insights mais prioritários
+de cada usuário são gravados em insight_usuario. O job completo processa os
+usuários em faixas de id, opcionalmente em paralelo; alterações de métricas
+recalculam os usuários afetados na mesma transação (after_flush).
+
+Uso: python src/utils/insights.py [--faixa 1000] [--processos 1]
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+import argparse
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from sqlalchemy import bindparam, create_engine, event, inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from src.models.disciplina import Disciplina
+from src.models.metrica_usuario import MetricaUsuario
+
+MAX_INSIGHTS = 5
+TAMANHO_FAIXA = 1000
+
+# Uma linha por regra disparada; a ordem final é prioridade, métrica e regra,
+# a mesma da antiga geração por requisição
+_SQL_CANDIDATOS = """
+    SELECT m.usuario_id, m.disciplina_id, m.id AS metrica_id, 1 AS regra, 'alerta' AS tipo,
+           'Taxa de acertos baixa em ' || d.nome AS titulo,
+           'Sua taxa de acertos em ' || d.nome || ' está em ' || formatar_taxa(m.taxa_acertos)
+               || '%. Considere revisar o conteúdo.' AS descricao,
+           'Revisar mapas mentais' AS acao, 'alta' AS prioridade, 0 AS ordem
+    FROM metrica_usuario m JOIN disciplina d ON d.id = m.disciplina_id
+    WHERE {filtro} AND m.taxa_acertos < 60
+    UNION ALL
+    SELECT m.usuario_id, m.disciplina_id, m.id, 2, 'parabens',
+           'Excelente constância em ' || d.nome || '!',
+           'Você está há ' || m.dias_constancia || ' dias estudando ' || d.nome || ' consistentemente.',
+           'Continue assim!', 'baixa', 2
+    FROM metrica_usuario m JOIN disciplina d ON d.id = m.disciplina_id
+    WHERE {filtro} AND m.dias_constancia >= 7
+    UNION ALL
+    SELECT m.usuario_id, m.disciplina_id, m.id, 2, 'motivacao',
+           'Que tal estudar ' || d.nome || ' hoje?',
+           'Você não estuda ' || d.nome || ' há alguns dias. Uma sessão rápida pode ajudar!',
+           'Iniciar treinamento', 'media', 1
+    FROM metrica_usuario m JOIN disciplina d ON d.id = m.disciplina_id
+    WHERE {filtro} AND m.dias_constancia = 0
+    UNION ALL
+    SELECT m.usuario_id, m.disciplina_id, m.id, 3, 'sugestao',
+           'Aumente o tempo de estudo em ' || d.nome,
+           'Você estudou apenas ' || m.tempo_estudo_minutos || ' minutos de ' || d.nome
+               || '. Que tal dedicar mais tempo?',
+           'Criar plano de estudos', 'media', 1
+    FROM metrica_usuario m JOIN disciplina d ON d.id = m.disciplina_id
+    WHERE {filtro} AND m.tempo_estudo_minutos < 60
+"""
+
+_SQL_INSERIR = """
+    INSERT INTO insight_usuario
+        (usuario_id, posicao, disciplina_id, tipo, titulo, descricao, acao, prioridade, gerado_em)
+    SELECT usuario_id, posicao, disciplina_id, tipo, titulo, descricao, acao, prioridade, :gerado_em
+    FROM (
+        SELECT c.*, ROW_NUMBER() OVER (
+            PARTITION BY usuario_id ORDER BY ordem, metrica_id, regra
+        ) AS posicao
+        FROM ({candidatos}) c
+    )
+    WHERE posicao <= :maximo
+"""
+
+
+def _formatar_taxa(taxa):
+    return None if taxa is None else f'{taxa:.1f}'
+
+
+@event.listens_for(Engine, 'connect')
+def _registrar_funcoes(conexao_dbapi, registro):
+    # printf('%.1f') do SQLite arredonda o texto decimal (12.35 -> 12.4); a formatação
+    # do Python arredonda o valor binário (12.3), como fazia a geração por requisição
+    if isinstance(conexao_dbapi, sqlite3.Connection):
+        conexao_dbapi.create_function('formatar_taxa', 1, _formatar_taxa, deterministic=True)
+
+
+def _filtro(coluna, usuario_inicio, usuario_fim, usuario_ids):
+    if usuario_ids is not None:
+        return f'{coluna} IN :usuario_ids'
+    if usuario_inicio is not None:
+        return f'{coluna} BETWEEN :usuario_inicio AND :usuario_fim'
+    return '1 = 1'
+
+
+def recalcular_insights(conexao, usuario_inicio=None, usuario_fim=None, usuario_ids=None):
+    """Regrava os insights dos usuários de uma faixa de ids, de uma lista ou de todos
+
+    Retorna o número de insights gravados.
+    """
+    if usuario_ids is not None:
+        usuario_ids = list(usuario_ids)
+        if not usuario_ids:
+            return 0
+    parametros = {
+        'usuario_inicio': usuario_inicio, 'usuario_fim': usuario_fim,
+        'usuario_ids': usuario_ids, 'maximo': MAX_INSIGHTS, 'gerado_em': datetime.utcnow()
+    }
+
+    def comando(sql):
+        comando = text(sql)
+        if usuario_ids is not None:
+            comando = comando.bindparams(bindparam('usuario_ids', expanding=True))
+        return comando
+
+    conexao.execute(comando(
+        'DELETE FROM insight_usuario WHERE '
+        + _filtro('usuario_id', usuario_inicio, usuario_fim, usuario_ids)
+    ), parametros)
+    candidatos = _SQL_CANDIDATOS.format(filtro=_filtro('m.usuario_id', usuario_inicio, usuario_fim, usuario_ids))
+    return conexao.execute(comando(_SQL_INSERIR.format(candidatos=candidatos)), parametros).rowcount
+
+
+def _processar_faixa(url_banco, inicio, fim):
+    """Executado em processo separado: recalcula uma faixa com conexão própria"""
+    engine = create_engine(url_banco, connect_args={'timeout': 60})
+    try:
+        with engine.begin() as conexao:
+            usuarios = conexao.execute(
+                text('SELECT COUNT(*) FROM user WHERE id BETWEEN :inicio AND :fim'),
+                {'inicio': inicio, 'fim': fim}
+            ).scalar()
+            return usuarios, recalcular_insights(conexao, inicio, fim)
+    finally:
+        engine.dispose()
+
+
+def gerar_todos(url_banco, tamanho_faixa=TAMANHO_FAIXA, processos=1):
+    """Recalcula os insights de todos os usuários em faixas de id
+
+    Retorna (usuários, insights, segundos).
+    """
+    inicio_execucao = time.perf_counter()
+    engine = create_engine(url_banco)
+    with engine.connect() as conexao:
+        menor, maior = conexao.execute(text('SELECT MIN(id), MAX(id) FROM user')).one()
+    engine.dispose()
+
+    faixas = []
+    if menor is not None:
+        faixas = [(inicio, min(inicio + tamanho_faixa - 1, maior))
+                  for inicio in range(menor, maior + 1, tamanho_faixa)]
+
+    usuarios = insights = 0
+    if processos > 1 and len(faixas) > 1:
+        # No SQLite as escritas de cada faixa ainda são serializadas pelo lock do banco;
+        # o ganho vem da avaliação das consultas em paralelo
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            resultados = executor.map(_processar_faixa, *zip(*[(url_banco, a, b) for a, b in faixas]))
+            for faixa_usuarios, faixa_insights in resultados:
+                usuarios += faixa_usuarios
+                insights += faixa_insights
+    else:
+        for a, b in faixas:
+            faixa_usuarios, faixa_insights = _processar_faixa(url_banco, a, b)
+            usuarios += faixa_usuarios
+            insights += faixa_insights
+    return usuarios, insights, time.perf_counter() - inicio_execucao
+
+
+@event.listens_for(Session, 'after_flush')
+def _recalcular_afetados(session, flush_context):
+    usuarios = set()
+    disciplinas = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, MetricaUsuario):
+            usuarios.add(obj.usuario_id)
+        elif isinstance(obj, Disciplina) and obj not in session.new:
+            if obj in session.deleted or inspect(obj).attrs.nome.history.has_changes():
+                disciplinas.add(obj.id)
+    if not usuarios and not disciplinas:
+        return
+
+    conexao = session.connection()
+    if disciplinas:
+        usuarios.update(conexao.execute(
+            text('SELECT DISTINCT usuario_id FROM metrica_usuario WHERE disciplina_id IN :ids')
+            .bindparams(bindparam('ids', expanding=True)),
+            {'ids': list(disciplinas)}
+        ).scalars())
+    recalcular_insights(conexao, usuario_ids=usuarios)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--faixa', type=int, default=TAMANHO_FAIXA,
+                        help='usuários (por intervalo de id) em cada transação')
+    parser.add_argument('--processos', type=int, default=1,
+                        help='processos paralelos processando faixas distintas')
+    args = parser.parse_args()
+
+    from src.main import app
+
+    usuarios, insights, segundos = gerar_todos(
+        app.config['SQLALCHEMY_DATABASE_URI'], args.faixa, args.processos
+    )
+    taxa = usuarios / segundos if segundos else 0
+    print(f'{usuarios} usuários, {insights} insights em {segundos:.2f}s ({taxa:.0f} usuários/s)')
+
+
+if __name__ == '__main__':
+    main()
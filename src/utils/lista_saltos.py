@@ -0,0 +1,122 @@
+"""
+Lista ordenada indexável (skip list com larguras)
+
+Inserção, remoção, busca da posição de uma chave (bisect_left) e acesso por
+índice custam O(log n) esperado. Cada nodo guarda, por nível, quantos elementos
+do nível 0 existem até o próximo nodo daquele nível; somando essas larguras no
+caminho da busca obtém-se a posição sem percorrer a lista.
+"""
+import random
+
+NIVEL_MAXIMO = 24  # suficiente para ~16 milhões de chaves com p = 1/2
+
+
+class _Nodo:
+    __slots__ = ('chave', 'proximos', 'larguras')
+
+    def __init__(self, chave, nivel):
+        self.chave = chave
+        self.proximos = [None] * nivel
+        self.larguras = [1] * nivel
+
+
+class ListaSaltos:
+    """Sequência ordenada de chaves comparáveis (repetidas são permitidas)"""
+
+    def __init__(self, chaves=()):
+        self._cabeca = _Nodo(None, NIVEL_MAXIMO)
+        self._tamanho = 0
+        self._aleatorio = random.Random()
+        for chave in chaves:
+            self.inserir(chave)
+
+    def __len__(self):
+        return self._tamanho
+
+    def __iter__(self):
+        nodo = self._cabeca.proximos[0]
+        while nodo is not None:
+            yield nodo.chave
+            nodo = nodo.proximos[0]
+
+    def _sortear_nivel(self):
+        nivel = 1
+        while nivel < NIVEL_MAXIMO and self._aleatorio.random() < 0.5:
+            nivel += 1
+        return nivel
+
+    def _anteriores(self, chave):
+        """Último nodo com chave < `chave` em cada nível e sua posição (1 = primeiro elemento)"""
+        anteriores = [None] * NIVEL_MAXIMO
+        posicoes = [0] * NIVEL_MAXIMO
+        nodo = self._cabeca
+        posicao = 0
+        for nivel in reversed(range(NIVEL_MAXIMO)):
+            while nodo.proximos[nivel] is not None and nodo.proximos[nivel].chave < chave:
+                posicao += nodo.larguras[nivel]
+                nodo = nodo.proximos[nivel]
+            anteriores[nivel] = nodo
+            posicoes[nivel] = posicao
+        return anteriores, posicoes
+
+    def inserir(self, chave):
+        anteriores, posicoes = self._anteriores(chave)
+        novo = _Nodo(chave, self._sortear_nivel())
+        posicao_nova = posicoes[0] + 1
+        for nivel in range(len(novo.proximos)):
+            anterior = anteriores[nivel]
+            distancia = posicao_nova - posicoes[nivel]
+            novo.proximos[nivel] = anterior.proximos[nivel]
+            novo.larguras[nivel] = anterior.larguras[nivel] - distancia + 1
+            anterior.proximos[nivel] = novo
+            anterior.larguras[nivel] = distancia
+        for nivel in range(len(novo.proximos), NIVEL_MAXIMO):
+            anteriores[nivel].larguras[nivel] += 1
+        self._tamanho += 1
+
+    def remover(self, chave):
+        """Remove uma ocorrência de `chave`; ValueError se ela não existir"""
+        anteriores, _ = self._anteriores(chave)
+        alvo = anteriores[0].proximos[0]
+        if alvo is None or alvo.chave != chave:
+            raise ValueError(f'{chave!r} não está na lista')
+        for nivel in range(len(alvo.proximos)):
+            anteriores[nivel].larguras[nivel] += alvo.larguras[nivel] - 1
+            anteriores[nivel].proximos[nivel] = alvo.proximos[nivel]
+        for nivel in range(len(alvo.proximos), NIVEL_MAXIMO):
+            anteriores[nivel].larguras[nivel] -= 1
+        self._tamanho -= 1
+
+    def bisect_left(self, chave):
+        """Quantidade de chaves menores que `chave` (como bisect.bisect_left)"""
+        _, posicoes = self._anteriores(chave)
+        return posicoes[0]
+
+    def _nodo(self, indice):
+        restante = indice + 1
+        nodo = self._cabeca
+        for nivel in reversed(range(NIVEL_MAXIMO)):
+            while nodo.proximos[nivel] is not None and nodo.larguras[nivel] <= restante:
+                restante -= nodo.larguras[nivel]
+                nodo = nodo.proximos[nivel]
+        return nodo
+
+    def __getitem__(self, indice):
+        if indice < 0:
+            indice += self._tamanho
+        if not 0 <= indice < self._tamanho:
+            raise IndexError('índice fora da lista')
+        return self._nodo(indice).chave
+
+    def intervalo(self, inicio, fim):
+        """Chaves dos índices [inicio, fim): O(log n + fim - inicio)"""
+        inicio = max(inicio, 0)
+        fim = min(fim, self._tamanho)
+        if inicio >= fim:
+            return []
+        nodo = self._nodo(inicio)
+        chaves = []
+        for _ in range(fim - inicio):
+            chaves.append(nodo.chave)
+            nodo = nodo.proximos[0]
+        return chaves
@@ -0,0 +1,69 @@
+"""
+Comandos de manutenção do banco (backfills e reconstruções de dados derivados)
+
+Uso: python src/utils/manutencao.py <comando>
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+import argparse
+from sqlalchemy import text
+from src.utils.calibracao import recalcular_estatisticas
+from src.utils.codec_mapa import recomprimir_mapas
+from src.utils.miniaturas import gerar_pendentes as gerar_miniaturas_pendentes
+from src.utils.creditos import reconciliar_saldos
+
+
+def recalcular_contadores_sessoes(conexao):
+    """Recalcula respondidas/acertos de todas as sessões a partir de resposta_questao"""
+    resultado = conexao.execute(text(
+        'UPDATE sessao_treinamento SET '
+        'respondidas = (SELECT COUNT(*) FROM resposta_questao r '
+        'WHERE r.sessao_id = sessao_treinamento.id), '
+        'acertos = (SELECT COUNT(*) FROM resposta_questao r '
+        'WHERE r.sessao_id = sessao_treinamento.id AND r.correta = 1)'
+    ))
+    return resultado.rowcount
+
+
+def reconstruir_estudo_diario(conexao):
+    """Regera a tabela estudo_diario a partir do histórico de sessões finalizadas"""
+    conexao.execute(text('DELETE FROM estudo_diario'))
+    resultado = conexao.execute(text(
+        'INSERT INTO estudo_diario '
+        '(usuario_id, disciplina_id, dia, minutos, sessoes, respondidas, acertos) '
+        'SELECT usuario_id, COALESCE(disciplina_id, 0), date(data_fim), '
+        'SUM(tempo_total_segundos / 60), COUNT(*), '
+        'SUM(COALESCE(respondidas, 0)), SUM(COALESCE(acertos, 0)) '
+        'FROM sessao_treinamento WHERE finalizada = 1 AND data_fim IS NOT NULL '
+        'GROUP BY usuario_id, COALESCE(disciplina_id, 0), date(data_fim)'
+    ))
+    return resultado.rowcount
+
+
+COMANDOS = {
+    'contadores-sessao': (recalcular_contadores_sessoes, 'sessões atualizadas'),
+    'estudo-diario': (reconstruir_estudo_diario, 'linhas de estudo diário geradas'),
+    'estatisticas-questoes': (recalcular_estatisticas, 'questões calibradas'),
+    'recomprimir-mapas': (recomprimir_mapas, 'mapas convertidos para o formato comprimido'),
+    'miniaturas': (gerar_miniaturas_pendentes, 'miniaturas de mapas atualizadas'),
+    'reconciliar-creditos': (reconciliar_saldos, 'saldos corrigidos a partir do livro-razão'),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('comando', choices=sorted(COMANDOS))
+    args = parser.parse_args()
+
+    from src.main import app
+    from src.models.user import db
+
+    funcao, descricao = COMANDOS[args.comando]
+    with app.app_context(), db.engine.begin() as conexao:
+        print(f'{funcao(conexao)} {descricao}')
+
+
+if __name__ == '__main__':
+    main()
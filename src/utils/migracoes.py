@@ -0,0 +1,181 @@
+"""
+Migrações versionadas do esquema do banco
+
+db.create_all() só cria tabelas que ainda não existem, então mudanças em tabelas
+já existentes (índices, colunas, tabelas virtuais) ficam registradas aqui. Cada
+migração roda uma única vez, em sua própria transação, e as versões aplicadas
+ficam gravadas na tabela schema_versao. As migrações são executadas na
+inicialização da aplicação.
+
+Uso manual: python src/utils/migracoes.py
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from datetime import datetime
+from sqlalchemy import text
+from src.models.user import db
+from src.utils.busca import criar_tabelas as criar_tabelas_busca
+from src.utils.cache_http import criar_tabela as criar_tabela_versoes
+from src.utils.manutencao import recalcular_contadores_sessoes, reconstruir_estudo_diario
+from src.utils.insights import recalcular_insights
+
+MIGRACOES = []  # (versão, descrição, função que recebe a conexão)
+
+
+def migracao(versao, descricao):
+    """Registra uma função como migração de uma versão"""
+    def decorador(funcao):
+        MIGRACOES.append((versao, descricao, funcao))
+        return funcao
+    return decorador
+
+
+def _criar_indices(conexao, *nomes):
+    """Cria, se ainda não existirem, índices declarados nos modelos"""
+    indices = {
+        indice.name: indice
+        for tabela in db.metadata.tables.values()
+        for indice in tabela.indexes
+    }
+    for nome in nomes:
+        indices[nome].create(conexao, checkfirst=True)
+
+
+def _adicionar_colunas(conexao, tabela, *definicoes):
+    """Adiciona colunas ("nome TIPO DEFAULT ...") que ainda não existem na tabela"""
+    existentes = {linha[1] for linha in conexao.execute(text(f'PRAGMA table_info({tabela})'))}
+    for definicao in definicoes:
+        if definicao.split()[0] not in existentes:
+            conexao.execute(text(f'ALTER TABLE {tabela} ADD COLUMN {definicao}'))
+
+
+@migracao(1, 'Tabelas FTS5 de busca')
+def _tabelas_busca(conexao):
+    criar_tabelas_busca(conexao)
+
+
+@migracao(2, 'Índices compostos e parciais; métrica única por usuário e disciplina')
+def _indices_compostos(conexao):
+    # Mantém apenas a métrica mais recente de cada par antes de criar o índice único
+    conexao.execute(text(
+        'DELETE FROM metrica_usuario WHERE id NOT IN ('
+        'SELECT MAX(id) FROM metrica_usuario GROUP BY usuario_id, disciplina_id)'
+    ))
+    _criar_indices(
+        conexao,
+        'ix_questao_disciplina_ativo_dificuldade',
+        'ix_questao_ativas_data',
+        'ix_questao_ativas_disciplina_data',
+        'ix_mapa_mental_ativos_data',
+        'ix_mapa_mental_ativos_disciplina_data',
+        'ix_mapa_mental_ativos_autor_data',
+        'ix_resumo_ativos_disciplina_data',
+        'ix_sessao_usuario_finalizada_fim',
+        'ix_sessao_usuario_inicio',
+        'ix_resposta_sessao_questao',
+        'uq_metrica_usuario_disciplina',
+        'ix_user_data_cadastro',
+    )
+
+
+@migracao(3, 'Contadores de respostas e acertos em sessao_treinamento')
+def _contadores_sessao(conexao):
+    _adicionar_colunas(
+        conexao, 'sessao_treinamento',
+        'respondidas INTEGER DEFAULT 0',
+        'acertos INTEGER DEFAULT 0',
+    )
+    recalcular_contadores_sessoes(conexao)
+
+
+@migracao(4, 'Preenche estudo_diario com o histórico de sessões')
+def _estudo_diario(conexao):
+    # A tabela é criada pelo create_all; aqui só entra o histórico existente
+    reconstruir_estudo_diario(conexao)
+
+
+@migracao(5, 'Preenche insight_usuario para todos os usuários')
+def _insights(conexao):
+    recalcular_insights(conexao)
+
+
+@migracao(6, 'Contagem de nodos e arestas em mapa_mental')
+def _contagens_mapa(conexao):
+    _adicionar_colunas(
+        conexao, 'mapa_mental',
+        'total_nodos INTEGER DEFAULT 0',
+        'total_arestas INTEGER DEFAULT 0',
+    )
+    conexao.execute(text(
+        "UPDATE mapa_mental SET "
+        "total_nodos = CASE WHEN json_valid(nodos) AND json_type(nodos) = 'array' "
+        "THEN json_array_length(nodos) ELSE 0 END, "
+        "total_arestas = CASE WHEN json_valid(arestas) AND json_type(arestas) = 'array' "
+        "THEN json_array_length(arestas) ELSE 0 END"
+    ))
+
+
+@migracao(7, 'Versão dos mapas mentais (concorrência otimista)')
+def _versao_mapa(conexao):
+    _adicionar_colunas(conexao, 'mapa_mental', 'versao INTEGER NOT NULL DEFAULT 1')
+
+
+@migracao(8, 'Índice parcial para a listagem de resumos')
+def _indice_resumos(conexao):
+    _criar_indices(conexao, 'ix_resumo_ativos_data')
+
+
+@migracao(9, 'Lançamentos de saldo inicial no livro-razão de créditos')
+def _saldo_inicial_creditos(conexao):
+    # Saldos anteriores ao livro-razão viram um lançamento, para a reconciliação bater.
+    # Idempotente: dois processos iniciando juntos podem executar esta migração
+    conexao.execute(text(
+        "INSERT INTO lancamento_credito (usuario_id, valor, tipo, data_lancamento) "
+        "SELECT id, creditos, 'saldo_inicial', :agora FROM \"user\" "
+        "WHERE creditos IS NOT NULL AND creditos != 0 AND NOT EXISTS ("
+        "SELECT 1 FROM lancamento_credito l "
+        "WHERE l.usuario_id = \"user\".id AND l.tipo = 'saldo_inicial')"
+    ), {'agora': datetime.utcnow()})
+
+
+@migracao(10, 'Versões das tabelas de catálogo (ETags compartilhados entre workers)')
+def _versoes_catalogo(conexao):
+    criar_tabela_versoes(conexao)
+
+
+def aplicar_migracoes(engine):
+    """Aplica as migrações pendentes em ordem e retorna as versões aplicadas"""
+    with engine.begin() as conexao:
+        conexao.execute(text(
+            'CREATE TABLE IF NOT EXISTS schema_versao ('
+            'versao INTEGER PRIMARY KEY, descricao VARCHAR(200), aplicada_em DATETIME)'
+        ))
+        aplicadas = set(conexao.execute(text('SELECT versao FROM schema_versao')).scalars())
+
+    novas = []
+    for versao, descricao, funcao in sorted(MIGRACOES, key=lambda migracao: migracao[0]):
+        if versao in aplicadas:
+            continue
+        with engine.begin() as conexao:
+            funcao(conexao)
+            conexao.execute(
+                text('INSERT OR IGNORE INTO schema_versao (versao, descricao, aplicada_em) '
+                     'VALUES (:versao, :descricao, :aplicada_em)'),
+                {'versao': versao, 'descricao': descricao, 'aplicada_em': datetime.utcnow()}
+            )
+        novas.append(versao)
+    return novas
+
+
+if __name__ == '__main__':
+    from src.main import app
+    with app.app_context():
+        # A importação do app já aplica as pendentes; aqui apenas listamos o estado
+        aplicar_migracoes(db.engine)
+        with db.engine.connect() as conexao:
+            for versao, descricao, aplicada_em in conexao.execute(
+                text('SELECT versao, descricao, aplicada_em FROM schema_versao ORDER BY versao')
+            ):
+                print(f'{versao:>4}  {aplicada_em}  {descricao}')
@@ -0,0 +1,232 @@
+"""
+Miniaturas SVG dos mapas mentais, geradas em segundo plano
+
+Quando nodos ou arestas de um mapa mudam (após o commit), a renderização é
+agendada com um atraso: novas gravações do mesmo mapa dentro do intervalo
+reiniciam a contagem, então um autosave em rajada gera uma única miniatura.
+A renderização roda em um pool de threads e grava o arquivo em
+static/miniaturas/<hash>.svg, onde o hash é calculado sobre o conteúdo do mapa;
+mapas idênticos compartilham o arquivo. Em seguida thumbnail_url é preenchido,
+a menos que o autor tenha informado uma URL própria. A miniatura anterior é
+apagada quando nenhum outro mapa aponta para ela.
+"""
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from html import escape
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect, text
+from sqlalchemy.orm import Session
+from src.models.user import db
+from src.models.mapa_mental import MapaMental
+from src.utils.cache_http import marcar_alteracao
+
+DIRETORIO = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static', 'miniaturas')
+PREFIXO_URL = '/miniaturas/'
+
+# Alterar quando o desenho mudar, para não reaproveitar arquivos antigos
+VERSAO_RENDERIZADOR = 1
+LARGURA, ALTURA, MARGEM = 320, 200, 16
+MAX_NODOS_COM_TEXTO = 60
+ATRASO_SEGUNDOS = 3.0
+NOME_ARQUIVO = re.compile(r'[0-9a-f]{32}\.svg')
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='miniaturas')
+_lock = threading.Lock()
+_agendados = {}  # mapa_id -> threading.Timer
+
+
+def hash_conteudo(nodos, arestas):
+    conteudo = json.dumps([VERSAO_RENDERIZADOR, nodos, arestas], sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(conteudo.encode('utf-8')).hexdigest()[:32]
+
+
+def _numero(valor):
+    return valor if isinstance(valor, (int, float)) and not isinstance(valor, bool) else None
+
+
+def renderizar_svg(nodos, arestas):
+    """Desenha nodos (x, y, color, text) e arestas ({'from', 'to'}) ajustados à miniatura"""
+    posicoes = {}
+    for indice, nodo in enumerate(nodo for nodo in nodos if isinstance(nodo, dict)):
+        x, y = _numero(nodo.get('x')), _numero(nodo.get('y'))
+        if x is None or y is None:
+            x, y = (indice % 10) * 100, (indice // 10) * 100  # sem posição: grade
+        posicoes[str(nodo.get('id'))] = (x, y, nodo)
+
+    partes = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{LARGURA}" height="{ALTURA}" '
+        f'viewBox="0 0 {LARGURA} {ALTURA}">',
+        f'<rect width="{LARGURA}" height="{ALTURA}" fill="#ffffff"/>'
+    ]
+    if posicoes:
+        xs = [x for x, _, _ in posicoes.values()]
+        ys = [y for _, y, _ in posicoes.values()]
+        escala = min(
+            (LARGURA - 2 * MARGEM) / ((max(xs) - min(xs)) or 1),
+            (ALTURA - 2 * MARGEM) / ((max(ys) - min(ys)) or 1),
+            1.0
+        )
+        # Centraliza o desenho na área útil
+        deslocamento_x = (LARGURA - (max(xs) - min(xs)) * escala) / 2 - min(xs) * escala
+        deslocamento_y = (ALTURA - (max(ys) - min(ys)) * escala) / 2 - min(ys) * escala
+
+        def ponto(chave):
+            x, y, _ = posicoes[chave]
+            return round(x * escala + deslocamento_x, 1), round(y * escala + deslocamento_y, 1)
+
+        partes.append('<g stroke="#94A3B8" stroke-width="1">')
+        for aresta in arestas:
+            if not isinstance(aresta, dict):
+                continue
+            origem, destino = str(aresta.get('from')), str(aresta.get('to'))
+            if origem in posicoes and destino in posicoes:
+                (x1, y1), (x2, y2) = ponto(origem), ponto(destino)
+                partes.append(f'<line x1="{x1}" y1="{y1}" x2="{x2}" y2="{y2}"/>')
+        partes.append('</g>')
+
+        com_texto = len(posicoes) <= MAX_NODOS_COM_TEXTO
+        partes.append('<g font-family="sans-serif" font-size="8" text-anchor="middle">')
+        for chave, (_, _, nodo) in posicoes.items():
+            x, y = ponto(chave)
+            cor = escape(str(nodo.get('color') or '#06B6D4'), quote=True)
+            partes.append(f'<circle cx="{x}" cy="{y}" r="5" fill="{cor}"/>')
+            if com_texto and nodo.get('text'):
+                rotulo = str(nodo['text'])
+                rotulo = rotulo if len(rotulo) <= 18 else rotulo[:17] + '…'
+                partes.append(f'<text x="{x}" y="{y + 13}">{escape(rotulo)}</text>')
+        partes.append('</g>')
+    partes.append('</svg>')
+    return ''.join(partes)
+
+
+def _gravar_arquivo(nome, conteudo):
+    caminho = os.path.join(DIRETORIO, nome)
+    if os.path.exists(caminho):
+        return
+    os.makedirs(DIRETORIO, exist_ok=True)
+    # Escrita atômica: quem servir o arquivo nunca vê uma versão parcial
+    descritor, temporario = tempfile.mkstemp(dir=DIRETORIO, suffix='.tmp')
+    with os.fdopen(descritor, 'w', encoding='utf-8') as arquivo:
+        arquivo.write(conteudo)
+    os.replace(temporario, caminho)
+
+
+def gerar_miniatura(mapa):
+    """Renderiza (se preciso) a miniatura do mapa e retorna a URL, ou None se a URL for do autor"""
+    if mapa.thumbnail_url and not mapa.thumbnail_url.startswith(PREFIXO_URL):
+        return None
+    nodos, arestas = mapa.get_nodos(), mapa.get_arestas()
+    nome = f'{hash_conteudo(nodos, arestas)}.svg'
+    _gravar_arquivo(nome, renderizar_svg(nodos, arestas))
+    return PREFIXO_URL + nome
+
+
+def _atualizar_url(conexao, mapa_id, url):
+    # UPDATE direto: a miniatura não é uma edição do mapa (versao e data_atualizacao ficam como estão)
+    conexao.execute(
+        text('UPDATE mapa_mental SET thumbnail_url = :url WHERE id = :id'),
+        {'url': url, 'id': mapa_id}
+    )
+
+
+def _remover_se_orfa(conexao, url):
+    """Apaga o arquivo de uma miniatura gerada aqui que nenhum mapa usa mais"""
+    if not url or not url.startswith(PREFIXO_URL):
+        return
+    nome = url[len(PREFIXO_URL):]
+    # A URL pode ter sido informada pelo autor: só apaga nomes que este módulo gera
+    if not NOME_ARQUIVO.fullmatch(nome):
+        return
+    em_uso = conexao.execute(
+        text('SELECT 1 FROM mapa_mental WHERE thumbnail_url = :url LIMIT 1'), {'url': url}
+    ).first()
+    if em_uso is None:
+        try:
+            os.remove(os.path.join(DIRETORIO, nome))
+        except FileNotFoundError:
+            pass
+
+
+def _processar(app, mapa_id):
+    with app.app_context():
+        try:
+            mapa = db.session.get(MapaMental, mapa_id)
+            if mapa is None or not mapa.ativo:
+                return
+            anterior = mapa.thumbnail_url
+            url = gerar_miniatura(mapa)
+            if url and url != anterior:
+                _atualizar_url(db.session.connection(), mapa_id, url)
+                marcar_alteracao(db.session, 'mapa_mental')
+                db.session.commit()
+                _remover_se_orfa(db.session.connection(), anterior)
+        except Exception:
+            db.session.rollback()
+            app.logger.exception('Falha ao gerar miniatura do mapa %s', mapa_id)
+
+
+def _disparar(app, mapa_id):
+    with _lock:
+        _agendados.pop(mapa_id, None)
+    _executor.submit(_processar, app, mapa_id)
+
+
+def agendar(app, mapa_id, atraso=None):
+    """Agenda a miniatura do mapa, reiniciando o atraso se já houver uma pendente"""
+    with _lock:
+        pendente = _agendados.pop(mapa_id, None)
+        if pendente is not None:
+            pendente.cancel()
+        temporizador = threading.Timer(
+            ATRASO_SEGUNDOS if atraso is None else atraso, _disparar, args=(app, mapa_id)
+        )
+        temporizador.daemon = True
+        _agendados[mapa_id] = temporizador
+        temporizador.start()
+
+
+def gerar_pendentes(conexao):
+    """Gera de forma síncrona as miniaturas de mapas sem miniatura ou com miniatura desatualizada"""
+    atualizados = 0
+    anteriores = set()
+    with Session(bind=conexao) as sessao:
+        consulta = db.select(MapaMental).where(MapaMental.ativo == True)
+        for mapa in sessao.scalars(consulta.execution_options(yield_per=200)):
+            url = gerar_miniatura(mapa)
+            if url and url != mapa.thumbnail_url:
+                anteriores.add(mapa.thumbnail_url)
+                _atualizar_url(conexao, mapa.id, url)
+                atualizados += 1
+    for url in anteriores:
+        _remover_se_orfa(conexao, url)
+    return atualizados
+
+
+@event.listens_for(Session, 'after_flush')
+def _registrar_mapas_alterados(session, flush_context):
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, MapaMental):
+            continue
+        estado = inspect(obj)
+        if obj in session.new or any(estado.attrs[nome].history.has_changes() for nome in ('nodos', 'arestas')):
+            session.info.setdefault('miniaturas_pendentes', set()).add(obj.id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _agendar_miniaturas(session):
+    pendentes = session.info.pop('miniaturas_pendentes', None)
+    if not pendentes or not has_app_context():
+        return
+    app = current_app._get_current_object()
+    for mapa_id in pendentes:
+        agendar(app, mapa_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _descartar_miniaturas(session):
+    session.info.pop('miniaturas_pendentes', None)
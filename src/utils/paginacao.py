@@ -0,0 +1,71 @@
+"""
+Paginação por cursor (keyset) sobre (data de criação, id)
+
+O cursor é opaco para o cliente: codifica a data e o id do último item entregue,
+e a próxima página começa logo depois dele. Assim uma página profunda custa o
+mesmo que a primeira, sem OFFSET. Itens sem data (linhas antigas) vêm por último:
+no SQLite NULL é o menor valor, então fica no fim da ordem decrescente.
+"""
+import base64
+import json
+from datetime import datetime
+from flask import request
+from sqlalchemy import and_, or_
+
+LIMITE_PADRAO = 20
+LIMITE_MAXIMO = 100
+
+
+class CursorInvalido(ValueError):
+    pass
+
+
+def codificar_cursor(data, item_id):
+    bruto = json.dumps([data.isoformat() if data else None, item_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(bruto.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    try:
+        preenchimento = '=' * (-len(cursor) % 4)
+        data, item_id = json.loads(base64.urlsafe_b64decode(cursor + preenchimento))
+        return (None if data is None else datetime.fromisoformat(data)), int(item_id)
+    except (ValueError, TypeError):
+        raise CursorInvalido('Cursor inválido')
+
+
+def ler_parametros_paginacao():
+    """Lê cursor e limite da query string, aplicando o tamanho máximo de página"""
+    cursor = request.args.get('cursor') or None
+    limite = request.args.get('limite', type=int, default=LIMITE_PADRAO)
+    return cursor, min(max(limite, 1), LIMITE_MAXIMO)
+
+
+def paginar(query, coluna_data, coluna_id, cursor=None, limite=LIMITE_PADRAO):
+    """Retorna (itens, next_cursor) do mais recente para o mais antigo"""
+    def buscar(consulta, quantidade):
+        return consulta.order_by(coluna_data.desc(), coluna_id.desc()).limit(quantidade).all()
+
+    # Busca um item a mais só para saber se existe próxima página
+    if not cursor:
+        itens = buscar(query, limite + 1)
+    else:
+        data, item_id = decodificar_cursor(cursor)
+        if data is None:
+            itens = buscar(query.filter(coluna_data.is_(None), coluna_id < item_id), limite + 1)
+        else:
+            itens = buscar(query.filter(or_(
+                coluna_data < data,
+                and_(coluna_data == data, coluna_id < item_id)
+            )), limite + 1)
+            if len(itens) <= limite:
+                # Acabaram os itens com data: a página continua nos sem data. Consultas
+                # separadas, porque um "OR data IS NULL" faria o SQLite varrer o índice
+                itens += buscar(query.filter(coluna_data.is_(None)), limite + 1 - len(itens))
+
+    next_cursor = None
+    if len(itens) > limite:
+        itens = itens[:limite]
+        ultimo = itens[-1]
+        next_cursor = codificar_cursor(getattr(ultimo, coluna_data.key), getattr(ultimo, coluna_id.key))
+    return itens, next_cursor
@@ -0,0 +1,111 @@
+"""
+Mostra o EXPLAIN QUERY PLAN das consultas executadas por cada rota GET da API
+
+As rotas são chamadas com o cliente de teste do Flask sobre uma cópia temporária
+do banco (algumas rotas GET criam registros), capturando cada SELECT emitido.
+Linhas marcadas com "!!" indicam varredura completa de tabela, sem índice.
+
+Uso: python src/utils/plano_consultas.py [--apenas-scan]
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+import argparse
+import secrets
+import shutil
+import tempfile
+
+BANCO = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database', 'app.db')
+
+# Query strings extras por endpoint, para exercitar cada variação da rota
+VARIACOES = {
+    'questao.listar_questoes': ['', 'disciplina_id=1&dificuldade=medio', 'cursor=', 'disciplina_id=1&cursor='],
+    'questao.listar_questoes_por_disciplina': ['', 'cursor='],
+    'mapa_mental.listar_mapas': ['', 'disciplina_id=1', 'autor_id=1'],
+    'busca.buscar_conteudo': ['q=teste'],
+}
+
+
+def _varredura_completa(detalhe):
+    return detalhe.startswith('SCAN') and 'USING' not in detalhe and 'VIRTUAL TABLE' not in detalhe
+
+
+def _token_administrador(app, db):
+    """Cria (na cópia do banco) um administrador para as consultas e retorna um token dele"""
+    from src.models.user import User
+    from src.utils.autenticacao import gerar_token
+
+    with app.app_context():
+        admin = User(username='plano_consultas', email='plano_consultas@localhost', tipo_usuario='admin',
+                     senha_hash='!')
+        db.session.add(admin)
+        db.session.commit()
+        token, _ = gerar_token(admin)
+        db.session.remove()
+    return token
+
+
+def coletar_consultas(app, db):
+    """Executa as rotas GET e retorna {(rota, sql): parâmetros} na ordem de execução"""
+    from flask import url_for
+    from sqlalchemy import event
+
+    consultas = {}
+    rota_atual = [None]
+
+    def capturar(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith('SELECT'):
+            consultas.setdefault((rota_atual[0], statement), parameters)
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', capturar)
+
+    # Rotas protegidas respondem 401 sem token; um administrador alcança todas
+    cabecalho = {'Authorization': f'Bearer {_token_administrador(app, db)}'}
+    cliente = app.test_client()
+    for regra in sorted(app.url_map.iter_rules(), key=str):
+        if 'GET' not in regra.methods or not str(regra).startswith('/api'):
+            continue
+        with app.test_request_context():
+            url = url_for(regra.endpoint, **{argumento: 1 for argumento in regra.arguments})
+        for query_string in VARIACOES.get(regra.endpoint, ['']):
+            caminho = f'{url}?{query_string}' if query_string else url
+            rota_atual[0] = f'GET {caminho}'
+            cliente.get(caminho, headers=cabecalho)
+    return consultas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--apenas-scan', action='store_true',
+                        help='mostra apenas consultas com varredura completa de tabela')
+    args = parser.parse_args()
+
+    copia = os.path.join(tempfile.mkdtemp(), 'app.db')
+    if os.path.exists(BANCO):
+        shutil.copy(BANCO, copia)
+    os.environ['DATABASE_URL'] = f'sqlite:///{copia}'
+    # Os tokens emitidos aqui só valem para a cópia temporária
+    os.environ.setdefault('SECRET_KEY', secrets.token_hex(32))
+
+    from src.main import app
+    from src.models.user import db
+
+    consultas = coletar_consultas(app, db)
+    with app.app_context(), db.engine.connect() as conexao:
+        for (rota, sql), parametros in consultas.items():
+            plano = [linha[3] for linha in conexao.exec_driver_sql(f'EXPLAIN QUERY PLAN {sql}', parametros)]
+            if args.apenas_scan and not any(_varredura_completa(detalhe) for detalhe in plano):
+                continue
+            print(f'== {rota}')
+            print('   ' + ' '.join(sql.split()))
+            for detalhe in plano:
+                print(f'   {"!!" if _varredura_completa(detalhe) else "  "} {detalhe}')
+            print()
+
+    shutil.rmtree(os.path.dirname(copia), ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""
+Rankings de usuários por disciplina (taxa de acertos e tempo de estudo)
+
+Para cada disciplina e critério é mantida em memória uma lista de saltos com as
+chaves (-valor, usuario_id), além do valor atual de cada usuário. Posição, top-K,
+vizinhos e a atualização de um usuário custam O(log n); as alterações de
+MetricaUsuario são aplicadas incrementalmente após o commit, como na amostragem
+de questões. Os rankings são montados a partir da tabela na inicialização
+(reconstruir) e, depois disso, sob demanda por disciplina.
+
+Os eventos só enxergam commits do próprio processo: com vários workers, cada
+ranking é relido do banco quando expira, então alterações feitas em outro worker
+aparecem aqui em até VALIDADE_SEGUNDOS. No máximo MAX_RANKINGS disciplinas ficam
+em memória (as consultadas há mais tempo saem primeiro).
+"""
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from src.models.user import db
+from src.models.metrica_usuario import MetricaUsuario
+from src.utils.lista_saltos import ListaSaltos
+
+CRITERIOS = ('taxa_acertos', 'tempo_estudo_minutos')
+MAX_RANKINGS = 256
+VALIDADE_SEGUNDOS = 60
+
+_lock = threading.RLock()
+_rankings = OrderedDict()  # disciplina_id -> (carregado em, {criterio: (chaves, {usuario_id: valor})})
+
+
+def _novo_ranking():
+    return {criterio: (ListaSaltos(), {}) for criterio in CRITERIOS}
+
+
+def _inserir(ranking, usuario_id, valores):
+    for criterio, valor in zip(CRITERIOS, valores):
+        chaves, por_usuario = ranking[criterio]
+        anterior = por_usuario.pop(usuario_id, None)
+        if anterior is not None:
+            chaves.remover((-anterior, usuario_id))
+        if valor is not None:
+            chaves.inserir((-valor, usuario_id))
+            por_usuario[usuario_id] = valor
+
+
+def _consulta_metricas():
+    return db.select(
+        MetricaUsuario.disciplina_id, MetricaUsuario.usuario_id,
+        *[getattr(MetricaUsuario, criterio) for criterio in CRITERIOS]
+    )
+
+
+def _montar(linhas):
+    rankings = {}
+    for disciplina_id, usuario_id, *valores in linhas:
+        ranking = rankings.setdefault(disciplina_id, _novo_ranking())
+        _inserir(ranking, usuario_id, [valor or 0 for valor in valores])
+    return rankings
+
+
+def _guardar(disciplina_id, ranking, carregado_em):
+    _rankings[disciplina_id] = (carregado_em, ranking)
+    _rankings.move_to_end(disciplina_id)
+    while len(_rankings) > MAX_RANKINGS:
+        _rankings.popitem(last=False)
+
+
+def reconstruir():
+    """Remonta todos os rankings a partir de metrica_usuario"""
+    with _lock:
+        _rankings.clear()
+        agora = time.monotonic()
+        for disciplina_id, ranking in _montar(db.session.execute(_consulta_metricas())).items():
+            _guardar(disciplina_id, ranking, agora)
+
+
+def invalidar():
+    """Descarta os rankings (usar após escritas feitas fora do ORM)"""
+    with _lock:
+        _rankings.clear()
+
+
+def _obter_ranking(disciplina_id, criterio):
+    with _lock:
+        # Carregado sob o lock para não perder alterações aplicadas durante a leitura
+        entrada = _rankings.get(disciplina_id)
+        if entrada is None or time.monotonic() - entrada[0] > VALIDADE_SEGUNDOS:
+            linhas = db.session.execute(
+                _consulta_metricas().where(MetricaUsuario.disciplina_id == disciplina_id)
+            )
+            _guardar(disciplina_id, _montar(linhas).get(disciplina_id, _novo_ranking()), time.monotonic())
+        else:
+            _rankings.move_to_end(disciplina_id)
+        return _rankings[disciplina_id][1][criterio]
+
+
+def _itens(chaves, inicio, fim):
+    # Empates dividem a mesma posição (1, 2, 2, 4...)
+    return [
+        {'posicao': chaves.bisect_left((valor,)) + 1, 'usuario_id': usuario_id, 'valor': -valor}
+        for valor, usuario_id in chaves.intervalo(inicio, fim)
+    ]
+
+
+def top(disciplina_id, criterio, limite=10):
+    """Os `limite` primeiros colocados da disciplina"""
+    with _lock:
+        chaves, _ = _obter_ranking(disciplina_id, criterio)
+        return _itens(chaves, 0, limite)
+
+
+def posicao_usuario(disciplina_id, criterio, usuario_id, vizinhos=2):
+    """Posição do usuário e os `vizinhos` colocados imediatamente acima e abaixo
+
+    Retorna None se o usuário não tem métrica na disciplina.
+    """
+    with _lock:
+        chaves, por_usuario = _obter_ranking(disciplina_id, criterio)
+        if usuario_id not in por_usuario:
+            return None
+        indice = chaves.bisect_left((-por_usuario[usuario_id], usuario_id))
+        return {
+            **_itens(chaves, indice, indice + 1)[0],
+            'total': len(chaves),
+            'vizinhos': _itens(chaves, indice - vizinhos, indice + vizinhos + 1)
+        }
+
+
+@event.listens_for(Session, 'after_flush')
+def _registrar_metricas_alteradas(session, flush_context):
+    alteracoes = session.info.setdefault('metricas_alteradas', {})
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, MetricaUsuario):
+            alteracoes[(obj.disciplina_id, obj.usuario_id)] = tuple(
+                getattr(obj, criterio) or 0 for criterio in CRITERIOS
+            )
+    for obj in session.deleted:
+        if isinstance(obj, MetricaUsuario):
+            alteracoes[(obj.disciplina_id, obj.usuario_id)] = (None,) * len(CRITERIOS)
+
+
+@event.listens_for(Session, 'after_commit')
+def _atualizar_rankings(session):
+    alteracoes = session.info.pop('metricas_alteradas', None)
+    if not alteracoes:
+        return
+    with _lock:
+        for (disciplina_id, usuario_id), valores in alteracoes.items():
+            # Disciplinas ainda não carregadas serão lidas do banco quando consultadas
+            if disciplina_id in _rankings:
+                _inserir(_rankings[disciplina_id][1], usuario_id, valores)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _descartar_metricas_alteradas(session):
+    session.info.pop('metricas_alteradas', None)
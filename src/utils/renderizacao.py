@@ -0,0 +1,216 @@
+"""
+Renderização do conteúdo dos resumos (Markdown com HTML embutido) para HTML seguro
+
+Implementa o subconjunto de Markdown usado nos resumos (títulos, parágrafos,
+listas, citações, blocos de código, ênfase, código e links). O HTML resultante,
+incluindo o que o autor escreveu diretamente, passa por uma lista de tags e
+atributos permitidos. O resultado fica em cache pela hash do conteúdo, então
+um resumo lido muitas vezes é renderizado uma única vez por processo.
+"""
+import hashlib
+import re
+import unicodedata
+from html import escape
+from html.parser import HTMLParser
+from src.utils.cache_resultados import CacheLRU
+
+# Alterar quando a renderização mudar, para não servir HTML antigo do cache
+VERSAO_RENDERIZADOR = 2
+
+_cache_html = CacheLRU(capacidade=512, ttl_segundos=24 * 3600)
+
+TAGS_PERMITIDAS = {
+    'p', 'br', 'hr', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'strong', 'b', 'em', 'i', 'u',
+    'code', 'pre', 'blockquote', 'ul', 'ol', 'li', 'a', 'img', 'table', 'thead', 'tbody',
+    'tr', 'th', 'td', 'span', 'div', 'sub', 'sup', 'mark',
+}
+TAGS_VAZIAS = {'br', 'hr', 'img'}
+ATRIBUTOS_PERMITIDOS = {'a': {'href', 'title'}, 'img': {'src', 'alt', 'title'}}
+# Conteúdo descartado junto com a tag
+TAGS_REMOVIDAS = {'script', 'style', 'iframe', 'object', 'embed', 'template'}
+_ESQUEMAS_SEGUROS = ('http:', 'https:', 'mailto:')
+
+
+# Os navegadores descartam espaços ASCII e caracteres de controle C0 ao ler uma URL,
+# então "java&#9;script:" ainda é javascript: e precisa ser comparado sem eles
+_IGNORADOS_EM_URL = re.compile(r'[\x00-\x20\x7f]+')
+
+
+def _url_segura(url):
+    url = _IGNORADOS_EM_URL.sub('', unicodedata.normalize('NFKC', url))
+    esquema = re.match(r'^[a-zA-Z][a-zA-Z0-9+.-]*:', url)
+    return not esquema or esquema.group(0).lower() in _ESQUEMAS_SEGUROS
+
+
+class _Sanitizador(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.saida = []
+        self.abertas = []
+        self.ignorando = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in TAGS_REMOVIDAS:
+            self.ignorando += 1
+            return
+        if self.ignorando or tag not in TAGS_PERMITIDAS:
+            return
+        atributos = ''
+        for nome, valor in attrs:
+            if nome in ATRIBUTOS_PERMITIDOS.get(tag, ()) and valor is not None:
+                if nome in ('href', 'src') and not _url_segura(valor):
+                    continue
+                atributos += f' {nome}="{escape(valor, quote=True)}"'
+        if tag == 'a':
+            atributos += ' rel="nofollow noopener"'
+        self.saida.append(f'<{tag}{atributos}>')
+        if tag not in TAGS_VAZIAS:
+            self.abertas.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in TAGS_VAZIAS and self.abertas and self.abertas[-1] == tag:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in TAGS_REMOVIDAS:
+            self.ignorando = max(self.ignorando - 1, 0)
+            return
+        if self.ignorando or tag not in self.abertas:
+            return
+        # Fecha também as tags internas deixadas abertas
+        while self.abertas:
+            aberta = self.abertas.pop()
+            self.saida.append(f'</{aberta}>')
+            if aberta == tag:
+                break
+
+    def handle_data(self, data):
+        if not self.ignorando:
+            self.saida.append(escape(data, quote=False))
+
+    def resultado(self):
+        self.close()
+        return ''.join(self.saida) + ''.join(f'</{tag}>' for tag in reversed(self.abertas))
+
+
+def sanitizar_html(html):
+    sanitizador = _Sanitizador()
+    sanitizador.feed(html)
+    return sanitizador.resultado()
+
+
+_INLINE = [
+    (re.compile(r'\*\*(.+?)\*\*'), r'<strong>\1</strong>'),
+    (re.compile(r'__(.+?)__'), r'<strong>\1</strong>'),
+    (re.compile(r'(?<![\w*])\*(?!\s)(.+?)(?<!\s)\*(?![\w*])'), r'<em>\1</em>'),
+    (re.compile(r'(?<!\w)_(?!\s)(.+?)(?<!\s)_(?!\w)'), r'<em>\1</em>'),
+    (re.compile(r'!\[([^\]]*)\]\(([^)\s]+)\)'), r'<img src="\2" alt="\1">'),
+    (re.compile(r'\[([^\]]+)\]\(([^)\s]+)\)'), r'<a href="\2">\1</a>'),
+]
+_CODIGO_INLINE = re.compile(r'`([^`]+)`')
+
+
+def _inline(texto):
+    # Trechos de código são protegidos das demais regras
+    partes = _CODIGO_INLINE.split(texto)
+    for indice in range(0, len(partes), 2):
+        for padrao, substituto in _INLINE:
+            partes[indice] = padrao.sub(substituto, partes[indice])
+    for indice in range(1, len(partes), 2):
+        partes[indice] = f'<code>{escape(partes[indice], quote=False)}</code>'
+    return ''.join(partes)
+
+
+_TITULO = re.compile(r'^(#{1,6})\s+(.*?)\s*#*\s*$')
+_ITEM_NAO_ORDENADO = re.compile(r'^\s*[-*+]\s+(.*)$')
+_ITEM_ORDENADO = re.compile(r'^\s*\d+[.)]\s+(.*)$')
+_REGRA = re.compile(r'^\s*([-*_])(\s*\1){2,}\s*$')
+
+
+def markdown_para_html(texto):
+    """Converte o subconjunto de Markdown dos resumos; HTML embutido é mantido como está"""
+    linhas = texto.replace('\r\n', '\n').split('\n')
+    saida = []
+    paragrafo = []
+    lista = None  # (tag, itens)
+
+    def fechar_paragrafo():
+        if paragrafo:
+            saida.append(f'<p>{_inline(" ".join(paragrafo))}</p>')
+            paragrafo.clear()
+
+    def fechar_lista():
+        nonlocal lista
+        if lista:
+            tag, itens = lista
+            saida.append(f'<{tag}>' + ''.join(f'<li>{_inline(item)}</li>' for item in itens) + f'</{tag}>')
+            lista = None
+
+    indice = 0
+    while indice < len(linhas):
+        linha = linhas[indice]
+        if linha.lstrip().startswith('```'):
+            fechar_paragrafo()
+            fechar_lista()
+            codigo = []
+            indice += 1
+            while indice < len(linhas) and not linhas[indice].lstrip().startswith('```'):
+                codigo.append(linhas[indice])
+                indice += 1
+            saida.append(f'<pre><code>{escape(chr(10).join(codigo), quote=False)}</code></pre>')
+        elif not linha.strip():
+            fechar_paragrafo()
+            fechar_lista()
+        elif _REGRA.match(linha):
+            fechar_paragrafo()
+            fechar_lista()
+            saida.append('<hr>')
+        elif _TITULO.match(linha):
+            fechar_paragrafo()
+            fechar_lista()
+            marcadores, titulo = _TITULO.match(linha).groups()
+            saida.append(f'<h{len(marcadores)}>{_inline(titulo)}</h{len(marcadores)}>')
+        elif _ITEM_NAO_ORDENADO.match(linha) or _ITEM_ORDENADO.match(linha):
+            fechar_paragrafo()
+            ordenado = _ITEM_ORDENADO.match(linha)
+            tag = 'ol' if ordenado else 'ul'
+            if lista and lista[0] != tag:
+                fechar_lista()
+            if not lista:
+                lista = (tag, [])
+            lista[1].append((ordenado or _ITEM_NAO_ORDENADO.match(linha)).group(1))
+        elif linha.startswith('>'):
+            fechar_paragrafo()
+            fechar_lista()
+            citacao = []
+            while indice < len(linhas) and linhas[indice].startswith('>'):
+                citacao.append(linhas[indice][1:].strip())
+                indice += 1
+            saida.append(f'<blockquote>{markdown_para_html(chr(10).join(citacao))}</blockquote>')
+            continue
+        else:
+            fechar_lista()
+            paragrafo.append(linha.strip())
+        indice += 1
+    fechar_paragrafo()
+    fechar_lista()
+    return '\n'.join(saida)
+
+
+def hash_conteudo(conteudo):
+    return hashlib.sha256(f'{VERSAO_RENDERIZADOR}:{conteudo}'.encode('utf-8')).hexdigest()
+
+
+def renderizar(conteudo):
+    """HTML seguro do conteúdo, a partir do cache quando o mesmo conteúdo já foi renderizado"""
+    chave = hash_conteudo(conteudo or '')
+    html = _cache_html.obter(chave)
+    if html is None:
+        html = sanitizar_html(markdown_para_html(conteudo or ''))
+        _cache_html.guardar(chave, html)
+    return html
+
+
+def estatisticas_cache():
+    return _cache_html.estatisticas()
@@ -18,11 +18,12 @@ def criar_dados_exemplo():
     usuario = User(
         username='professor_joao',
         email='joao@exemplo.com',
-        creditos=100.0,
         tipo_usuario='professor'
     )
     usuario.set_password('123456')
     db.session.add(usuario)
+    db.session.flush()
+    usuario.creditar_creditos(100.0, tipo='saldo_inicial')
     
     # Criar disciplinas
     disciplinas_data = [
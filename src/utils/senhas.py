@@ -0,0 +1,119 @@
+"""
+Hash de senhas fora da thread da requisição
+
+O scrypt do werkzeug custa dezenas de milissegundos de CPU com o GIL preso; aqui
+o cálculo roda em um pool de processos. Cada processo da aplicação aceita no
+máximo SENHA_MAX_PENDENTES cálculos simultâneos (em execução ou na fila do
+pool); acima disso HashSobrecarregado é levantada e as rotas respondem 429.
+Se um processo do pool morrer, o pool é recriado e a operação repetida uma vez;
+se falhar de novo, HashIndisponivel é levantada (503). Os processos partem de
+um forkserver, e não de um fork do servidor, que tem outras threads rodando.
+
+Configuração (app.config):
+    SENHA_METODO_HASH      método do werkzeug, ex.: 'scrypt:32768:8:1'
+    SENHA_PROCESSOS        processos do pool (padrão: número de CPUs)
+    SENHA_MAX_PENDENTES    cálculos simultâneos antes de recusar (padrão: 4 por processo)
+    SENHA_ESPERA_SEGUNDOS  quanto esperar por uma vaga antes de recusar (padrão: 0)
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from flask import current_app, has_app_context
+from werkzeug.security import check_password_hash, generate_password_hash
+
+METODO_PADRAO = 'scrypt:32768:8:1'
+PENDENTES_POR_PROCESSO = 4
+
+
+class HashSobrecarregado(Exception):
+    pass
+
+
+class HashIndisponivel(Exception):
+    pass
+
+
+_lock = threading.Lock()
+_pool = {'executor': None, 'vagas': None, 'processos': None}
+
+
+def _config(chave, padrao):
+    if has_app_context():
+        return current_app.config.get(chave, padrao)
+    return padrao
+
+
+def metodo_atual():
+    return _config('SENHA_METODO_HASH', METODO_PADRAO)
+
+
+def _executor():
+    """Cria o pool na primeira utilização, com a configuração da aplicação"""
+    if _pool['executor'] is None:
+        with _lock:
+            if _pool['executor'] is None:
+                processos = _config('SENHA_PROCESSOS', None) or os.cpu_count() or 1
+                pendentes = _config('SENHA_MAX_PENDENTES', None) or processos * PENDENTES_POR_PROCESSO
+                _pool['vagas'] = threading.BoundedSemaphore(pendentes)
+                _pool['processos'] = processos
+                _pool['executor'] = _novo_executor(processos)
+    return _pool['executor']
+
+
+def _novo_executor(processos):
+    return ProcessPoolExecutor(max_workers=processos, mp_context=multiprocessing.get_context('forkserver'))
+
+
+def _recriar(quebrado):
+    """Troca o pool quebrado por um novo (uma única vez, se várias threads perceberem juntas)"""
+    with _lock:
+        if _pool['executor'] is quebrado:
+            quebrado.shutdown(wait=False, cancel_futures=True)
+            _pool['executor'] = _novo_executor(_pool['processos'])
+    return _pool['executor']
+
+
+def _executar(funcao, *args):
+    executor = _executor()
+    espera = _config('SENHA_ESPERA_SEGUNDOS', 0)
+    obtida = _pool['vagas'].acquire(timeout=espera) if espera else _pool['vagas'].acquire(blocking=False)
+    if not obtida:
+        raise HashSobrecarregado('Muitas operações de senha em andamento, tente novamente em instantes')
+    try:
+        try:
+            return executor.submit(funcao, *args).result()
+        except BrokenProcessPool:
+            executor = _recriar(executor)
+        try:
+            return executor.submit(funcao, *args).result()
+        except BrokenProcessPool:
+            _recriar(executor)
+            raise HashIndisponivel('Serviço de senhas indisponível, tente novamente em instantes')
+    finally:
+        _pool['vagas'].release()
+
+
+def precisa_rehash(senha_hash, metodo):
+    """Indica se o hash foi gerado com parâmetros diferentes dos atuais"""
+    return senha_hash.split('$', 1)[0] != metodo
+
+
+def _verificar(senha_hash, senha, metodo):
+    # Roda no processo do pool: verifica e, se necessário, já gera o hash atualizado
+    if not check_password_hash(senha_hash, senha):
+        return False, None
+    if precisa_rehash(senha_hash, metodo):
+        return True, generate_password_hash(senha, method=metodo)
+    return True, None
+
+
+def gerar_hash(senha):
+    """Gera o hash da senha com o método configurado"""
+    return _executar(generate_password_hash, senha, metodo_atual())
+
+
+def verificar_hash(senha_hash, senha):
+    """Retorna (senha correta, novo hash ou None); o novo hash vem quando os parâmetros mudaram"""
+    return _executar(_verificar, senha_hash, senha, metodo_atual())
@@ -0,0 +1,74 @@
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+# O app configura o banco ao ser importado: aponta para um arquivo temporário antes disso
+_diretorio = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_diretorio, 'teste.db')}"
+os.environ['SECRET_KEY'] = 'chave-dos-testes'
+
+import pytest
+from src.main import app as aplicacao
+from src.models.user import db, User
+from src.utils import amostragem, autenticacao, busca, miniaturas, ranking
+from src.utils.autenticacao import gerar_token
+from src.utils.cache_resultados import invalidar_metricas
+
+# Hash barato nos testes; o pool de processos continua sendo usado
+aplicacao.config['SENHA_METODO_HASH'] = 'pbkdf2:sha256:1000'
+aplicacao.config['TESTING'] = True
+# Miniaturas geradas nos testes não vão para src/static
+miniaturas.DIRETORIO = os.path.join(_diretorio, 'miniaturas')
+
+
+@pytest.fixture
+def app():
+    yield aplicacao
+    with miniaturas._lock:
+        for temporizador in miniaturas._agendados.values():
+            temporizador.cancel()
+        miniaturas._agendados.clear()
+    with aplicacao.app_context():
+        db.session.remove()
+        with db.engine.begin() as conexao:
+            for tabela in reversed(db.metadata.sorted_tables):
+                conexao.execute(tabela.delete())
+            # Tabelas FTS5 não fazem parte do metadata
+            for tabela, _, _ in busca.TIPOS.values():
+                conexao.execute(db.text(f'DELETE FROM {tabela}'))
+    # Os ids são reaproveitados entre testes: nada em memória pode sobreviver ao banco
+    autenticacao._revogados.clear()
+    autenticacao._revogados_usuario.clear()
+    autenticacao._estado.update(ultimo_id=0, proxima_sincronizacao=0.0)
+    invalidar_metricas()
+    amostragem.invalidar()
+    ranking.invalidar()
+
+
+@pytest.fixture
+def cliente(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def criar_usuario(app):
+    """Cria um usuário e retorna (id, cabeçalho Authorization com um token dele)"""
+    contador = [0]
+
+    def criar(tipo_usuario='estudante', creditos=0.0, senha='senha'):
+        contador[0] += 1
+        with app.app_context():
+            usuario = User(
+                username=f'usuario{contador[0]}',
+                email=f'usuario{contador[0]}@exemplo.com',
+                tipo_usuario=tipo_usuario,
+                creditos=creditos
+            )
+            usuario.set_password(senha)
+            db.session.add(usuario)
+            db.session.commit()
+            token, _ = gerar_token(usuario)
+            return usuario.id, {'Authorization': f'Bearer {token}'}
+    return criar
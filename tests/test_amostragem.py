@@ -0,0 +1,66 @@
+import pytest
+from src.models.user import db
+from src.models.disciplina import Disciplina
+from src.models.questao import Questao
+from src.utils import amostragem
+
+
+@pytest.fixture
+def questoes(app, criar_usuario):
+    autor_id, _ = criar_usuario()
+    with app.app_context():
+        disciplina = Disciplina(nome='História')
+        db.session.add(disciplina)
+        db.session.flush()
+        itens = [
+            Questao(disciplina_id=disciplina.id, texto_questao=f'Questão {i}', alternativas='["a"]',
+                    resposta_correta=0, dificuldade='facil' if i % 2 else 'dificil', autor_id=autor_id)
+            for i in range(10)
+        ]
+        db.session.add_all(itens)
+        db.session.commit()
+        return disciplina.id, [questao.id for questao in itens]
+
+
+def test_mesma_seed_mesma_amostra(app, questoes):
+    disciplina_id, ids = questoes
+    with app.app_context():
+        primeira = amostragem.amostrar_questoes(5, disciplina_id, seed=42)
+        assert primeira == amostragem.amostrar_questoes(5, disciplina_id, seed=42)
+        assert set(primeira) <= set(ids)
+
+
+def test_numero_de_indices_e_limitado(app, questoes, monkeypatch):
+    monkeypatch.setattr(amostragem, 'MAX_INDICES', 3)
+    with app.app_context():
+        for i in range(10):
+            amostragem.amostrar_questoes(1, dificuldade=f'inexistente{i}')
+    assert len(amostragem._indices) == 3
+
+
+def test_indice_expirado_e_recarregado(app, questoes, monkeypatch):
+    disciplina_id, ids = questoes
+    with app.app_context():
+        assert len(amostragem.amostrar_questoes(100, disciplina_id)) == 10
+        # Escrita fora dos eventos desta sessão, como a de outro worker
+        db.session.execute(db.text('UPDATE questao SET ativo = 0 WHERE id = :id'), {'id': ids[0]})
+        db.session.commit()
+        assert len(amostragem.amostrar_questoes(100, disciplina_id)) == 10
+        monkeypatch.setattr(amostragem, 'VALIDADE_SEGUNDOS', -1)
+        assert len(amostragem.amostrar_questoes(100, disciplina_id)) == 9
+
+
+def test_rota_nao_serve_questao_desativada_com_indice_atrasado(app, cliente, questoes):
+    disciplina_id, ids = questoes
+    assert len(cliente.get(f'/api/questoes?disciplina_id={disciplina_id}&limite=100').json) == 10
+    with app.app_context():
+        # Desativada por outro worker: o índice deste processo ainda contém a questão
+        db.session.execute(db.text('UPDATE questao SET ativo = 0 WHERE id = :id'), {'id': ids[0]})
+        db.session.execute(db.text("UPDATE questao SET dificuldade = 'medio' WHERE id = :id"), {'id': ids[1]})
+        db.session.commit()
+        assert ids[0] in amostragem.amostrar_questoes(100, disciplina_id)
+
+    servidas = {q['id'] for q in cliente.get(f'/api/questoes?disciplina_id={disciplina_id}&limite=100').json}
+    assert servidas == set(ids[1:])
+    facil = cliente.get(f'/api/disciplinas/{disciplina_id}/questoes?dificuldade=facil&limite=100').json
+    assert {q['id'] for q in facil} == {i for n, i in enumerate(ids) if n % 2 and n > 1}
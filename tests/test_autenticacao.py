@@ -0,0 +1,106 @@
+import os
+import subprocess
+import sys
+import time
+import pytest
+from src.models.user import db
+from src.utils import autenticacao
+
+
+@pytest.fixture
+def fuso_tokyo(monkeypatch):
+    # Um fuso diferente de UTC expõe timestamps calculados a partir de datetimes ingênuos
+    monkeypatch.setenv('TZ', 'Asia/Tokyo')
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def _esquecer_revogacoes_em_memoria():
+    """Simula outro processo: a lista de revogação só pode vir do banco"""
+    autenticacao._revogados.clear()
+    autenticacao._revogados_usuario.clear()
+    autenticacao._estado.update(ultimo_id=0, proxima_sincronizacao=0.0)
+
+
+def test_login_retorna_token_valido(cliente, criar_usuario):
+    usuario_id, _ = criar_usuario(senha='segredo')
+    resposta = cliente.post('/api/auth/login', json={'email': 'usuario1@exemplo.com', 'password': 'segredo'})
+    assert resposta.status_code == 200
+    assert resposta.json['token_type'] == 'Bearer'
+    cabecalho = {'Authorization': f"Bearer {resposta.json['access_token']}"}
+    assert cliente.get(f'/api/treinamento/usuario/{usuario_id}/sessoes', headers=cabecalho).status_code == 200
+
+
+def test_rotas_exigem_token(cliente, criar_usuario):
+    usuario_id, _ = criar_usuario()
+    assert cliente.get(f'/api/metricas/dashboard/{usuario_id}').status_code == 401
+    cabecalho = {'Authorization': 'Bearer invalido'}
+    assert cliente.get(f'/api/metricas/dashboard/{usuario_id}', headers=cabecalho).status_code == 401
+
+
+def test_acesso_a_outro_usuario(cliente, criar_usuario):
+    usuario_id, _ = criar_usuario()
+    _, outro = criar_usuario()
+    _, admin = criar_usuario(tipo_usuario='admin')
+    assert cliente.get(f'/api/metricas/dashboard/{usuario_id}', headers=outro).status_code == 403
+    assert cliente.get(f'/api/metricas/dashboard/{usuario_id}', headers=admin).status_code == 200
+    assert cliente.get('/api/metricas/dashboard/9999', headers=admin).status_code == 404
+
+
+@pytest.mark.usefixtures('fuso_tokyo')
+def test_logout_revoga_token_em_qualquer_fuso(app, cliente, criar_usuario):
+    usuario_id, cabecalho = criar_usuario()
+    assert cliente.post('/api/auth/logout', headers=cabecalho).status_code == 204
+    assert cliente.get(f'/api/metricas/dashboard/{usuario_id}', headers=cabecalho).status_code == 401
+
+    _esquecer_revogacoes_em_memoria()
+    with app.app_context():
+        token = cabecalho['Authorization'].split()[1]
+        with pytest.raises(autenticacao.TokenInvalido):
+            autenticacao.verificar_token(token)
+        # A revogação vale até o fim da validade do token, nem antes nem depois
+        expira = next(iter(autenticacao._revogados.values()))
+        assert abs(expira - (time.time() + autenticacao.VALIDADE_PADRAO_SEGUNDOS)) < 60
+
+
+@pytest.mark.usefixtures('fuso_tokyo')
+def test_remover_usuario_revoga_tokens_emitidos(app, cliente, criar_usuario):
+    usuario_id, cabecalho = criar_usuario()
+    with app.app_context():
+        autenticacao.revogar_tokens_usuario(usuario_id)
+        db.session.commit()
+    _esquecer_revogacoes_em_memoria()
+    assert cliente.get(f'/api/metricas/dashboard/{usuario_id}', headers=cabecalho).status_code == 401
+    corte = autenticacao._revogados_usuario[usuario_id]
+    assert abs(corte - time.time()) < 60
+
+
+def test_aplicacao_nao_inicia_sem_secret_key(tmp_path):
+    ambiente = {chave: valor for chave, valor in os.environ.items() if chave != 'SECRET_KEY'}
+    ambiente['DATABASE_URL'] = f"sqlite:///{tmp_path / 'app.db'}"
+    resultado = subprocess.run(
+        [sys.executable, '-c', 'import src.main'], env=ambiente, capture_output=True, text=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    )
+    assert resultado.returncode != 0
+    assert 'SECRET_KEY' in resultado.stderr
+
+
+def test_alterar_e_excluir_usuario_exigem_o_proprio_token(cliente, criar_usuario):
+    usuario_id, cabecalho = criar_usuario()
+    _, outro = criar_usuario()
+    _, admin = criar_usuario(tipo_usuario='admin')
+
+    assert cliente.put(f'/api/users/{usuario_id}', json={'email': 'x@exemplo.com'}).status_code == 401
+    assert cliente.put(f'/api/users/{usuario_id}', json={'email': 'x@exemplo.com'}, headers=outro).status_code == 403
+    assert cliente.delete(f'/api/users/{usuario_id}', headers=outro).status_code == 403
+
+    resposta = cliente.put(f'/api/users/{usuario_id}', json={'email': 'novo@exemplo.com'}, headers=cabecalho)
+    assert (resposta.status_code, resposta.json['email']) == (200, 'novo@exemplo.com')
+    assert cliente.put(f'/api/users/{usuario_id}', json={'username': 'adm'}, headers=admin).status_code == 200
+
+    assert cliente.delete(f'/api/users/{usuario_id}', headers=cabecalho).status_code == 204
+    # O token do usuário excluído foi revogado junto
+    assert cliente.post('/api/auth/logout', headers=cabecalho).status_code == 401
@@ -0,0 +1,87 @@
+import pytest
+from src.models.user import db
+from src.models.disciplina import Disciplina
+from src.models.mapa_mental import MapaMental
+from src.models.questao import Questao
+from src.models.resumo import Resumo
+from src.utils.busca import buscar
+
+
+@pytest.fixture
+def conteudos(app, criar_usuario):
+    autor_id, _ = criar_usuario(tipo_usuario='professor')
+    with app.app_context():
+        disciplina = Disciplina(nome='Botânica')
+        db.session.add(disciplina)
+        db.session.flush()
+        questao = Questao(disciplina_id=disciplina.id, texto_questao='O que é fotossíntese?',
+                          alternativas='["a"]', resposta_correta=0, autor_id=autor_id)
+        # Muitos resumos: as estatísticas do bm25 desta tabela ficam bem diferentes das outras
+        resumos = [
+            Resumo(disciplina_id=disciplina.id, titulo=f'Resumo {i}', autor_id=autor_id,
+                   conteudo='Fotossíntese <b>converte</b> luz' if i == 0 else f'Texto sobre raízes {i}')
+            for i in range(20)
+        ]
+        mapa = MapaMental(disciplina_id=disciplina.id, titulo='Plantas', autor_id=autor_id)
+        mapa.set_nodos([{'id': 1, 'text': 'Fotossíntese'}, {'id': 2, 'text': 'Clorofila'}])
+        mapa.set_arestas([])
+        db.session.add_all([questao, mapa] + resumos)
+        db.session.commit()
+        return {'questao': questao.id, 'resumo': resumos[0].id, 'mapa': mapa.id, 'disciplina': disciplina.id}
+
+
+def _encontrados(termos, **filtros):
+    return {(resultado['tipo'], resultado['id']) for resultado in buscar(termos, **filtros)}
+
+
+def test_busca_em_todos_os_tipos_sem_acento_e_por_prefixo(app, conteudos):
+    with app.app_context():
+        esperado = {('questao', conteudos['questao']), ('resumo', conteudos['resumo']), ('mapa', conteudos['mapa'])}
+        assert _encontrados('fotossintese') == esperado
+        assert _encontrados('fotos') == esperado
+        assert _encontrados('fotossintese', tipos=['mapa']) == {('mapa', conteudos['mapa'])}
+        assert _encontrados('fotossintese', disciplina_id=conteudos['disciplina'] + 1) == set()
+
+
+def test_relevancia_normalizada_por_tipo(app, conteudos):
+    with app.app_context():
+        resultados = buscar('fotossintese')
+    # O melhor de cada tipo vale 1.0, independentemente do tamanho de cada tabela
+    assert {resultado['tipo']: resultado['relevancia'] for resultado in resultados} == {
+        'questao': 1.0, 'resumo': 1.0, 'mapa': 1.0
+    }
+
+
+def test_trecho_escapa_html_e_destaca_termo(app, conteudos):
+    with app.app_context():
+        [resultado] = buscar('fotossintese', tipos=['resumo'])
+    assert '<mark>Fotossíntese</mark>' in resultado['trecho']
+    assert '&lt;b&gt;converte&lt;/b&gt;' in resultado['trecho']
+    assert '<b>' not in resultado['trecho']
+
+
+def test_indice_acompanha_alteracoes_e_exclusoes(app, conteudos):
+    with app.app_context():
+        mapa = db.session.get(MapaMental, conteudos['mapa'])
+        mapa.set_nodos([{'id': 1, 'text': 'Respiração'}])
+        db.session.get(Resumo, conteudos['resumo']).ativo = False
+        db.session.delete(db.session.get(Questao, conteudos['questao']))
+        db.session.commit()
+        assert _encontrados('fotossintese') == set()
+        assert _encontrados('respiracao') == {('mapa', conteudos['mapa'])}
+
+        # Rollback desfaz também o índice
+        db.session.get(MapaMental, conteudos['mapa']).titulo = 'Germinação'
+        db.session.flush()
+        assert _encontrados('germinacao') == {('mapa', conteudos['mapa'])}
+        db.session.rollback()
+        assert _encontrados('germinacao') == set()
+
+
+def test_rota_de_busca(cliente, conteudos):
+    resposta = cliente.get('/api/busca?q=clorofila')
+    assert [(item['tipo'], item['id']) for item in resposta.json['resultados']] == [('mapa', conteudos['mapa'])]
+    assert cliente.get('/api/busca?q=').status_code == 400
+    assert cliente.get('/api/busca?q=x&tipos=video').status_code == 400
+    # Sintaxe FTS digitada pelo usuário é tratada como texto
+    assert cliente.get('/api/busca?q=%22fotos%20OR%20NEAR(').status_code == 200
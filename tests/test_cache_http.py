@@ -0,0 +1,42 @@
+from src.models.user import db
+from src.models.disciplina import Disciplina
+from src.utils.cache_http import marcar_alteracao
+
+
+def _etag(cliente):
+    resposta = cliente.get('/api/disciplinas')
+    assert resposta.status_code == 200
+    return resposta.headers['ETag']
+
+
+def test_if_none_match_responde_304(cliente):
+    etag = _etag(cliente)
+    assert cliente.get('/api/disciplinas', headers={'If-None-Match': etag}).status_code == 304
+
+
+def test_escrita_pelo_orm_muda_o_etag(app, cliente):
+    etag = _etag(cliente)
+    with app.app_context():
+        db.session.add(Disciplina(nome='Geografia'))
+        db.session.commit()
+    assert cliente.get('/api/disciplinas', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_escrita_de_outro_processo_muda_o_etag(app, cliente):
+    etag = _etag(cliente)
+    # Outro worker: conexão independente, sem passar pelos eventos desta sessão
+    with app.app_context(), db.engine.begin() as conexao:
+        conexao.exec_driver_sql(
+            "UPDATE versao_tabela SET versao = versao + 1 WHERE tabela = 'disciplina'"
+        )
+    assert cliente.get('/api/disciplinas', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_rollback_nao_muda_o_etag(app, cliente):
+    etag = _etag(cliente)
+    with app.app_context():
+        db.session.add(Disciplina(nome='Descartada'))
+        db.session.flush()
+        marcar_alteracao(db.session, 'disciplina')
+        db.session.rollback()
+    assert cliente.get('/api/disciplinas', headers={'If-None-Match': etag}).status_code == 304
@@ -0,0 +1,67 @@
+import pytest
+from sqlalchemy import event
+from src.models.user import db
+from src.models.disciplina import Disciplina
+from src.models.questao import Questao
+from src.models.sessao_treinamento import SessaoTreinamento
+from src.models.resposta_questao import RespostaQuestao
+from src.models.estatistica_questao import EstatisticaQuestao
+
+
+@pytest.fixture
+def questao_id(app, criar_usuario):
+    autor_id, _ = criar_usuario()
+    with app.app_context():
+        disciplina = Disciplina(nome='Matemática')
+        db.session.add(disciplina)
+        db.session.flush()
+        questao = Questao(disciplina_id=disciplina.id, texto_questao='1 + 1?', alternativas='["1", "2"]',
+                          resposta_correta=1, autor_id=autor_id)
+        db.session.add(questao)
+        db.session.commit()
+        return questao.id
+
+
+@pytest.fixture
+def escritas(app):
+    """Conta INSERT/UPDATE/DELETE emitidos durante o teste"""
+    contagem = []
+
+    def contar(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().split()[0].upper() in ('INSERT', 'UPDATE', 'DELETE'):
+            contagem.append(statement)
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', contar)
+        yield contagem
+        event.remove(db.engine, 'before_cursor_execute', contar)
+
+
+def test_get_de_questao_sem_respostas_nao_grava(app, cliente, questao_id, escritas):
+    for _ in range(2):
+        resposta = cliente.get(f'/api/questoes/{questao_id}/estatisticas')
+        assert resposta.status_code == 200
+        assert resposta.json['respostas'] == 0
+    assert escritas == []
+
+
+def test_get_calcula_questao_ainda_nao_calibrada(app, cliente, questao_id, criar_usuario, escritas):
+    usuario_id, _ = criar_usuario()
+    with app.app_context():
+        sessao = SessaoTreinamento(usuario_id=usuario_id, tipo='questoes')
+        db.session.add(sessao)
+        db.session.flush()
+        db.session.add_all([
+            RespostaQuestao(sessao_id=sessao.id, questao_id=questao_id, resposta_usuario=1, correta=True,
+                            tempo_resposta_segundos=10),
+            RespostaQuestao(sessao_id=sessao.id, questao_id=questao_id, resposta_usuario=0, correta=False,
+                            tempo_resposta_segundos=30),
+        ])
+        db.session.commit()
+    escritas.clear()
+
+    dados = cliente.get(f'/api/questoes/{questao_id}/estatisticas').json
+    assert (dados['respostas'], dados['acertos'], dados['p_valor']) == (2, 1, 0.5)
+    assert escritas == []
+    with app.app_context():
+        assert db.session.get(EstatisticaQuestao, questao_id) is None
@@ -0,0 +1,47 @@
+import json
+import pytest
+from src.models import mapa_mental
+from src.models.mapa_mental import MapaMental
+from src.utils.codec_mapa import FormatoDesconhecido, codificar, decodificar
+
+
+def test_ida_e_volta():
+    nodos = [{'id': '1', 'text': 'Ação'}, {'id': '2'}]
+    assert decodificar(codificar(nodos)) == nodos
+
+
+def test_texto_legado_continua_legivel():
+    assert decodificar('[{"id": 1}]') == [{'id': 1}]
+
+
+@pytest.mark.parametrize('valor', [codificar([{'id': 1}])[:-4], b'\x01lixo', b'\x09[]'])
+def test_blob_corrompido_levanta_formato_desconhecido(valor):
+    with pytest.raises(FormatoDesconhecido):
+        decodificar(valor)
+
+
+def test_mapa_com_blob_corrompido_le_lista_vazia():
+    mapa = MapaMental(nodos=codificar([{'id': 1}])[:-4], arestas=b'\x01lixo')
+    assert mapa.get_nodos() == []
+    assert mapa.get_arestas() == []
+
+
+@pytest.mark.parametrize('nodos', ['not json', '[{"id": 1}', b'\x01lixo'])
+def test_json_bruto_com_valor_ilegivel_continua_valido(nodos):
+    mapa = MapaMental(id=1, titulo='Mapa', nodos=nodos, arestas='[]')
+    dados = json.loads(mapa.to_json_bruto())
+    assert dados['nodos'] == [] and dados['arestas'] == []
+
+
+def test_json_bruto_preserva_conteudo_valido():
+    mapa = MapaMental(id=1, titulo='Mapa', nodos='[{"id": 1}]', arestas=codificar([{'from': 1, 'to': 1}]))
+    dados = json.loads(mapa.to_json_bruto())
+    assert dados['nodos'] == [{'id': 1}] and dados['arestas'] == [{'from': 1, 'to': 1}]
+
+
+def test_json_bruto_nao_decodifica_texto_legado(monkeypatch):
+    def proibido(*args, **kwargs):
+        raise AssertionError('texto legado decodificado na leitura')
+    monkeypatch.setattr(mapa_mental.json, 'loads', proibido)
+    mapa = MapaMental(id=1, titulo='Mapa', nodos=' [{"id": 1}] ', arestas='[]')
+    assert '"nodos": [{"id": 1}]' in mapa.to_json_bruto()
@@ -0,0 +1,90 @@
+import pytest
+from sqlalchemy.orm import Session
+from src.models.user import db
+from src.models.disciplina import Disciplina
+from src.models.questao import Questao
+from src.models.resposta_questao import RespostaQuestao
+from src.models.sessao_treinamento import SessaoTreinamento
+from src.utils import manutencao
+
+
+@pytest.fixture
+def sessao_id(app, criar_usuario):
+    usuario_id, _ = criar_usuario()
+    with app.app_context():
+        sessao = SessaoTreinamento(usuario_id=usuario_id, tipo='questoes', total_itens=10)
+        db.session.add(sessao)
+        db.session.commit()
+        return sessao.id
+
+
+def _contadores(app, sessao_id):
+    with app.app_context():
+        sessao = db.session.get(SessaoTreinamento, sessao_id)
+        return sessao.itens_completados, sessao.respondidas, sessao.acertos
+
+
+def test_registrar_respostas_incrementa_contadores(app, sessao_id):
+    with app.app_context():
+        sessao = db.session.get(SessaoTreinamento, sessao_id)
+        sessao.registrar_respostas(3, 2)
+        db.session.commit()
+        sessao.registrar_respostas(1, 0)
+        db.session.commit()
+        assert sessao.calcular_taxa_acertos() == 50.0
+    assert _contadores(app, sessao_id) == (4, 4, 2)
+
+
+def test_registrar_respostas_nao_perde_incrementos_concorrentes(app, sessao_id):
+    with app.app_context():
+        # Duas sessões do ORM leem a mesma linha antes de qualquer uma gravar
+        sessao = db.session.get(SessaoTreinamento, sessao_id)
+        with Session(db.engine) as outra_sessao:
+            concorrente = outra_sessao.get(SessaoTreinamento, sessao_id)
+            sessao.registrar_respostas(2, 1)
+            db.session.commit()
+            concorrente.registrar_respostas(3, 3)
+            outra_sessao.commit()
+    assert _contadores(app, sessao_id) == (5, 5, 4)
+
+
+def test_recalcular_contadores_a_partir_das_respostas(app, sessao_id, criar_usuario):
+    autor_id, _ = criar_usuario(tipo_usuario='professor')
+    with app.app_context():
+        disciplina = Disciplina(nome='Artes')
+        db.session.add(disciplina)
+        db.session.flush()
+        questoes = [
+            Questao(disciplina_id=disciplina.id, texto_questao=f'Questão {i}', alternativas='["a", "b"]',
+                    resposta_correta=0, autor_id=autor_id)
+            for i in range(3)
+        ]
+        vazia = SessaoTreinamento(usuario_id=autor_id, tipo='questoes', respondidas=7, acertos=7)
+        db.session.add_all(questoes + [vazia])
+        db.session.flush()
+        # Respostas gravadas sem registrar_respostas: os contadores ficam desatualizados
+        db.session.add_all(
+            RespostaQuestao(sessao_id=sessao_id, questao_id=questao.id, resposta_usuario=0, correta=i != 1)
+            for i, questao in enumerate(questoes)
+        )
+        db.session.commit()
+        vazia_id = vazia.id
+
+        with db.engine.begin() as conexao:
+            assert manutencao.recalcular_contadores_sessoes(conexao) == 2
+
+    # itens_completados é progresso e não é derivado das respostas
+    assert _contadores(app, sessao_id)[1:] == (3, 2)
+    assert _contadores(app, vazia_id)[1:] == (0, 0)
+
+
+def test_comando_contadores_sessao(app, sessao_id, monkeypatch, capsys):
+    with app.app_context():
+        db.session.execute(db.update(SessaoTreinamento).values(respondidas=9, acertos=9))
+        db.session.commit()
+    monkeypatch.setattr('sys.argv', ['manutencao.py', 'contadores-sessao'])
+
+    manutencao.main()
+
+    assert capsys.readouterr().out.strip() == '1 sessões atualizadas'
+    assert _contadores(app, sessao_id)[1:] == (0, 0)
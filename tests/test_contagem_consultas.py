@@ -0,0 +1,118 @@
+"""
+Regressão de N+1: o número de consultas das listagens de sessões e das métricas
+não pode crescer com a quantidade de sessões do usuário
+"""
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import event
+from src.models.user import db
+from src.models.disciplina import Disciplina
+from src.models.questao import Questao
+from src.models.sessao_treinamento import SessaoTreinamento
+from src.models.resposta_questao import RespostaQuestao
+from src.models.metrica_usuario import MetricaUsuario
+from src.models.estudo_diario import EstudoDiario
+from src.utils.cache_resultados import invalidar_metricas
+
+
+@pytest.fixture
+def usuario_com_sessoes(app, criar_usuario):
+    """Cria um usuário com `total` sessões finalizadas, cada uma em uma disciplina própria
+
+    Disciplinas distintas impedem que o identity map esconda um carregamento por linha.
+    Com mesma_disciplina=True todas as sessões ficam na mesma disciplina, para as rotas
+    que listam as sessões de uma disciplina.
+    Retorna (usuario_id, cabeçalho com token, id da primeira disciplina).
+    """
+    autor_id, _ = criar_usuario(tipo_usuario='professor')
+
+    def criar(total, mesma_disciplina=False):
+        usuario_id, cabecalho = criar_usuario()
+        with app.app_context():
+            agora = datetime.utcnow()
+            disciplinas = [Disciplina(nome=f'Disciplina {usuario_id}-{i}')
+                           for i in range(1 if mesma_disciplina else total)]
+            db.session.add_all(disciplinas)
+            db.session.flush()
+            for i in range(total):
+                disciplina = disciplinas[0 if mesma_disciplina else i]
+                questao = Questao(disciplina_id=disciplina.id, texto_questao='?', alternativas='["a", "b"]',
+                                  resposta_correta=0, autor_id=autor_id)
+                sessao = SessaoTreinamento(
+                    usuario_id=usuario_id, tipo='questoes', disciplina_id=disciplina.id,
+                    data_inicio=agora - timedelta(days=i % 10, minutes=30), total_itens=1
+                )
+                db.session.add_all([questao, sessao])
+                db.session.flush()
+                db.session.add(RespostaQuestao(sessao_id=sessao.id, questao_id=questao.id,
+                                               resposta_usuario=0, correta=True))
+                sessao.registrar_respostas(1, 1)
+                sessao.finalizar_sessao()
+                db.session.flush()
+                EstudoDiario.registrar_sessao(sessao)
+                if not mesma_disciplina or i == 0:
+                    db.session.add(MetricaUsuario(
+                        usuario_id=usuario_id, disciplina_id=disciplina.id,
+                        tempo_estudo_minutos=10, taxa_acertos=80.0, dias_constancia=1
+                    ))
+            db.session.commit()
+            return usuario_id, cabecalho, disciplinas[0].id
+    return criar
+
+
+@pytest.fixture
+def contar_consultas(app):
+    def contar(cliente, caminho, cabecalho):
+        consultas = []
+        invalidar_metricas()  # conta o caminho que vai ao banco, não o cache
+
+        def registrar(conn, cursor, statement, parameters, context, executemany):
+            consultas.append(statement)
+
+        with app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', registrar)
+            try:
+                resposta = cliente.get(caminho, headers=cabecalho)
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', registrar)
+        assert resposta.status_code == 200, resposta.json
+        return len(consultas)
+    return contar
+
+
+@pytest.mark.parametrize('rota', [
+    '/api/treinamento/usuario/{usuario_id}/sessoes',
+    '/api/treinamento/usuario/{usuario_id}/sessoes?limite=100',
+    '/api/metricas/usuario/{usuario_id}',
+    '/api/metricas/dashboard/{usuario_id}',
+])
+def test_consultas_nao_crescem_com_o_numero_de_sessoes(cliente, usuario_com_sessoes, contar_consultas, rota):
+    usuarios = [usuario_com_sessoes(3), usuario_com_sessoes(60)]
+
+    # Aquece o que é carregado uma vez por processo (ex.: lista de revogação de tokens)
+    usuario_id, cabecalho, disciplina_id = usuarios[0]
+    cliente.get(rota.format(usuario_id=usuario_id, disciplina_id=disciplina_id), headers=cabecalho)
+
+    contagens = [
+        contar_consultas(cliente, rota.format(usuario_id=usuario_id, disciplina_id=disciplina_id), cabecalho)
+        for usuario_id, cabecalho, disciplina_id in usuarios
+    ]
+    assert contagens[0] == contagens[1]
+
+
+@pytest.mark.parametrize('rota', [
+    '/api/metricas/usuario/{usuario_id}/disciplina/{disciplina_id}',
+    '/api/metricas/usuario/{usuario_id}/disciplina/{disciplina_id}?limite=100',
+])
+def test_metricas_da_disciplina_nao_crescem_com_o_numero_de_sessoes(cliente, usuario_com_sessoes,
+                                                                    contar_consultas, rota):
+    usuarios = [usuario_com_sessoes(3, mesma_disciplina=True), usuario_com_sessoes(60, mesma_disciplina=True)]
+
+    usuario_id, cabecalho, disciplina_id = usuarios[0]
+    cliente.get(rota.format(usuario_id=usuario_id, disciplina_id=disciplina_id), headers=cabecalho)
+
+    contagens = [
+        contar_consultas(cliente, rota.format(usuario_id=usuario_id, disciplina_id=disciplina_id), cabecalho)
+        for usuario_id, cabecalho, disciplina_id in usuarios
+    ]
+    assert contagens[0] == contagens[1]
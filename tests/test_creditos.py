@@ -0,0 +1,175 @@
+import threading
+import pytest
+from src.models.user import db, User
+from src.models.disciplina import Disciplina
+from src.models.resumo import Resumo
+from src.models.lancamento_credito import LancamentoCredito
+from src.utils.creditos import reconciliar_saldos
+from src.utils.migracoes import MIGRACOES
+
+
+@pytest.fixture
+def resumos(app, criar_usuario):
+    """Cria um resumo gratuito e três de 10 créditos; retorna os ids"""
+    autor_id, _ = criar_usuario(tipo_usuario='professor')
+    with app.app_context():
+        disciplina = Disciplina(nome='Direito')
+        db.session.add(disciplina)
+        db.session.flush()
+        itens = [
+            Resumo(disciplina_id=disciplina.id, titulo=f'Resumo {i}', conteudo='x',
+                   preco=10.0 if i else 0.0, autor_id=autor_id)
+            for i in range(4)
+        ]
+        db.session.add_all(itens)
+        db.session.commit()
+        return [resumo.id for resumo in itens]
+
+
+def _recarregar(cliente, admin, usuario_id, valor):
+    resposta = cliente.post(f'/api/creditos/usuario/{usuario_id}/lancamentos', json={'valor': valor}, headers=admin)
+    assert resposta.status_code == 201
+    return resposta.json['saldo']
+
+
+def _comprar(cliente, cabecalho, resumo_id):
+    return cliente.post('/api/compras', json={'tipo_conteudo': 'resumo', 'conteudo_id': resumo_id}, headers=cabecalho)
+
+
+def test_compra_debita_uma_vez(cliente, criar_usuario, resumos):
+    usuario_id, cabecalho = criar_usuario()
+    _, admin = criar_usuario(tipo_usuario='admin')
+    assert _recarregar(cliente, admin, usuario_id, 25) == 25.0
+
+    assert _comprar(cliente, cabecalho, resumos[0]).json == {'compra': None, 'gratuito': True}
+    primeira = _comprar(cliente, cabecalho, resumos[1])
+    assert (primeira.status_code, primeira.json['saldo']) == (201, 15.0)
+    repetida = _comprar(cliente, cabecalho, resumos[1])
+    assert (repetida.status_code, repetida.json['saldo']) == (200, None)
+
+    acesso = cliente.get(f'/api/compras/resumo/{resumos[1]}/acesso', headers=cabecalho).json
+    sem_acesso = cliente.get(f'/api/compras/resumo/{resumos[2]}/acesso', headers=cabecalho).json
+    assert acesso == {'acesso': True} and sem_acesso == {'acesso': False}
+
+    extrato = cliente.get(f'/api/creditos/usuario/{usuario_id}/extrato', headers=cabecalho).json['itens']
+    assert [(item['tipo'], item['valor']) for item in extrato] == [('compra', -10.0), ('recarga', 25.0)]
+
+
+def test_credito_insuficiente_nao_registra_compra(cliente, criar_usuario, resumos):
+    _, cabecalho = criar_usuario()
+    assert _comprar(cliente, cabecalho, resumos[1]).status_code == 402
+    assert cliente.get('/api/compras', headers=cabecalho).json['itens'] == []
+
+
+def test_compras_simultaneas_nao_deixam_saldo_negativo(app, cliente, criar_usuario, resumos):
+    usuario_id, cabecalho = criar_usuario()
+    _, admin = criar_usuario(tipo_usuario='admin')
+    _recarregar(cliente, admin, usuario_id, 15)
+
+    status = []
+    threads = [
+        threading.Thread(target=lambda resumo_id=resumo_id: status.append(
+            _comprar(app.test_client(), cabecalho, resumo_id).status_code
+        ))
+        for resumo_id in resumos[1:]
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(status) == [201, 402, 402]
+    with app.app_context():
+        assert db.session.get(User, usuario_id).creditos == 5.0
+
+
+def test_reconciliacao_recalcula_pelo_livro_razao(app, cliente, criar_usuario):
+    usuario_id, _ = criar_usuario()
+    _, admin = criar_usuario(tipo_usuario='admin')
+    _recarregar(cliente, admin, usuario_id, 30)
+    with app.app_context(), db.engine.begin() as conexao:
+        conexao.execute(db.text('UPDATE "user" SET creditos = 999 WHERE id = :id'), {'id': usuario_id})
+        assert reconciliar_saldos(conexao) == 1
+        assert reconciliar_saldos(conexao) == 0
+    with app.app_context():
+        assert db.session.get(User, usuario_id).creditos == 30.0
+
+
+def test_migracao_de_saldo_inicial_e_idempotente(app, criar_usuario):
+    usuario_id, _ = criar_usuario(creditos=40.0)
+    migracao = next(funcao for versao, _, funcao in MIGRACOES if versao == 9)
+    with app.app_context():
+        with db.engine.begin() as conexao:
+            migracao(conexao)
+            migracao(conexao)
+            assert reconciliar_saldos(conexao) == 0
+        lancamentos = LancamentoCredito.query.filter_by(usuario_id=usuario_id).all()
+        assert [(item.tipo, item.valor) for item in lancamentos] == [('saldo_inicial', 40.0)]
+
+
+def test_preco_negativo_recusado_e_nunca_credita(app, cliente, criar_usuario, resumos):
+    _, autor = criar_usuario(tipo_usuario='professor')
+    _, admin = criar_usuario(tipo_usuario='admin')
+    with app.app_context():
+        disciplina_id = db.session.get(Resumo, resumos[0]).disciplina_id
+    novo = {'titulo': 'R', 'disciplina_id': disciplina_id, 'conteudo': 'x'}
+    assert cliente.post('/api/resumos', json={**novo, 'preco': -500}, headers=autor).status_code == 400
+    assert cliente.post('/api/resumos', json={**novo, 'preco': 'caro'}, headers=autor).status_code == 400
+    assert cliente.put(f'/api/resumos/{resumos[1]}', json={'preco': -1}, headers=admin).status_code == 400
+    mapa = {'titulo': 'M', 'disciplina_id': disciplina_id, 'nodos': [], 'arestas': [], 'preco': -500}
+    assert cliente.post('/api/mapas', json=mapa, headers=autor).status_code == 400
+
+    # Preço negativo gravado antes da validação é tratado como gratuito
+    with app.app_context():
+        db.session.get(Resumo, resumos[1]).preco = -500
+        db.session.commit()
+    usuario_id, cabecalho = criar_usuario()
+    assert _comprar(cliente, cabecalho, resumos[1]).json == {'compra': None, 'gratuito': True}
+    with app.app_context():
+        assert db.session.get(User, usuario_id).creditos == 0
+        assert LancamentoCredito.query.filter_by(usuario_id=usuario_id).count() == 0
+
+
+def test_conteudo_pago_exige_compra(app, cliente, criar_usuario, resumos):
+    with app.app_context():
+        resumo = db.session.get(Resumo, resumos[1])
+        autor_id, disciplina_id = resumo.autor_id, resumo.disciplina_id
+    usuario_id, cabecalho = criar_usuario()
+    _, admin = criar_usuario(tipo_usuario='admin')
+
+    assert cliente.get(f'/api/resumos/{resumos[0]}').status_code == 200
+    assert cliente.get(f'/api/resumos/{resumos[1]}').status_code == 401
+    assert cliente.get(f'/api/resumos/{resumos[1]}', headers=cabecalho).status_code == 402
+    assert cliente.get(f'/api/resumos/{resumos[1]}', headers=admin).status_code == 200
+
+    _recarregar(cliente, admin, usuario_id, 10)
+    assert _comprar(cliente, cabecalho, resumos[1]).status_code == 201
+    assert cliente.get(f'/api/resumos/{resumos[1]}', headers=cabecalho).json['conteudo_html']
+    # Comprar não dá direito a editar
+    assert cliente.put(f'/api/resumos/{resumos[1]}', json={'titulo': 'T'}, headers=cabecalho).status_code == 403
+
+
+def test_mapa_pago_fora_das_listagens_e_das_rotas_de_estrutura(cliente, criar_usuario, resumos):
+    _, autor = criar_usuario(tipo_usuario='professor')
+    _, cabecalho = criar_usuario()
+    disciplina_id = cliente.get(f'/api/resumos/{resumos[0]}').json['disciplina_id']
+    novo = {'titulo': 'Mapa', 'disciplina_id': disciplina_id, 'nodos': [{'id': 1}], 'arestas': []}
+
+    assert cliente.post('/api/mapas', json=novo).status_code == 401
+    assert cliente.post('/api/mapas', json={**novo, 'autor_id': 999}, headers=cabecalho).status_code == 403
+    pago = cliente.post('/api/mapas', json={**novo, 'preco': 5}, headers=autor).json['id']
+    gratuito = cliente.post('/api/mapas', json=novo, headers=autor).json['id']
+
+    assert cliente.get(f'/api/mapas/{pago}', headers=cabecalho).status_code == 402
+    assert cliente.get(f'/api/mapas/{pago}', headers=autor).json['nodos'] == [{'id': 1}]
+    assert cliente.get(f'/api/mapas/{pago}/nodos/1/subarvore', headers=cabecalho).status_code == 402
+    assert cliente.get(f'/api/mapas/{gratuito}/nodos/1/subarvore').status_code == 200
+
+    for consulta in ('', '?fields=titulo,nodos'):
+        itens = {item['id']: item for item in cliente.get(f'/api/mapas{consulta}').json['itens']}
+        assert 'nodos' not in itens[pago]
+        assert itens[gratuito]['nodos'] == [{'id': 1}]
+
+    assert cliente.put(f'/api/mapas/{pago}', json={'titulo': 'X'}, headers=cabecalho).status_code == 403
+    assert cliente.delete(f'/api/mapas/{pago}', headers=cabecalho).status_code == 403
+    assert cliente.delete(f'/api/mapas/{pago}', headers=autor).status_code == 200
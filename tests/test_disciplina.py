@@ -0,0 +1,75 @@
+import pytest
+from src.models.user import db
+from src.models.disciplina import Disciplina
+from src.models.mapa_mental import MapaMental
+from src.models.questao import Questao
+from src.models.resumo import Resumo
+
+
+@pytest.fixture
+def disciplinas(app, criar_usuario):
+    """Física: 2 mapas, 1 resumo e 3 questões ativos, mais um inativo de cada tipo
+
+    Química só tem conteúdos inativos e Biologia não tem nenhum.
+    """
+    autor_id, _ = criar_usuario(tipo_usuario='professor')
+    with app.app_context():
+        fisica, quimica, biologia = (Disciplina(nome=nome) for nome in ('Física', 'Química', 'Biologia'))
+        db.session.add_all([fisica, quimica, biologia])
+        db.session.flush()
+
+        def conteudos(disciplina_id, mapas, resumos, questoes, ativo=True):
+            for i in range(mapas):
+                mapa = MapaMental(disciplina_id=disciplina_id, titulo=f'Mapa {i}', autor_id=autor_id, ativo=ativo)
+                mapa.set_nodos([])
+                mapa.set_arestas([])
+                db.session.add(mapa)
+            db.session.add_all(
+                Resumo(disciplina_id=disciplina_id, titulo=f'Resumo {i}', conteudo='texto',
+                       autor_id=autor_id, ativo=ativo)
+                for i in range(resumos)
+            )
+            db.session.add_all(
+                Questao(disciplina_id=disciplina_id, texto_questao=f'Questão {i}', alternativas='["a", "b"]',
+                        resposta_correta=0, autor_id=autor_id, ativo=ativo)
+                for i in range(questoes)
+            )
+
+        conteudos(fisica.id, 2, 1, 3)
+        conteudos(fisica.id, 1, 1, 1, ativo=False)
+        conteudos(quimica.id, 1, 1, 1, ativo=False)
+        db.session.commit()
+        return fisica.id, quimica.id, biologia.id
+
+
+def test_contar_conteudos_ignora_inativos(app, disciplinas):
+    fisica, quimica, biologia = disciplinas
+    with app.app_context():
+        assert Disciplina.contar_conteudos() == {fisica: {'mapas': 2, 'resumos': 1, 'questoes': 3}}
+        assert Disciplina.contar_conteudos([quimica, biologia]) == {}
+
+
+def test_contar_conteudos_filtra_por_disciplina(app, disciplinas, criar_usuario):
+    fisica, quimica, _ = disciplinas
+    autor_id, _ = criar_usuario(tipo_usuario='professor')
+    with app.app_context():
+        db.session.add(Questao(disciplina_id=quimica, texto_questao='?', alternativas='["a", "b"]',
+                               resposta_correta=0, autor_id=autor_id))
+        db.session.commit()
+        assert Disciplina.contar_conteudos([quimica]) == {quimica: {'questoes': 1}}
+        assert Disciplina.contar_conteudos([fisica, quimica]) == {
+            fisica: {'mapas': 2, 'resumos': 1, 'questoes': 3},
+            quimica: {'questoes': 1},
+        }
+
+
+def test_rotas_de_disciplina_usam_as_contagens(cliente, disciplinas):
+    fisica, quimica, biologia = disciplinas
+
+    def contagens(dados):
+        return (dados['mapas_count'], dados['resumos_count'], dados['questoes_count'])
+
+    lista = {dados['id']: contagens(dados) for dados in cliente.get('/api/disciplinas').get_json()}
+    assert lista == {fisica: (2, 1, 3), quimica: (0, 0, 0), biologia: (0, 0, 0)}
+    assert contagens(cliente.get(f'/api/disciplinas/{fisica}').get_json()) == (2, 1, 3)
+    assert contagens(cliente.get(f'/api/disciplinas/{quimica}').get_json()) == (0, 0, 0)
@@ -0,0 +1,113 @@
+import pytest
+from src.models.user import db
+from src.models.disciplina import Disciplina
+from src.models.mapa_mental import MapaMental
+from src.utils.edicao_mapa import OperacaoInvalida, aplicar_operacoes
+
+
+def test_mover_preserva_entradas_nao_editadas_e_a_ordem():
+    nodos = [{'id': 2, 'text': 'b'}, 'legado', {'id': 1, 'text': 'a'}, {'sem_id': True}]
+    novos, _, alterados, _ = aplicar_operacoes(nodos, [], [{'op': 'mover_nodo', 'id': '1', 'x': 5, 'y': 6}])
+    assert novos == [{'id': 2, 'text': 'b'}, 'legado', {'id': 1, 'text': 'a', 'x': 5, 'y': 6}, {'sem_id': True}]
+    assert alterados
+    assert nodos[2] == {'id': 1, 'text': 'a'}
+
+
+def test_id_duplicado_nao_e_mesclado():
+    nodos = [{'id': 1, 'text': 'a'}, {'id': 1, 'text': 'b'}, {'id': 2}]
+    novos, _, _, _ = aplicar_operacoes(nodos, [], [{'op': 'mover_nodo', 'id': 2, 'x': 0, 'y': 0}])
+    assert novos[:2] == nodos[:2]
+    with pytest.raises(OperacaoInvalida):
+        aplicar_operacoes(nodos, [], [{'op': 'atualizar_nodo', 'id': 1, 'campos': {'text': 'c'}}])
+
+
+def test_remover_nodo_remove_arestas_e_mantem_o_resto():
+    nodos = [{'id': 1}, {'id': 2}, {'id': 3}]
+    arestas = [{'from': 1, 'to': 2}, {'from': 1, 'to': 3}]
+    novos, novas_arestas, _, arestas_alteradas = aplicar_operacoes(nodos, arestas, [{'op': 'remover_nodo', 'id': 2}])
+    assert novos == [{'id': 1}, {'id': 3}]
+    assert novas_arestas == [{'from': 1, 'to': 3}]
+    assert arestas_alteradas
+
+
+def test_lote_com_operacao_invalida_e_recusado():
+    with pytest.raises(OperacaoInvalida, match='Operação 1'):
+        aplicar_operacoes([{'id': 1}], [], [
+            {'op': 'adicionar_nodo', 'nodo': {'id': 2}},
+            {'op': 'adicionar_aresta', 'from': 1, 'to': 9},
+        ])
+
+
+@pytest.fixture
+def autor(criar_usuario):
+    """Cabeçalho com o token do autor do mapa"""
+    return criar_usuario()
+
+
+@pytest.fixture
+def mapa_id(app, autor):
+    autor_id, _ = autor
+    with app.app_context():
+        disciplina = Disciplina(nome='Física')
+        db.session.add(disciplina)
+        db.session.flush()
+        mapa = MapaMental(disciplina_id=disciplina.id, titulo='Mapa', autor_id=autor_id)
+        mapa.set_nodos([{'id': 1, 'text': 'raiz'}, {'id': 2, 'text': 'filho'}])
+        mapa.set_arestas([{'from': 1, 'to': 2}])
+        db.session.add(mapa)
+        db.session.commit()
+        return mapa.id
+
+
+def test_patch_aplica_operacoes_e_controla_versao(cliente, mapa_id, autor):
+    versao = cliente.get(f'/api/mapas/{mapa_id}').json['versao']
+    resposta = cliente.patch(f'/api/mapas/{mapa_id}', json={
+        'versao_base': versao,
+        'operacoes': [
+            {'op': 'adicionar_nodo', 'nodo': {'id': 3, 'text': 'novo'}},
+            {'op': 'adicionar_aresta', 'from': 1, 'to': 3},
+        ]
+    }, headers=autor[1])
+    assert resposta.status_code == 200
+    assert resposta.json['versao'] == versao + 1
+    assert (resposta.json['total_nodos'], resposta.json['total_arestas']) == (3, 2)
+
+    # A mesma versão base não pode ser usada duas vezes
+    repetida = cliente.patch(f'/api/mapas/{mapa_id}', json={
+        'versao_base': versao, 'operacoes': [{'op': 'mover_nodo', 'id': 1, 'x': 0, 'y': 0}]
+    }, headers=autor[1])
+    assert repetida.status_code == 409
+    assert repetida.json['versao'] == versao + 1
+
+
+def test_patch_recusa_ciclo(cliente, mapa_id, autor):
+    versao = cliente.get(f'/api/mapas/{mapa_id}').json['versao']
+    resposta = cliente.patch(f'/api/mapas/{mapa_id}', json={
+        'versao_base': versao, 'operacoes': [{'op': 'adicionar_aresta', 'from': 2, 'to': 1}]
+    }, headers=autor[1])
+    assert resposta.status_code == 400
+
+
+def test_mapa_legado_com_ciclo_pode_ser_corrigido(app, cliente, mapa_id, autor):
+    with app.app_context():
+        mapa = db.session.get(MapaMental, mapa_id)
+        mapa.set_arestas([{'from': 1, 'to': 2}, {'from': 2, 'to': 1}])
+        db.session.commit()
+        versao = mapa.versao
+    resposta = cliente.patch(f'/api/mapas/{mapa_id}', json={
+        'versao_base': versao, 'operacoes': [{'op': 'remover_aresta', 'from': 2, 'to': 1}]
+    }, headers=autor[1])
+    assert resposta.status_code == 200
+
+
+def test_put_em_mapa_legado_com_ciclo_aceita_novos_nodos(app, cliente, mapa_id, autor):
+    ciclo = [{'from': 1, 'to': 2}, {'from': 2, 'to': 1}]
+    with app.app_context():
+        mapa = db.session.get(MapaMental, mapa_id)
+        mapa.set_arestas(ciclo)
+        db.session.commit()
+    resposta = cliente.put(f'/api/mapas/{mapa_id}', json={
+        'nodos': [{'id': 1}, {'id': 2}, {'id': 3}], 'arestas': ciclo + [{'from': 1, 'to': 3}]
+    }, headers=autor[1])
+    assert resposta.status_code == 200
+    assert any('já existente' in aviso for aviso in resposta.json['avisos'])
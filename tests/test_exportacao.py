@@ -0,0 +1,125 @@
+import csv
+import gzip
+import io
+import json
+import pytest
+from datetime import datetime
+from src.models.user import db
+from src.models.disciplina import Disciplina
+from src.models.questao import Questao
+from src.models.resposta_questao import RespostaQuestao
+from src.models.sessao_treinamento import SessaoTreinamento
+
+
+@pytest.fixture
+def admin(criar_usuario):
+    return criar_usuario(tipo_usuario='admin')[1]
+
+
+@pytest.fixture
+def historico(app, criar_usuario):
+    """Duas disciplinas, uma sessão em cada (janeiro e março) e uma resposta por sessão"""
+    usuario_id, _ = criar_usuario()
+    with app.app_context():
+        disciplinas = [Disciplina(nome='Física'), Disciplina(nome='Ética')]
+        db.session.add_all(disciplinas)
+        db.session.flush()
+        ids = {}
+        for disciplina, data in zip(disciplinas, (datetime(2024, 1, 10, 8, 30), datetime(2024, 3, 5, 14))):
+            questao = Questao(disciplina_id=disciplina.id, texto_questao=f'Questão de {disciplina.nome}',
+                              alternativas='["a", "b"]', resposta_correta=1, autor_id=usuario_id)
+            sessao = SessaoTreinamento(usuario_id=usuario_id, tipo='questoes', disciplina_id=disciplina.id,
+                                       total_itens=1, data_inicio=data, finalizada=True)
+            db.session.add_all([questao, sessao])
+            db.session.flush()
+            resposta = RespostaQuestao(sessao_id=sessao.id, questao_id=questao.id, resposta_usuario=1,
+                                       correta=True, tempo_resposta_segundos=12, data_resposta=data)
+            db.session.add(resposta)
+            db.session.flush()
+            ids[disciplina.nome] = {'disciplina': disciplina.id, 'questao': questao.id,
+                                    'sessao': sessao.id, 'resposta': resposta.id, 'data': data}
+        db.session.commit()
+        return usuario_id, ids
+
+
+def _ndjson(resposta):
+    return [json.loads(linha) for linha in resposta.get_data(as_text=True).splitlines()]
+
+
+def _resposta_esperada(usuario_id, item):
+    return {
+        'id': item['resposta'], 'sessao_id': item['sessao'], 'usuario_id': usuario_id,
+        'questao_id': item['questao'], 'disciplina_id': item['disciplina'], 'resposta_usuario': 1,
+        'correta': True, 'tempo_resposta_segundos': 12, 'data_resposta': item['data'].isoformat(),
+    }
+
+
+@pytest.mark.parametrize('caminho', ['/api/export/respostas', '/api/export/sessoes'])
+def test_exportacao_restrita_a_administradores(cliente, criar_usuario, caminho):
+    _, estudante = criar_usuario()
+    _, admin = criar_usuario(tipo_usuario='admin')
+    assert cliente.get(caminho).status_code == 401
+    assert cliente.get(caminho, headers=estudante).status_code == 403
+    resposta = cliente.get(caminho, headers=admin)
+    assert resposta.status_code == 200
+    resposta.close()
+
+
+def test_respostas_em_ndjson(cliente, admin, historico):
+    usuario_id, ids = historico
+
+    resposta = cliente.get('/api/export/respostas', headers=admin)
+
+    assert resposta.content_type == 'application/x-ndjson'
+    assert resposta.headers['Content-Disposition'] == 'attachment; filename=respostas.ndjson'
+    assert 'Content-Encoding' not in resposta.headers
+    assert _ndjson(resposta) == [_resposta_esperada(usuario_id, ids['Física']),
+                                 _resposta_esperada(usuario_id, ids['Ética'])]
+
+
+def test_sessoes_em_csv(cliente, admin, historico):
+    usuario_id, ids = historico
+
+    resposta = cliente.get('/api/export/sessoes?formato=csv', headers=admin)
+
+    assert resposta.content_type == 'text/csv; charset=utf-8'
+    linhas = list(csv.reader(io.StringIO(resposta.get_data(as_text=True))))
+    assert linhas[0] == ['id', 'usuario_id', 'tipo', 'disciplina_id', 'total_itens', 'itens_completados',
+                         'respondidas', 'acertos', 'tempo_total_segundos', 'data_inicio', 'data_fim',
+                         'finalizada']
+    assert linhas[1] == [str(ids['Física']['sessao']), str(usuario_id), 'questoes',
+                         str(ids['Física']['disciplina']), '1', '0', '0', '0', '0',
+                         '2024-01-10T08:30:00', '', 'true']
+    assert len(linhas) == 3
+
+
+@pytest.mark.parametrize('caminho', ['/api/export/respostas', '/api/export/sessoes'])
+def test_filtros_de_data_e_disciplina(cliente, admin, historico, caminho):
+    _, ids = historico
+
+    def exportados(parametros):
+        return [linha['id'] for linha in _ndjson(cliente.get(f'{caminho}?{parametros}', headers=admin))]
+
+    chave = 'resposta' if caminho.endswith('respostas') else 'sessao'
+    fisica, etica = ids['Física'][chave], ids['Ética'][chave]
+    assert exportados('since=2024-02-01') == [etica]
+    assert exportados('until=2024-03-05T14:00:00') == [fisica]
+    assert exportados('since=2024-01-10T08:30&until=2024-03-06') == [fisica, etica]
+    assert exportados(f"disciplina_id={ids['Ética']['disciplina']}") == [etica]
+    assert exportados(f"since=2024-02-01&disciplina_id={ids['Física']['disciplina']}") == []
+
+
+def test_parametros_invalidos(cliente, admin):
+    assert cliente.get('/api/export/respostas?since=ontem', headers=admin).status_code == 400
+    assert cliente.get('/api/export/sessoes?formato=xml', headers=admin).status_code == 400
+
+
+@pytest.mark.parametrize('formato', ['ndjson', 'csv'])
+def test_gzip_quando_aceito(cliente, admin, historico, formato):
+    sem_gzip = cliente.get(f'/api/export/respostas?formato={formato}', headers=admin)
+    com_gzip = cliente.get(f'/api/export/respostas?formato={formato}',
+                           headers={**admin, 'Accept-Encoding': 'gzip'})
+
+    assert com_gzip.headers['Content-Encoding'] == 'gzip'
+    assert com_gzip.headers['Vary'] == 'Accept-Encoding'
+    assert gzip.decompress(com_gzip.get_data()) == sem_gzip.get_data()
@@ -0,0 +1,27 @@
+from src.utils.grafo_mapa import validar_grafo
+
+NODOS = [{'id': 1}, {'id': 2}, {'id': 3}]
+
+
+def test_ciclo_e_aresta_invalida_sao_erros():
+    erros, _ = validar_grafo(NODOS, [{'from': 1, 'to': 2}, {'from': 2, 'to': 1}, {'from': 3, 'to': 9}])
+    assert len(erros) == 2
+
+
+def test_orfao_e_apenas_aviso():
+    erros, avisos = validar_grafo(NODOS, [{'from': 1, 'to': 2}])
+    assert erros == [] and avisos == ['Nodos órfãos: 3']
+
+
+def test_problemas_ja_existentes_viram_avisos():
+    arestas = [{'from': 1, 'to': 2}, {'from': 2, 'to': 1}, {'from': 1, 'to': 9}]
+    # Pendurar um filho em um nodo do ciclo não introduz ciclo novo
+    erros, avisos = validar_grafo(NODOS, arestas + [{'from': 2, 'to': 3}], anterior=(NODOS, arestas))
+    assert erros == []
+    assert len(avisos) == 2
+
+
+def test_problema_novo_continua_erro_em_mapa_ja_invalido():
+    arestas = [{'from': 1, 'to': 9}]
+    erros, _ = validar_grafo(NODOS, arestas + [{'from': 2, 'to': 3}, {'from': 3, 'to': 2}], anterior=(NODOS, arestas))
+    assert erros == ['Ciclo envolvendo os nodos: 2, 3']
@@ -0,0 +1,122 @@
+import json
+import pytest
+from src.models.user import db
+from src.models.disciplina import Disciplina
+from src.models.questao import Questao
+from src.routes import questao as rotas_questao
+from src.utils.busca import buscar
+
+
+@pytest.fixture
+def disciplina_id(app):
+    with app.app_context():
+        disciplina = Disciplina(nome='Química')
+        db.session.add(disciplina)
+        db.session.commit()
+        return disciplina.id
+
+
+def _questao(disciplina_id, texto='Qual é o símbolo do sódio?', **campos):
+    return {'texto_questao': texto, 'disciplina_id': disciplina_id,
+            'alternativas': ['Na', 'S'], 'resposta_correta': 0, **campos}
+
+
+def _ndjson(*linhas):
+    return '\n'.join(linha if isinstance(linha, str) else json.dumps(linha) for linha in linhas)
+
+
+def _textos(app):
+    with app.app_context():
+        return sorted(db.session.scalars(db.select(Questao.texto_questao)))
+
+
+def test_importacao_exige_professor_ou_admin(cliente, criar_usuario, disciplina_id):
+    _, estudante = criar_usuario()
+    corpo = _ndjson(_questao(disciplina_id))
+
+    assert cliente.post('/api/questoes/bulk', data=corpo).status_code == 401
+    assert cliente.post('/api/questoes/bulk', data=corpo, headers=estudante).status_code == 403
+
+
+def test_ndjson_com_erros_parciais(app, cliente, criar_usuario, disciplina_id):
+    professor_id, professor = criar_usuario(tipo_usuario='professor')
+    corpo = _ndjson(
+        _questao(disciplina_id, 'Primeira'),
+        '{"texto_questao": ',
+        '',
+        _questao(disciplina_id + 1, 'Disciplina inexistente'),
+        _questao(disciplina_id, 'Resposta fora do intervalo', resposta_correta=5),
+        '[1, 2]',
+        _questao(disciplina_id, 'Outro autor', autor_id=professor_id + 100),
+        _questao(disciplina_id, 'Última'),
+    )
+
+    resposta = cliente.post('/api/questoes/bulk', data=corpo, headers=professor)
+
+    assert resposta.status_code == 200
+    dados = resposta.get_json()
+    assert dados['inseridas'] == 2
+    assert dados['total_erros'] == 5
+    # A linha vazia (3) é ignorada, mas continua contando na numeração
+    assert [erro['linha'] for erro in dados['erros']] == [2, 4, 5, 6, 7]
+    assert dados['erros'][0]['error'].startswith('JSON inválido')
+    assert dados['erros'][1]['error'] == 'Disciplina não encontrada'
+    assert dados['erros'][4]['error'] == 'autor_id deve ser o usuário do token'
+    assert _textos(app) == ['Primeira', 'Última']
+    with app.app_context():
+        assert set(db.session.scalars(db.select(Questao.autor_id))) == {professor_id}
+
+
+def test_array_json_e_admin_importa_em_nome_de_outro(app, cliente, criar_usuario, disciplina_id):
+    professor_id, _ = criar_usuario(tipo_usuario='professor')
+    _, admin = criar_usuario(tipo_usuario='admin')
+    corpo = json.dumps([
+        _questao(disciplina_id, 'Do professor', autor_id=professor_id),
+        {'texto_questao': 'Sem alternativas', 'disciplina_id': disciplina_id},
+    ])
+
+    resposta = cliente.post('/api/questoes/bulk', data=corpo, headers=admin,
+                            content_type='application/json')
+
+    assert resposta.status_code == 200
+    dados = resposta.get_json()
+    assert (dados['inseridas'], dados['total_erros']) == (1, 1)
+    assert dados['erros'] == [{'linha': 2, 'error': 'Campo alternativas é obrigatório'}]
+    with app.app_context():
+        assert db.session.scalars(db.select(Questao.autor_id)).all() == [professor_id]
+
+
+def test_array_json_malformado(cliente, criar_usuario):
+    _, professor = criar_usuario(tipo_usuario='professor')
+
+    resposta = cliente.post('/api/questoes/bulk', data='{"nao": "array"}', headers=professor,
+                            content_type='application/json')
+
+    assert resposta.get_json()['erros'] == [{'linha': 1, 'error': 'Esperado um array JSON'}]
+
+
+def test_questoes_importadas_entram_na_busca(app, cliente, criar_usuario, disciplina_id, monkeypatch):
+    _, professor = criar_usuario(tipo_usuario='professor')
+    # Lotes pequenos: a reindexação precisa acontecer em cada transação
+    monkeypatch.setattr(rotas_questao, 'TAMANHO_LOTE_IMPORTACAO', 2)
+    corpo = _ndjson(*(_questao(disciplina_id, f'Eletronegatividade do elemento {i}') for i in range(5)))
+
+    assert cliente.post('/api/questoes/bulk', data=corpo, headers=professor).get_json()['inseridas'] == 5
+
+    with app.app_context():
+        resultados = buscar('eletronegatividade', tipos=['questao'])
+        ids = set(db.session.scalars(db.select(Questao.id)))
+    assert {resultado['id'] for resultado in resultados} == ids
+
+
+def test_limite_de_registros_por_requisicao(app, cliente, criar_usuario, disciplina_id, monkeypatch):
+    _, professor = criar_usuario(tipo_usuario='professor')
+    monkeypatch.setattr(rotas_questao, 'TAMANHO_LOTE_IMPORTACAO', 2)
+    monkeypatch.setattr(rotas_questao, 'MAX_REGISTROS_IMPORTACAO', 3)
+    corpo = _ndjson(*(_questao(disciplina_id, f'Questão {i}') for i in range(5)))
+
+    resposta = cliente.post('/api/questoes/bulk', data=corpo, headers=professor)
+
+    assert resposta.status_code == 413
+    assert resposta.get_json()['inseridas'] == 3
+    assert _textos(app) == ['Questão 0', 'Questão 1', 'Questão 2']
@@ -0,0 +1,134 @@
+import pytest
+from src.models.user import db
+from src.models.disciplina import Disciplina
+from src.models.insight_usuario import InsightUsuario
+from src.models.metrica_usuario import MetricaUsuario
+from src.utils import insights
+from src.utils.cache_resultados import invalidar_metricas_usuario
+
+# (disciplina, taxa_acertos, dias_constancia, tempo_estudo_minutos)
+METRICAS = [
+    ('Álgebra', 12.35, 0, 30),    # alerta, motivação e sugestão; 12.35 é 12.3499... em binário
+    ('Biologia', 80.0, 9, 240),   # parabéns
+    ('Química', 45.25, 3, 60),    # alerta; empate exato arredonda para o par
+    ('História', 60.0, 7, 59),    # parabéns e sugestão
+]
+
+# Saída da antiga geração por requisição para METRICAS: cinco insights, ordenados por prioridade
+ESPERADOS = [
+    {'tipo': 'alerta', 'titulo': 'Taxa de acertos baixa em Álgebra',
+     'descricao': 'Sua taxa de acertos em Álgebra está em 12.3%. Considere revisar o conteúdo.',
+     'acao': 'Revisar mapas mentais', 'prioridade': 'alta'},
+    {'tipo': 'alerta', 'titulo': 'Taxa de acertos baixa em Química',
+     'descricao': 'Sua taxa de acertos em Química está em 45.2%. Considere revisar o conteúdo.',
+     'acao': 'Revisar mapas mentais', 'prioridade': 'alta'},
+    {'tipo': 'motivacao', 'titulo': 'Que tal estudar Álgebra hoje?',
+     'descricao': 'Você não estuda Álgebra há alguns dias. Uma sessão rápida pode ajudar!',
+     'acao': 'Iniciar treinamento', 'prioridade': 'media'},
+    {'tipo': 'sugestao', 'titulo': 'Aumente o tempo de estudo em Álgebra',
+     'descricao': 'Você estudou apenas 30 minutos de Álgebra. Que tal dedicar mais tempo?',
+     'acao': 'Criar plano de estudos', 'prioridade': 'media'},
+    {'tipo': 'sugestao', 'titulo': 'Aumente o tempo de estudo em História',
+     'descricao': 'Você estudou apenas 59 minutos de História. Que tal dedicar mais tempo?',
+     'acao': 'Criar plano de estudos', 'prioridade': 'media'},
+]
+
+
+@pytest.fixture
+def usuario(app, criar_usuario):
+    """Usuário com as métricas de METRICAS, gravadas pelo ORM (o after_flush calcula os insights)"""
+    usuario_id, cabecalho = criar_usuario()
+    with app.app_context():
+        for nome, taxa, dias, minutos in METRICAS:
+            disciplina = Disciplina(nome=nome)
+            db.session.add(disciplina)
+            db.session.flush()
+            db.session.add(MetricaUsuario(usuario_id=usuario_id, disciplina_id=disciplina.id,
+                                          taxa_acertos=taxa, dias_constancia=dias,
+                                          tempo_estudo_minutos=minutos))
+        db.session.commit()
+    return usuario_id, cabecalho
+
+
+def _gravados(app, usuario_id):
+    with app.app_context():
+        return [insight.to_dict() for insight in InsightUsuario.query.filter_by(
+            usuario_id=usuario_id
+        ).order_by(InsightUsuario.posicao)]
+
+
+def _endpoint(cliente, usuario_id, cabecalho):
+    invalidar_metricas_usuario(usuario_id)
+    resposta = cliente.get(f'/api/metricas/insights/{usuario_id}', headers=cabecalho)
+    assert resposta.status_code == 200
+    return resposta.get_json()
+
+
+def test_after_flush_e_endpoint_batem_com_a_geracao_original(app, cliente, usuario):
+    usuario_id, cabecalho = usuario
+    assert _gravados(app, usuario_id) == ESPERADOS
+    assert _endpoint(cliente, usuario_id, cabecalho) == ESPERADOS
+
+
+def test_job_completo_grava_o_mesmo_resultado(app, cliente, usuario, criar_usuario):
+    usuario_id, cabecalho = usuario
+    sem_metricas_id, _ = criar_usuario()
+    with app.app_context():
+        db.session.execute(db.delete(InsightUsuario))
+        db.session.commit()
+        usuarios, gravados, _ = insights.gerar_todos(app.config['SQLALCHEMY_DATABASE_URI'], tamanho_faixa=1)
+
+    assert (usuarios, gravados) == (2, len(ESPERADOS))
+    assert _gravados(app, usuario_id) == ESPERADOS
+    assert _gravados(app, sem_metricas_id) == []
+    assert _endpoint(cliente, usuario_id, cabecalho) == ESPERADOS
+
+
+def test_alteracoes_recalculam_na_mesma_transacao(app, cliente, usuario):
+    usuario_id, cabecalho = usuario
+    with app.app_context():
+        algebra = Disciplina.query.filter_by(nome='Álgebra').one()
+        metrica = MetricaUsuario.query.filter_by(usuario_id=usuario_id, disciplina_id=algebra.id).one()
+        metrica.taxa_acertos = 90.0
+        metrica.dias_constancia = 1
+        metrica.tempo_estudo_minutos = 120
+        db.session.commit()
+
+    # Álgebra deixa de gerar insights e os parabéns, de prioridade baixa, entram nos cinco
+    esperados = ESPERADOS[1:2] + ESPERADOS[4:] + [
+        {'tipo': 'parabens', 'titulo': f'Excelente constância em {nome}!',
+         'descricao': f'Você está há {dias} dias estudando {nome} consistentemente.',
+         'acao': 'Continue assim!', 'prioridade': 'baixa'}
+        for nome, dias in (('Biologia', 9), ('História', 7))
+    ]
+    assert _gravados(app, usuario_id) == esperados
+    assert _endpoint(cliente, usuario_id, cabecalho) == esperados
+
+    with app.app_context():
+        Disciplina.query.filter_by(nome='Química').one().nome = 'Química Geral'
+        db.session.commit()
+    assert _gravados(app, usuario_id)[0]['titulo'] == 'Taxa de acertos baixa em Química Geral'
+
+    # Um rollback desfaz também os insights recalculados no flush
+    with app.app_context():
+        for metrica in MetricaUsuario.query.filter_by(usuario_id=usuario_id):
+            db.session.delete(metrica)
+        db.session.flush()
+        assert InsightUsuario.query.filter_by(usuario_id=usuario_id).count() == 0
+        db.session.rollback()
+    assert _gravados(app, usuario_id)[0]['titulo'] == 'Taxa de acertos baixa em Química Geral'
+
+
+@pytest.mark.parametrize('taxa, texto', [(12.35, '12.3'), (45.25, '45.2'), (0.25, '0.2'), (59.95, '60.0'), (0.0, '0.0')])
+def test_taxa_formatada_como_no_python(app, criar_usuario, taxa, texto):
+    usuario_id, _ = criar_usuario()
+    with app.app_context():
+        disciplina = Disciplina(nome='Lógica')
+        db.session.add(disciplina)
+        db.session.flush()
+        db.session.add(MetricaUsuario(usuario_id=usuario_id, disciplina_id=disciplina.id,
+                                      taxa_acertos=taxa, dias_constancia=3, tempo_estudo_minutos=90))
+        db.session.commit()
+
+    [insight] = _gravados(app, usuario_id)
+    assert insight['descricao'] == f'Sua taxa de acertos em Lógica está em {texto}%. Considere revisar o conteúdo.'
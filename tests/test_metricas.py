@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta
+from src.models.user import db
+from src.models.disciplina import Disciplina
+from src.models.estudo_diario import EstudoDiario
+from src.models.metrica_usuario import MetricaUsuario
+from src.models.sessao_treinamento import SessaoTreinamento
+from src.utils.cache_resultados import CacheLRU
+
+
+def test_dashboard_tempo_por_dia_cobre_sete_dias(app, cliente, criar_usuario):
+    usuario_id, cabecalho = criar_usuario()
+    hoje = datetime.utcnow().date()
+    with app.app_context():
+        for dias_atras in (0, 6, 7, 13):
+            db.session.add(EstudoDiario(usuario_id=usuario_id, dia=hoje - timedelta(days=dias_atras),
+                                        minutos=10, sessoes=1))
+        db.session.commit()
+
+    resposta = cliente.get(f'/api/metricas/dashboard/{usuario_id}', headers=cabecalho)
+    assert resposta.status_code == 200
+    dados = resposta.get_json()
+    assert sorted(dados['tempo_por_dia']) == [
+        (hoje - timedelta(days=6)).isoformat(), hoje.isoformat()
+    ]
+    assert len(dados['constancia_14_dias']) == 14
+    assert sum(dia['estudou'] for dia in dados['constancia_14_dias']) == 4
+
+
+def test_cache_lru_capacidade_ttl_e_filtro():
+    cache = CacheLRU(capacidade=2, ttl_segundos=60)
+    cache.guardar(('dashboard', 1), 'a')
+    cache.guardar(('dashboard', 2), 'b')
+    assert cache.obter(('dashboard', 1)) == 'a'
+    cache.guardar(('dashboard', 3), 'c')  # sai a menos usada recentemente
+    assert cache.obter(('dashboard', 2)) is None
+    cache.invalidar(lambda chave: chave[1] == 1)
+    assert cache.obter(('dashboard', 1)) is None
+    assert cache.obter(('dashboard', 3)) == 'c'
+    assert cache.estatisticas()['acertos'] == 2
+
+    expirado = CacheLRU(capacidade=2, ttl_segundos=-1)
+    expirado.guardar('chave', 'valor')
+    assert expirado.obter('chave') is None
+
+
+def _tempo_hoje(cliente, usuario_id, cabecalho):
+    resposta = cliente.get(f'/api/metricas/dashboard/{usuario_id}', headers=cabecalho)
+    assert resposta.status_code == 200
+    return resposta.get_json()['tempo_por_dia'].get(datetime.utcnow().date().isoformat())
+
+
+def test_dashboard_em_cache_ate_finalizar_sessao(app, cliente, criar_usuario):
+    usuario_id, cabecalho = criar_usuario()
+    assert _tempo_hoje(cliente, usuario_id, cabecalho) is None
+    with app.app_context():
+        # Escrita sem invalidação: a resposta em cache continua valendo
+        db.session.add(EstudoDiario(usuario_id=usuario_id, dia=datetime.utcnow().date(), minutos=5))
+        sessao = SessaoTreinamento(usuario_id=usuario_id, tipo='questoes',
+                                   data_inicio=datetime.utcnow() - timedelta(minutes=30))
+        db.session.add(sessao)
+        db.session.commit()
+        sessao_id = sessao.id
+    assert _tempo_hoje(cliente, usuario_id, cabecalho) is None
+
+    resposta = cliente.post(f'/api/treinamento/finalizar/{sessao_id}', headers=cabecalho)
+    assert resposta.status_code == 200
+    assert _tempo_hoje(cliente, usuario_id, cabecalho) == 35
+
+
+def test_alterar_disciplina_invalida_dashboards(app, cliente, criar_usuario):
+    usuario_id, cabecalho = criar_usuario()
+    with app.app_context():
+        disciplina = Disciplina(nome='Física')
+        db.session.add(disciplina)
+        db.session.flush()
+        db.session.add(MetricaUsuario(usuario_id=usuario_id, disciplina_id=disciplina.id,
+                                      tempo_estudo_minutos=0, taxa_acertos=50.0, dias_constancia=0))
+        db.session.commit()
+        disciplina_id = disciplina.id
+
+    def nomes():
+        dados = cliente.get(f'/api/metricas/dashboard/{usuario_id}', headers=cabecalho).get_json()
+        return [item['disciplina'] for item in dados['acertos_por_disciplina']]
+
+    assert nomes() == ['Física']
+    assert cliente.put(f'/api/disciplinas/{disciplina_id}', json={'nome': 'Física I'}).status_code == 200
+    assert nomes() == ['Física I']
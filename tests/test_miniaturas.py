@@ -0,0 +1,77 @@
+import os
+import pytest
+from src.models.user import db
+from src.models.disciplina import Disciplina
+from src.models.mapa_mental import MapaMental
+from src.utils import miniaturas
+
+
+@pytest.fixture
+def diretorio(tmp_path, monkeypatch):
+    monkeypatch.setattr(miniaturas, 'DIRETORIO', str(tmp_path))
+    # A geração é chamada diretamente nos testes, sem o temporizador
+    monkeypatch.setattr(miniaturas, 'agendar', lambda app, mapa_id, atraso=None: None)
+    return tmp_path
+
+
+@pytest.fixture
+def novo_mapa(app, criar_usuario):
+    autor_id, _ = criar_usuario()
+    with app.app_context():
+        disciplina = Disciplina(nome='Química')
+        db.session.add(disciplina)
+        db.session.commit()
+        disciplina_id = disciplina.id
+
+    def criar(texto='raiz', thumbnail_url=None):
+        with app.app_context():
+            mapa = MapaMental(disciplina_id=disciplina_id, titulo='Mapa', autor_id=autor_id,
+                              thumbnail_url=thumbnail_url)
+            mapa.set_nodos([{'id': 1, 'text': texto}])
+            mapa.set_arestas([])
+            db.session.add(mapa)
+            db.session.commit()
+            return mapa.id
+    return criar
+
+
+def _miniatura(app, mapa_id):
+    miniaturas._processar(app, mapa_id)
+    with app.app_context():
+        return db.session.get(MapaMental, mapa_id).thumbnail_url
+
+
+def _editar(app, mapa_id, texto):
+    with app.app_context():
+        mapa = db.session.get(MapaMental, mapa_id)
+        mapa.set_nodos([{'id': 1, 'text': texto}])
+        db.session.commit()
+
+
+def test_miniatura_anterior_e_apagada(app, diretorio, novo_mapa):
+    mapa_id = novo_mapa()
+    primeira = _miniatura(app, mapa_id)
+    assert os.listdir(diretorio) == [primeira.rsplit('/', 1)[1]]
+
+    _editar(app, mapa_id, 'alterado')
+    segunda = _miniatura(app, mapa_id)
+    assert segunda != primeira
+    assert os.listdir(diretorio) == [segunda.rsplit('/', 1)[1]]
+
+
+def test_miniatura_compartilhada_nao_e_apagada(app, diretorio, novo_mapa):
+    mapa_id, copia_id = novo_mapa(), novo_mapa()
+    compartilhada = _miniatura(app, mapa_id)
+    assert _miniatura(app, copia_id) == compartilhada
+
+    _editar(app, mapa_id, 'alterado')
+    _miniatura(app, mapa_id)
+    assert compartilhada.rsplit('/', 1)[1] in os.listdir(diretorio)
+
+
+def test_url_do_autor_com_prefixo_nao_apaga_arquivos(app, diretorio, novo_mapa):
+    alheio = diretorio / 'outro.svg'
+    alheio.write_text('<svg/>')
+    mapa_id = novo_mapa(thumbnail_url=miniaturas.PREFIXO_URL + 'outro.svg')
+    assert _miniatura(app, mapa_id).startswith(miniaturas.PREFIXO_URL)
+    assert alheio.exists()
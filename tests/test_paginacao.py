@@ -0,0 +1,74 @@
+import pytest
+from src.models.user import db, User
+from src.models.disciplina import Disciplina
+from src.models.mapa_mental import MapaMental
+from src.models.questao import Questao
+from src.utils.paginacao import CursorInvalido, codificar_cursor, decodificar_cursor
+
+
+def _percorrer(cliente, caminho, cabecalho=None):
+    """Segue next_cursor com páginas de 2 itens e retorna os ids na ordem entregue"""
+    ids, cursor = [], ''
+    while True:
+        separador = '&' if '?' in caminho else '?'
+        resposta = cliente.get(f'{caminho}{separador}limite=2&cursor={cursor}', headers=cabecalho)
+        assert resposta.status_code == 200
+        ids += [item['id'] for item in resposta.json['itens']]
+        cursor = resposta.json['next_cursor']
+        if cursor is None:
+            return ids
+
+
+def _sem_data(app, tabela, coluna, item_id):
+    # Linhas antigas, anteriores ao default da coluna
+    with app.app_context():
+        db.session.execute(db.text(f'UPDATE "{tabela}" SET {coluna} = NULL WHERE id = :id'), {'id': item_id})
+        db.session.commit()
+
+
+@pytest.fixture
+def catalogo(app, criar_usuario):
+    autor_id, _ = criar_usuario(tipo_usuario='professor')
+    with app.app_context():
+        disciplina = Disciplina(nome='Artes')
+        db.session.add(disciplina)
+        db.session.flush()
+        mapas, questoes = [], []
+        for i in range(5):
+            mapa = MapaMental(disciplina_id=disciplina.id, titulo=f'Mapa {i}', autor_id=autor_id)
+            mapa.set_nodos([])
+            mapa.set_arestas([])
+            mapas.append(mapa)
+            questoes.append(Questao(disciplina_id=disciplina.id, texto_questao=f'Questão {i}',
+                                    alternativas='["a"]', resposta_correta=0, autor_id=autor_id))
+        db.session.add_all(mapas + questoes)
+        db.session.commit()
+        return [mapa.id for mapa in mapas], [questao.id for questao in questoes]
+
+
+def test_cursor_ida_e_volta_inclusive_sem_data():
+    assert decodificar_cursor(codificar_cursor(None, 7)) == (None, 7)
+    with pytest.raises(CursorInvalido):
+        decodificar_cursor('lixo')
+
+
+@pytest.mark.parametrize('caminho, indice', [('/api/mapas', 0), ('/api/questoes', 1)])
+def test_catalogo_percorrido_inteiro_com_datas_nulas(app, cliente, catalogo, caminho, indice):
+    ids = catalogo[indice]
+    tabela = 'mapa_mental' if indice == 0 else 'questao'
+    _sem_data(app, tabela, 'data_criacao', ids[1])
+    _sem_data(app, tabela, 'data_criacao', ids[3])
+    # Mais recentes primeiro; sem data por último, também do maior id para o menor
+    com_data = sorted(set(ids) - {ids[1], ids[3]}, reverse=True)
+    assert _percorrer(cliente, caminho) == com_data + [ids[3], ids[1]]
+
+
+def test_usuarios_percorridos_inteiros(app, cliente, criar_usuario):
+    ids = [criar_usuario()[0] for _ in range(5)]
+    _sem_data(app, 'user', 'data_cadastro', ids[0])
+    assert _percorrer(cliente, '/api/users') == sorted(ids[1:], reverse=True) + [ids[0]]
+
+
+def test_cursor_invalido_responde_400(cliente):
+    assert cliente.get('/api/mapas?cursor=lixo').status_code == 400
+    assert cliente.get('/api/users?cursor=lixo').status_code == 400
@@ -0,0 +1,101 @@
+import bisect
+import random
+import pytest
+from src.models.user import db
+from src.models.disciplina import Disciplina
+from src.models.metrica_usuario import MetricaUsuario
+from src.utils import ranking
+from src.utils.lista_saltos import ListaSaltos
+
+
+def test_lista_saltos_acompanha_lista_ordenada():
+    gerador = random.Random(7)
+    lista, referencia = ListaSaltos(), []
+    for _ in range(2000):
+        chave = gerador.randrange(200)
+        if referencia and gerador.random() < 0.4:
+            chave = gerador.choice(referencia)
+            lista.remover(chave)
+            referencia.remove(chave)
+        else:
+            lista.inserir(chave)
+            bisect.insort(referencia, chave)
+        consulta = gerador.randrange(200)
+        assert lista.bisect_left(consulta) == bisect.bisect_left(referencia, consulta)
+    assert list(lista) == referencia
+    assert len(lista) == len(referencia)
+    assert [lista[i] for i in range(len(lista))] == referencia
+    assert lista.intervalo(-3, 10) == referencia[:10]
+    assert lista.intervalo(len(referencia) - 2, len(referencia) + 5) == referencia[-2:]
+
+
+def test_lista_saltos_remover_inexistente():
+    lista = ListaSaltos([1, 3])
+    with pytest.raises(ValueError):
+        lista.remover(2)
+    with pytest.raises(IndexError):
+        lista[2]
+
+
+@pytest.fixture
+def metricas(app, criar_usuario):
+    usuarios = [criar_usuario()[0] for _ in range(5)]
+    with app.app_context():
+        disciplina = Disciplina(nome='Geografia')
+        db.session.add(disciplina)
+        db.session.flush()
+        for usuario_id, taxa in zip(usuarios, [50.0, 90.0, 70.0, 70.0, 10.0]):
+            db.session.add(MetricaUsuario(usuario_id=usuario_id, disciplina_id=disciplina.id,
+                                          taxa_acertos=taxa, tempo_estudo_minutos=0))
+        db.session.commit()
+        return disciplina.id, usuarios
+
+
+def test_top_e_vizinhos_com_empates(app, metricas):
+    disciplina_id, usuarios = metricas
+    with app.app_context():
+        ranking.reconstruir()
+        assert [(item['posicao'], item['valor']) for item in ranking.top(disciplina_id, 'taxa_acertos', 3)] == [
+            (1, 90.0), (2, 70.0), (2, 70.0)
+        ]
+        posicao = ranking.posicao_usuario(disciplina_id, 'taxa_acertos', usuarios[0], vizinhos=1)
+        assert posicao['posicao'] == 4
+        assert posicao['total'] == 5
+        assert [item['valor'] for item in posicao['vizinhos']] == [70.0, 50.0, 10.0]
+
+
+def test_commit_atualiza_ranking_carregado(app, metricas):
+    disciplina_id, usuarios = metricas
+    with app.app_context():
+        ranking.top(disciplina_id, 'taxa_acertos')
+        metrica = MetricaUsuario.query.filter_by(usuario_id=usuarios[4], disciplina_id=disciplina_id).one()
+        metrica.taxa_acertos = 100.0
+        db.session.commit()
+        assert ranking.top(disciplina_id, 'taxa_acertos', 1)[0]['usuario_id'] == usuarios[4]
+
+
+def test_ranking_expirado_e_relido(app, metricas, monkeypatch):
+    disciplina_id, usuarios = metricas
+    with app.app_context():
+        ranking.top(disciplina_id, 'taxa_acertos')
+        # Escrita fora dos eventos desta sessão, como a de outro worker
+        db.session.execute(db.text('UPDATE metrica_usuario SET taxa_acertos = 100 WHERE usuario_id = :id'),
+                           {'id': usuarios[4]})
+        db.session.commit()
+        assert ranking.top(disciplina_id, 'taxa_acertos', 1)[0]['usuario_id'] == usuarios[1]
+        monkeypatch.setattr(ranking, 'VALIDADE_SEGUNDOS', -1)
+        assert ranking.top(disciplina_id, 'taxa_acertos', 1)[0]['usuario_id'] == usuarios[4]
+
+
+def test_rotas_de_ranking_exigem_token(cliente, criar_usuario, metricas):
+    disciplina_id, usuarios = metricas
+    _, cabecalho = criar_usuario()
+    _, admin = criar_usuario(tipo_usuario='admin')
+    top = f'/api/metricas/ranking/disciplina/{disciplina_id}'
+    posicao = f'{top}/usuario/{usuarios[0]}'
+
+    assert cliente.get(top).status_code == 401
+    assert cliente.get(top, headers=cabecalho).json['ranking'][0]['valor'] == 90.0
+    assert cliente.get(posicao).status_code == 401
+    assert cliente.get(posicao, headers=cabecalho).status_code == 403
+    assert cliente.get(posicao, headers=admin).json['posicao'] == 4
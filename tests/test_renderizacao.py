@@ -0,0 +1,90 @@
+import json
+import pytest
+from src.models.user import db
+from src.models.disciplina import Disciplina
+from src.models.resumo import Resumo
+from src.models.questao import Questao
+from src.routes.resumo import LIMIAR_STREAMING
+from src.utils.renderizacao import markdown_para_html, sanitizar_html
+
+
+@pytest.mark.parametrize('html', [
+    '<a href="javascript:alert(1)">x</a>',
+    '<a href="java&#9;script:alert(1)">x</a>',
+    '<a href="java&#10;script:alert(1)">x</a>',
+    '<a href="java&#13;script:alert(1)">x</a>',
+    '<a href="&#1;javascript:alert(1)">x</a>',
+    '<a href=" JaVaScRiPt:alert(1)">x</a>',
+    '<a href="javascript&colon;alert(1)">x</a>',
+    '<img src="java&#10;script:alert(1)">',
+    '<img src="data:text/html;base64,PHNjcmlwdD4=">',
+    '<a href="vb&#11;script:msgbox(1)">x</a>',
+])
+def test_remove_urls_com_esquema_perigoso(html):
+    resultado = sanitizar_html(html)
+    assert 'href=' not in resultado
+    assert 'src=' not in resultado
+
+
+@pytest.mark.parametrize('url', ['https://exemplo.com/a?b=1', 'mailto:a@b.com', '/relativa', '#ancora'])
+def test_mantem_urls_seguras(url):
+    assert f'href="{url}"' in sanitizar_html(f'<a href="{url}">x</a>')
+
+
+def test_remove_script_e_atributos_de_evento():
+    resultado = sanitizar_html('<p onclick="x()">a<script>alert(1)</script></p>')
+    assert resultado == '<p>a</p>'
+
+
+def test_link_markdown_passa_pelo_sanitizador():
+    assert 'href' not in markdown_para_html('[x](java\tscript:alert(1))')
+
+
+@pytest.fixture
+def resumo(app, criar_usuario):
+    autor_id, _ = criar_usuario(tipo_usuario='professor')
+
+    def criar(conteudo):
+        with app.app_context():
+            disciplina = Disciplina.query.first() or Disciplina(nome='Biologia')
+            db.session.add(disciplina)
+            db.session.flush()
+            novo = Resumo(disciplina_id=disciplina.id, titulo='Células', conteudo=conteudo, autor_id=autor_id)
+            db.session.add(novo)
+            db.session.commit()
+            return novo.id
+    return criar
+
+
+@pytest.mark.parametrize('fonte, inclui_markdown', [
+    ('', False), ('false', False), ('0', False), ('true', True), ('1', True), ('TRUE', True)
+])
+def test_obter_resumo_parametro_fonte(cliente, resumo, fonte, inclui_markdown):
+    resumo_id = resumo('# Título\n\n<script>alert(1)</script>texto')
+    dados = cliente.get(f'/api/resumos/{resumo_id}?fonte={fonte}').json
+    assert ('conteudo' in dados) is inclui_markdown
+    assert '<h1>' in dados['conteudo_html'] and '<script>' not in dados['conteudo_html']
+
+
+def test_obter_resumo_grande_em_blocos(cliente, resumo):
+    resumo_id = resumo('palavra "com" aspas\n\n' * (LIMIAR_STREAMING // 10))
+    resposta = cliente.get(f'/api/resumos/{resumo_id}')
+    assert resposta.is_streamed
+    dados = json.loads(resposta.get_data(as_text=True))
+    assert dados['id'] == resumo_id
+    assert dados['conteudo_html'].count('<p>') == LIMIAR_STREAMING // 10
+
+
+def test_questao_incluir_resposta_false_nao_expoe_resposta(app, cliente, criar_usuario):
+    autor_id, _ = criar_usuario(tipo_usuario='professor')
+    with app.app_context():
+        disciplina = Disciplina(nome='Lógica')
+        db.session.add(disciplina)
+        db.session.flush()
+        questao = Questao(disciplina_id=disciplina.id, texto_questao='?', alternativas='["a", "b"]',
+                          resposta_correta=1, autor_id=autor_id)
+        db.session.add(questao)
+        db.session.commit()
+        questao_id = questao.id
+    assert 'resposta_correta' not in cliente.get(f'/api/questoes/{questao_id}?incluir_resposta=false').json
+    assert cliente.get(f'/api/questoes/{questao_id}?incluir_resposta=true').json['resposta_correta'] == 1
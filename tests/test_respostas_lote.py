@@ -0,0 +1,146 @@
+import pytest
+from src.models.user import db
+from src.models.disciplina import Disciplina
+from src.models.questao import Questao
+from src.models.resposta_questao import RespostaQuestao
+from src.models.sessao_treinamento import SessaoTreinamento
+from src.routes import treinamento
+
+
+@pytest.fixture
+def estudante(criar_usuario):
+    return criar_usuario()
+
+
+@pytest.fixture
+def questoes(app, criar_usuario):
+    """Três questões cuja resposta correta é a alternativa 1"""
+    autor_id, _ = criar_usuario(tipo_usuario='professor')
+    with app.app_context():
+        disciplina = Disciplina(nome='Geografia')
+        db.session.add(disciplina)
+        db.session.flush()
+        lista = [
+            Questao(disciplina_id=disciplina.id, texto_questao=f'Questão {i}', alternativas='["a", "b"]',
+                    resposta_correta=1, explicacao=f'Explicação {i}', autor_id=autor_id)
+            for i in range(3)
+        ]
+        db.session.add_all(lista)
+        db.session.commit()
+        return [questao.id for questao in lista]
+
+
+@pytest.fixture
+def sessao_id(cliente, estudante):
+    resposta = cliente.post('/api/treinamento/iniciar', json={'tipo': 'questoes', 'total_itens': 3},
+                            headers=estudante[1])
+    return resposta.get_json()['id']
+
+
+def _responder(cliente, cabecalho, sessao_id, respostas):
+    return cliente.post('/api/treinamento/responder/lote',
+                        json={'sessao_id': sessao_id, 'respostas': respostas}, headers=cabecalho)
+
+
+def _sessao(app, sessao_id):
+    with app.app_context():
+        sessao = db.session.get(SessaoTreinamento, sessao_id)
+        respostas = db.session.scalar(
+            db.select(db.func.count(RespostaQuestao.id)).where(RespostaQuestao.sessao_id == sessao_id)
+        )
+        return sessao.itens_completados, sessao.respondidas, sessao.acertos, respostas
+
+
+def test_lote_registra_respostas_e_incrementa_contadores(app, cliente, estudante, questoes, sessao_id):
+    resposta = _responder(cliente, estudante[1], sessao_id, [
+        {'questao_id': questoes[0], 'resposta_usuario': 1, 'tempo_resposta_segundos': 30},
+        {'questao_id': questoes[1], 'resposta_usuario': 0},
+    ])
+
+    assert resposta.status_code == 200
+    dados = resposta.get_json()
+    assert dados['registradas'] == 2
+    assert dados['progresso'] == {'completados': 2, 'total': 3}
+    assert dados['resultados'] == [
+        {'questao_id': questoes[0], 'correta': True, 'resposta_correta': 1, 'explicacao': 'Explicação 0'},
+        {'questao_id': questoes[1], 'correta': False, 'resposta_correta': 1, 'explicacao': 'Explicação 1'},
+    ]
+    assert _sessao(app, sessao_id) == (2, 2, 1, 2)
+
+    # Um segundo lote soma aos contadores em vez de sobrescrevê-los
+    _responder(cliente, estudante[1], sessao_id, [{'questao_id': questoes[2], 'resposta_usuario': 1}])
+    assert _sessao(app, sessao_id) == (3, 3, 2, 3)
+
+
+def test_duplicadas_no_lote_e_entre_lotes(app, cliente, estudante, questoes, sessao_id):
+    _responder(cliente, estudante[1], sessao_id, [{'questao_id': questoes[0], 'resposta_usuario': 1}])
+
+    dados = _responder(cliente, estudante[1], sessao_id, [
+        {'questao_id': questoes[0], 'resposta_usuario': 0},
+        {'questao_id': questoes[1], 'resposta_usuario': 1},
+        {'questao_id': questoes[1], 'resposta_usuario': 0},
+    ]).get_json()
+
+    assert dados['registradas'] == 1
+    erro = 'Questão já foi respondida nesta sessão'
+    assert dados['resultados'][0] == {'questao_id': questoes[0], 'error': erro}
+    assert dados['resultados'][1]['correta'] is True
+    assert dados['resultados'][2] == {'questao_id': questoes[1], 'error': erro}
+    assert _sessao(app, sessao_id) == (2, 2, 2, 2)
+
+
+def test_questoes_desconhecidas_e_itens_invalidos(app, cliente, estudante, questoes, sessao_id):
+    dados = _responder(cliente, estudante[1], sessao_id, [
+        {'questao_id': max(questoes) + 1, 'resposta_usuario': 1},
+        {'questao_id': 'abc', 'resposta_usuario': 1},
+        {'questao_id': questoes[0]},
+        'texto',
+        {'questao_id': questoes[0], 'resposta_usuario': 1},
+    ]).get_json()
+
+    obrigatorios = {'error': 'Campos questao_id e resposta_usuario são obrigatórios'}
+    assert dados['resultados'][:4] == [
+        {'questao_id': max(questoes) + 1, 'error': 'Questão não encontrada'},
+        {'questao_id': 'abc', 'error': 'Questão não encontrada'},
+        obrigatorios,
+        obrigatorios,
+    ]
+    assert dados['registradas'] == 1
+    assert _sessao(app, sessao_id) == (1, 1, 1, 1)
+
+
+def test_limite_de_itens_por_lote(app, cliente, estudante, questoes, sessao_id):
+    item = {'questao_id': questoes[0], 'resposta_usuario': 1}
+
+    resposta = _responder(cliente, estudante[1], sessao_id, [item] * (treinamento.MAX_RESPOSTAS_LOTE + 1))
+    assert resposta.status_code == 400
+    assert _sessao(app, sessao_id) == (0, 0, 0, 0)
+
+    # No limite o lote é aceito; as repetições viram erros por item
+    dados = _responder(cliente, estudante[1], sessao_id, [item] * treinamento.MAX_RESPOSTAS_LOTE).get_json()
+    assert dados['registradas'] == 1
+    assert len(dados['resultados']) == treinamento.MAX_RESPOSTAS_LOTE
+
+
+@pytest.mark.parametrize('respostas', [[], 'nao-lista', None])
+def test_respostas_deve_ser_lista_nao_vazia(cliente, estudante, sessao_id, respostas):
+    assert _responder(cliente, estudante[1], sessao_id, respostas).status_code == 400
+
+
+def test_sessao_de_outro_usuario(app, cliente, criar_usuario, questoes, sessao_id):
+    _, outro = criar_usuario()
+    _, admin = criar_usuario(tipo_usuario='admin')
+    item = [{'questao_id': questoes[0], 'resposta_usuario': 1}]
+
+    assert _responder(cliente, {}, sessao_id, item).status_code == 401
+    assert _responder(cliente, outro, sessao_id, item).status_code == 403
+    assert _sessao(app, sessao_id) == (0, 0, 0, 0)
+    assert _responder(cliente, admin, sessao_id, item).status_code == 200
+
+
+def test_sessao_finalizada_ou_inexistente(cliente, estudante, questoes, sessao_id):
+    item = [{'questao_id': questoes[0], 'resposta_usuario': 1}]
+    cliente.post(f'/api/treinamento/finalizar/{sessao_id}', headers=estudante[1])
+
+    assert _responder(cliente, estudante[1], sessao_id, item).status_code == 404
+    assert _responder(cliente, estudante[1], sessao_id + 1, item).status_code == 404
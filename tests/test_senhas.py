@@ -0,0 +1,45 @@
+import os
+import signal
+import threading
+from src.utils import senhas
+
+
+def _login(cliente):
+    return cliente.post('/api/auth/login', json={'email': 'usuario1@exemplo.com', 'password': 'senha'})
+
+
+def test_login_reconstroi_pool_quebrado(cliente, criar_usuario):
+    criar_usuario()
+    assert _login(cliente).status_code == 200
+
+    # Um processo do pool morre: o executor fica quebrado para sempre se não for recriado
+    executor = senhas._pool['executor']
+    for processo in list(executor._processes.values()):
+        os.kill(processo.pid, signal.SIGKILL)
+    assert _login(cliente).status_code == 200
+    assert senhas._pool['executor'] is not executor
+    assert _login(cliente).status_code == 200
+
+
+def test_hash_antigo_e_atualizado_no_login(app, cliente, criar_usuario):
+    from werkzeug.security import generate_password_hash
+    from src.models.user import db, User
+    usuario_id, _ = criar_usuario()
+    with app.app_context():
+        db.session.get(User, usuario_id).senha_hash = generate_password_hash('senha', method='pbkdf2:sha256:500')
+        db.session.commit()
+    assert _login(cliente).status_code == 200
+    with app.app_context():
+        assert db.session.get(User, usuario_id).senha_hash.startswith(app.config['SENHA_METODO_HASH'] + '$')
+
+
+def test_saturacao_responde_429(monkeypatch, cliente, criar_usuario):
+    criar_usuario()
+    monkeypatch.setitem(senhas._pool, 'vagas', threading.BoundedSemaphore(1))
+    senhas._pool['vagas'].acquire()
+    try:
+        resposta = _login(cliente)
+    finally:
+        senhas._pool['vagas'].release()
+    assert resposta.status_code == 429
+    assert resposta.headers['Retry-After']